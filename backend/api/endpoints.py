@@ -1,85 +1,584 @@
+import os
+import re
+import time
+import json
 import logging
-from fastapi import APIRouter, UploadFile, File, HTTPException
+import threading
+import contextlib
+from fastapi import APIRouter, UploadFile, File, HTTPException, Header, Depends, Request
+from fastapi.responses import StreamingResponse, Response
+from fastapi.concurrency import run_in_threadpool
+from starlette.background import BackgroundTask
 from pydantic import BaseModel
-from backend.services.file_service import save_upload_file, index_document
+from prometheus_client import generate_latest, CONTENT_TYPE_LATEST
+from backend.services.file_service import (
+    save_upload_file, save_upload_stream, release_upload, hold_uploads, remove_upload, safe_filename, upload_limit_bytes, UploadTooLarge,
+    index_document, get_embedding_cache_stats, new_document_collection, list_collections, delete_chunks, drop_collection,
+    VECTOR_BACKENDS, COLLECTION_NAME, CHROMA_PATH, DATA_PATH, INCOMING_PATH, STALE_UPLOAD_SECONDS
+)
 from backend.services.chat_service import ChatService
-from backend.core.state import current_file
+from backend.services.job_service import job_manager, JobQueueFull
+from backend.services.answer_cache import answer_cache
+from backend.services.table_service import convert_to_columnar, remove_columnar, columnar_path, COLUMNAR_PATH
+from backend.services.lexical_index import LEXICAL_INDEX_PATH
+from backend.services.flat_store import FLAT_STORE_PATH
+from backend.services.pandas_workers import pandas_pool
+from backend.core.settings import settings
+from backend.core.state import session_store, DEFAULT_SESSION_ID
+from backend.core.manifest import manifest
+from backend.core.concurrency import chat_limiter
+from backend.core.metrics import start_timings, get_timings
+from backend.core.logging import logging_stats, SAMPLED
 
 logger = logging.getLogger("app")
 router = APIRouter()
 
+SESSION_ID_PATTERN = re.compile(r"^[A-Za-z0-9_-]{1,64}$")
+
 class ChatRequest(BaseModel):
     message: str
+    timings: bool = False  # Include a per-stage timing breakdown in the response
+
+async def get_session_id(x_session_id: str = Header(None)) -> str:
+    """Session of the caller (X-Session-Id header); clients without one share the default session."""
+    if x_session_id is None:
+        return DEFAULT_SESSION_ID
+    if not SESSION_ID_PATTERN.match(x_session_id):
+        raise HTTPException(status_code=400, detail="Invalid X-Session-Id header")
+    return x_session_id
+
+# Document -> (lock, number of threads holding or waiting for it); entries only exist while in use
+_document_locks: dict = {}
+_document_locks_guard = threading.Lock()
+
+@contextlib.contextmanager
+def _document_lock(document: str):
+    """Serialize indexing/deletion of a document (its collection, shared by its revisions)."""
+    with _document_locks_guard:
+        lock, users = _document_locks.get(document, (None, 0))
+        lock = lock or threading.Lock()
+        _document_locks[document] = (lock, users + 1)
+    try:
+        with lock:
+            yield
+    finally:
+        with _document_locks_guard:
+            lock, users = _document_locks[document]
+            if users > 1:
+                _document_locks[document] = (lock, users - 1)
+            else:
+                del _document_locks[document]
+
+# Content being indexed or converted: content hash -> {"job", "path", "file_type", "sessions": {session id: engine}}.
+# Registered when its job is queued and cleared once the manifest has it, so uploads of the same bytes
+# meanwhile join that job instead of indexing a second copy (whose manifest entry would replace the first).
+_pending_content: dict = {}
+_pending_content_lock = threading.Lock()
+
+def _switch_sessions(content_hash: str, path: str, file_type: str, collection: str = None) -> list[str]:
+    """Make just-recorded content the active file of every session that uploaded it (see _pending_content)."""
+    with _pending_content_lock:
+        pending = _pending_content.pop(content_hash, None)
+    sessions = pending["sessions"] if pending else {}
+    for session_id, engine in sessions.items():
+        session_store.update(session_id, path=path, file_type=file_type, engine=engine, collection=collection)
+    return list(sessions)
+
+def _in_vector_backend(entry: dict) -> bool:
+    """Whether a manifest entry's chunks are in the configured VECTOR_BACKEND (entries that don't record one predate it: Chroma)."""
+    return entry["file_type"] != "rag" or (entry.get("backend") or "chroma") == settings.VECTOR_BACKEND
+
+def _index_upload(job, file_path: str, content_hash: str, incremental: bool, replaces: str = None) -> dict:
+    """Background job body: index a RAG upload, then make it the active file of the sessions that uploaded it.
+
+    Without `replaces` every upload is a new document with its own collection, even if its filename
+    is already in use. With `replaces=<document id>` it becomes the next revision of that document.
+    """
+    target = manifest.get(replaces) if replaces else None
+    # Revisions share the replaced document's collection, except the legacy shared one (moved out)
+    reusable = target is not None and target["collection"] != COLLECTION_NAME
+    collection = target["collection"] if reusable else new_document_collection()
+    with _document_lock(collection):
+        previous = None
+        if reusable:
+            # Diff against the document's latest revision: `target`, unless a concurrent revision replaced it first
+            previous = manifest.latest_in(collection)
+        elif target is not None:
+            previous = (replaces, target)
+        # Chunks in another vector backend can't be reused: re-index in full (into the same collection name)
+        diffable = reusable and previous and _in_vector_backend(previous[1])
+        previous_chunk_ids = previous[1]["chunk_ids"] if diffable else None
+        chunk_ids = index_document(file_path, collection, previous_chunk_ids, incremental=incremental, progress=job.update)
+        if previous:
+            if not reusable and _in_vector_backend(previous[1]):
+                delete_chunks(previous[1]["collection"], previous[1]["chunk_ids"])
+            manifest.remove(previous[0])  # Its stale vectors are gone
+        manifest.record(content_hash, file_path, "rag", collection, chunk_ids, backend=settings.VECTOR_BACKEND)
+        if previous and previous[1]["path"] != file_path:
+            # Sessions on the replaced revision follow the document to this one
+            session_store.move(previous[1]["path"], file_path)
+
+    # Only switch the sessions' active file once indexing succeeded
+    sessions = _switch_sessions(content_hash, file_path, "rag", collection)
+    logger.info(f"Session {', '.join(sessions)}: mode set to RAG. Indexed {len(chunk_ids)} chunks.")
+    return {"chunks": len(chunk_ids), "message": f"Successfully indexed into {len(chunk_ids)} chunks."}
+
+def _convert_upload(job, file_path: str, content_hash: str, engine: str) -> dict:
+    """Background job body: convert an Excel/CSV upload to Parquet, then make it the active file of the sessions that uploaded it."""
+    from backend.services.sql_service import convert_with_duckdb  # Deferred: DuckDB is only needed here
+
+    # The SQL engine converts CSVs through DuckDB so files larger than RAM never hit pandas
+    convert = convert_with_duckdb if engine == "sql" else convert_to_columnar
+    summary = convert(file_path, progress=job.update)
+    manifest.record(content_hash, file_path, "pandas")
+
+    sessions = _switch_sessions(content_hash, file_path, "pandas")
+    logger.info(f"Session {', '.join(sessions)}: mode set to Pandas/Data Analysis ({engine} engine)")
+    return {
+        "chunks": 0,
+        "rows": summary["rows"],
+        "message": f"Uploaded for Data Analysis (Excel/CSV mode): {summary['rows']} rows, {len(summary['columns'])} columns."
+    }
+
+def _analysis_engine(engine: str | None) -> str:
+    engine = engine or settings.ANALYSIS_ENGINE
+    if engine not in ("pandas", "sql"):
+        raise HTTPException(status_code=400, detail=f"Unknown analysis engine: {engine}")
+    return engine
+
+def _upload_filename(filename: str) -> str:
+    try:
+        return safe_filename(filename)
+    except ValueError as e:
+        raise HTTPException(status_code=400, detail=str(e))
+
+def _check_revision(replaces: str | None, filename: str):
+    """Validate `replaces=<document id>`: an indexed document, replaced by another document (not a table)."""
+    if replaces is None:
+        return
+    entry = manifest.get(replaces)
+    if entry is None:
+        raise HTTPException(status_code=404, detail="Document to replace not found")
+    if entry["file_type"] != "rag" or filename.endswith((".xlsx", ".xls", ".csv")):
+        raise HTTPException(status_code=400, detail="Only indexed documents (not tables) can be replaced by a revision")
+
+def _too_large() -> HTTPException:
+    return HTTPException(status_code=413, detail=f"Upload exceeds the {settings.UPLOAD_MAX_MB} MB limit")
+
+def _releasing(file_path: str, content_hash: str, body):
+    """Job body that keeps the saved upload (and its content, see _pending_content) in flight until it has finished."""
+    def run(job):
+        try:
+            return body(job)
+        finally:
+            release_upload(file_path)
+            with _pending_content_lock:
+                if _pending_content.get(content_hash, {}).get("job") is job:
+                    del _pending_content[content_hash]  # Failed: the sessions that uploaded it keep their active file
+    return run
+
+async def _accept_upload(filename: str, save, engine: str, incremental: bool, replaces: str, session_id: str) -> dict:
+    """Await `save` (-> (path, sha256)), then switch to the known content, join the job already processing
+    it, or queue its indexing/conversion."""
+    file_path, job, owned = None, None, False
+    # 1. Save file locally (hashed and size-checked while streaming to disk)
+    try:
+        file_path, content_hash = await save
+        filename = os.path.basename(file_path)
+        logger.info(f"File saved to: {file_path} (sha256: {content_hash[:12]})")
+        is_table = filename.endswith((".xlsx", ".xls", ".csv"))
+
+        # Decided under the lock that clears pending content, so an upload racing the end of a job sees its manifest entry
+        with _pending_content_lock:
+            pending = _pending_content.get(content_hash)
+            entry = manifest.get(content_hash) if pending is None else None
+            if entry and not _in_vector_backend(entry):
+                # Indexed before VECTOR_BACKEND was switched: its collection is empty here, index it again
+                logger.info(f"Re-indexing {entry['filename']}: indexed with the {entry.get('backend') or 'chroma'} backend")
+                replaces = replaces or content_hash
+                entry = None
+            elif entry and not os.path.exists(entry["path"]):
+                entry = None
+
+            if pending is not None:
+                # 2a. Same bytes are being processed right now: wait for that job instead of starting another
+                pending["sessions"][session_id] = engine if pending["file_type"] == "pandas" else None
+                job = pending["job"]
+            elif entry is None:
+                # 3. Excel/CSV is converted to a columnar copy, everything else indexed for RAG, both in the background
+                if is_table:
+                    body = lambda job: _convert_upload(job, file_path, content_hash, engine)
+                else:
+                    body = lambda job: _index_upload(job, file_path, content_hash, incremental, replaces)
+                job = job_manager.submit(filename, _releasing(file_path, content_hash, body))
+                owned = True
+                _pending_content[content_hash] = {
+                    "job": job,
+                    "path": file_path,
+                    "file_type": "pandas" if is_table else "rag",
+                    "sessions": {session_id: engine if is_table else None}
+                }
+
+        if pending is not None:
+            if pending["path"] != file_path:
+                remove_upload(file_path)  # Drop the duplicate copy, keep the one being processed
+            logger.info(f"Duplicate upload of {filename} while it is being processed. Joined job {job.id}.")
+            return {
+                "filename": filename,
+                "status": "queued",
+                "job_id": job.id,
+                "chunks": 0,
+                "message": "Already being processed. Joined the running job."
+            }
+
+        # 2b. Content already indexed -> only switch the active session
+        if entry is not None:
+            if entry["path"] != file_path:
+                remove_upload(file_path)  # Drop the duplicate copy, keep the indexed one
+            # The store may read SQLite on a cache miss: keep that off the event loop
+            await run_in_threadpool(
+                session_store.update,
+                session_id,
+                path=entry["path"],
+                file_type=entry["file_type"],
+                engine=engine if entry["file_type"] == "pandas" else None,
+                collection=entry["collection"]
+            )
+            num_chunks = len(entry["chunk_ids"])
+            logger.info(f"Duplicate upload of {entry['filename']}. Skipped indexing.")
+            return {
+                "filename": filename,
+                "status": "success",
+                "chunks": num_chunks,
+                "message": f"Already indexed into {num_chunks} chunks. Switched active file."
+            }
+
+    except UploadTooLarge as e:
+        logger.warning(f"Rejected upload of {filename}: {e}")
+        raise _too_large()
+    except JobQueueFull as e:
+        logger.warning(f"Rejected upload of {filename}: {e}")
+        raise HTTPException(status_code=503, detail=str(e), headers={"Retry-After": "5"})
+    except Exception as e:
+        logger.error(f"Error during file upload: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    finally:
+        if file_path and not owned:
+            release_upload(file_path)  # No job of this upload took it over
+    
+    return {
+        "filename": filename, 
+        "status": "queued", 
+        "job_id": job.id,
+        "chunks": 0,
+        "message": "Processing started."
+    }
 
 @router.post("/upload")
-def upload_file(file: UploadFile = File(...)):
+async def upload_file(
+    file: UploadFile = File(...),
+    incremental: bool = True,
+    engine: str = None,
+    replaces: str = None,
+    session_id: str = Depends(get_session_id)
+):
     logger.info(f"Received file upload request: {file.filename}")
-    
-    # 1. Save file locally
-    try:
-        file_path = save_upload_file(file)
-        logger.info(f"File saved to: {file_path}")
-        
-        # 2. Determine type & Update State
-        if file.filename.endswith((".xlsx", ".xls", ".csv")):
-            current_file.file_type = "pandas"
-            num_chunks = 0
-            msg = "Uploaded for Data Analysis (Excel/CSV mode)."
-            logger.info("Mode set to: Pandas/Data Analysis")
+    engine = _analysis_engine(engine)
+    _check_revision(replaces, _upload_filename(file.filename))
+    if file.size is not None and file.size > upload_limit_bytes():
+        raise _too_large()
+    return await _accept_upload(file.filename, run_in_threadpool(save_upload_file, file), engine, incremental, replaces, session_id)
+
+@router.post("/upload/stream")
+async def upload_stream(
+    request: Request,
+    filename: str,
+    incremental: bool = True,
+    engine: str = None,
+    replaces: str = None,
+    session_id: str = Depends(get_session_id)
+):
+    """Upload a file sent as the raw request body (no multipart parsing or spooling): written straight to
+    disk with async file I/O, hashed and size-checked as it arrives. `replaces=<document id>` uploads it
+    as a new revision of that document."""
+    logger.info(f"Received streaming upload request: {filename}")
+    engine = _analysis_engine(engine)
+    filename = _upload_filename(filename)
+    _check_revision(replaces, filename)
+    content_length = request.headers.get("content-length", "")
+    if content_length.isdigit() and int(content_length) > upload_limit_bytes():
+        raise _too_large()  # Declared too large: reject before reading any of the body
+    return await _accept_upload(filename, save_upload_stream(filename, request.stream()), engine, incremental, replaces, session_id)
+
+def _delete_document(content_hash: str, entry: dict):
+    """Remove an indexed upload: its vectors/BM25 postings, Parquet copy, file and manifest entry."""
+    with _document_lock(entry["collection"] or content_hash):
+        others = [other for other_hash, other in manifest.items() if other_hash != content_hash]
+        collection = entry["collection"]
+        if collection:
+            if any(other["collection"] == collection for other in others):
+                # Shared (legacy) collection: only drop this document's chunks
+                delete_chunks(collection, entry["chunk_ids"])
+            else:
+                drop_collection(collection)
+        manifest.remove(content_hash)
+
+        if not any(other["path"] == entry["path"] for other in others):
+            if entry["file_type"] == "pandas":
+                remove_columnar(entry["path"])
+            remove_upload(entry["path"])
+            session_store.detach(entry["path"])
+    logger.info(f"🗑️ Deleted document {entry['filename']} ({content_hash[:12]})")
+
+def _directory_size(*paths: str) -> int:
+    total = 0
+    for path in paths:
+        for root, _, files in os.walk(path):
+            total += sum(os.path.getsize(os.path.join(root, name)) for name in files)
+    return total
+
+def _collect_garbage() -> dict:
+    """Delete collections (of every vector backend), BM25 indexes, uploads and Parquet copies no manifest
+    entry (or session) refers to."""
+    entries = [entry for _, entry in manifest.items()]
+    # Live collections per backend: after a VECTOR_BACKEND switch, re-indexed documents leave theirs in the old one
+    live_by_backend = {backend: set() for backend in VECTOR_BACKENDS}
+    for entry in entries:
+        if entry["collection"]:
+            live_by_backend[entry.get("backend") or "chroma"].add(entry["collection"])
+    # A session may still chat with a superseded collection (always in the configured backend)
+    live_by_backend[settings.VECTOR_BACKEND] |= session_store.collections_in_use()
+    live_collections = set().union(*live_by_backend.values())
+    live_paths = {os.path.normpath(entry["path"]) for entry in entries}
+    data_paths = (CHROMA_PATH, FLAT_STORE_PATH, LEXICAL_INDEX_PATH, DATA_PATH, COLUMNAR_PATH)
+    size_before = _directory_size(*data_paths)
+
+    dropped_collections = []
+    for backend, live in live_by_backend.items():
+        for name in list_collections(backend):
+            if name not in live:
+                drop_collection(name, backend)
+                dropped_collections.append(name)
+
+    removed_files = []
+    if os.path.exists(LEXICAL_INDEX_PATH):
+        for name in os.listdir(LEXICAL_INDEX_PATH):
+            if name.removesuffix(".json") not in live_collections:
+                removed_files.append(os.path.join(LEXICAL_INDEX_PATH, name))
+    if os.path.exists(DATA_PATH):
+        for root, dirs, files in os.walk(DATA_PATH):
+            for name in files:
+                path = os.path.join(root, name)
+                if os.path.normpath(root) == os.path.normpath(INCOMING_PATH):
+                    # Partial uploads: only those nothing has written to for a while are abandoned
+                    if time.time() - os.path.getmtime(path) > STALE_UPLOAD_SECONDS:
+                        removed_files.append(path)
+                elif os.path.normpath(path) not in live_paths:
+                    removed_files.append(path)
+    if os.path.exists(COLUMNAR_PATH):
+        live_columnar = {os.path.normpath(columnar_path(path)) for path in live_paths}
+        for name in os.listdir(COLUMNAR_PATH):
+            path = os.path.join(COLUMNAR_PATH, name)
+            if os.path.normpath(path.removesuffix(".json")) not in live_columnar:
+                removed_files.append(path)
+    for path in removed_files:
+        if path.startswith(DATA_PATH):
+            remove_upload(path)
+            session_store.detach(path)
         else:
-            current_file.file_type = "rag"
-            # 3. Process and Index for RAG
-            num_chunks = index_document(file_path)
-            msg = f"Successfully indexed into {num_chunks} chunks."
-            logger.info(f"Mode set to: RAG. Indexed {num_chunks} chunks.")
-            
-        current_file.path = file_path
-        current_file.save() # Persist state
-        
-    
+            os.remove(path)
+
+    reclaimed = size_before - _directory_size(*data_paths)
+    logger.info(f"🧹 Garbage collection: {len(dropped_collections)} collections, {len(removed_files)} files, {reclaimed / 1e6:.1f} MB reclaimed")
     return {
-        "filename": file.filename, 
-        "status": "success", 
-        "chunks": num_chunks,
-        "message": msg
+        "dropped_collections": dropped_collections,
+        "removed_files": removed_files,
+        "reclaimed_bytes": reclaimed
     }
 
+@router.get("/documents")
+def list_documents():
+    """Indexed uploads, keyed by content hash."""
+    return [
+        {
+            "id": content_hash,
+            "filename": entry["filename"],
+            "type": entry["file_type"],
+            "collection": entry["collection"],
+            "chunks": len(entry["chunk_ids"]),
+            "indexed_at": entry["indexed_at"]
+        }
+        for content_hash, entry in manifest.items()
+    ]
+
+@router.delete("/documents/{document_id}")
+def delete_document(document_id: str):
+    """Delete an indexed upload and reclaim its disk space. Sessions using it are reset."""
+    entry = manifest.get(document_id)
+    if not entry:
+        raise HTTPException(status_code=404, detail="Document not found")
+    try:
+        _delete_document(document_id, entry)
+    except Exception as e:
+        logger.error(f"Error deleting document {document_id}: {str(e)}", exc_info=True)
+        raise HTTPException(status_code=500, detail=str(e))
+    return {"id": document_id, "status": "deleted"}
+
+@router.post("/documents/gc")
+def collect_garbage():
+    """Reclaim disk space held by data no indexed document refers to (e.g. failed or superseded uploads)."""
+    if not manifest.trusted:
+        raise HTTPException(status_code=503, detail="The document manifest could not be loaded. Garbage collection is disabled until it is restored.")
+    # Uploads are held off while collecting: in-flight ones (saved, or with a queued/running job)
+    # own files and collections that are not in the manifest yet
+    with hold_uploads() as in_flight:
+        if in_flight or job_manager.active():
+            raise HTTPException(status_code=409, detail="Uploads are being processed. Retry when they have finished.", headers={"Retry-After": "5"})
+        try:
+            return _collect_garbage()
+        except Exception as e:
+            logger.error(f"Error during garbage collection: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+
+@router.get("/jobs/{job_id}")
+def get_job(job_id: str):
+    """Progress of a background indexing/conversion job."""
+    job = job_manager.get(job_id)
+    if not job:
+        raise HTTPException(status_code=404, detail="Job not found")
+    return job.to_dict()
+
 @router.get("/status")
-def get_status():
+def get_status(session_id: str = Depends(get_session_id)):
     """Get the current file session state."""
-    if current_file.path:
-        filename = current_file.path.split("/")[-1] # Extract filename from path
+    session = session_store.get(session_id)
+    if session.path:
+        filename = session.path.split("/")[-1] # Extract filename from path
         return {
             "active": True,
+            "document_id": manifest.id_for_path(session.path),
             "filename": filename,
-            "type": current_file.file_type
+            "type": session.file_type,
+            "engine": session.engine
         }
     return {"active": False}
 
+@router.get("/stats")
+def get_stats():
+    """Cache counters for monitoring."""
+    return {
+        "embedding_cache": get_embedding_cache_stats(),
+        "answer_cache": answer_cache.stats(),
+        "pandas_workers": pandas_pool.stats(),
+        "chat_limiter": chat_limiter.stats(),
+        "sessions": session_store.stats(),
+        "logging": logging_stats()
+    }
+
+@router.get("/metrics")
+def metrics():
+    """Prometheus metrics: per-stage latency histograms, LLM time to first token, token and agent step counters."""
+    return Response(generate_latest(), media_type=CONTENT_TYPE_LATEST)
+
 @router.post("/chat")
-def chat(request: ChatRequest):
-    logger.info(f"Received chat request: {request.message[:50]}...") # Log first 50 chars only
+async def chat(request: ChatRequest, session_id: str = Depends(get_session_id)):
+    logger.info("Received chat request: %s...", request.message[:50], extra=SAMPLED) # Log first 50 chars only
     
-    if not current_file.path:
+    # Snapshot: an upload finishing mid-request must not switch the document under it
+    session = await run_in_threadpool(session_store.get, session_id)
+    if not session.path:
         logger.warning("Chat attempted without uploaded file.")
         return {"response": "No file uploaded yet. Please upload a file first."}
 
-    try:
-        # --- MODE 1: PANDAS AGENT (Excel/CSV) ---
-        if current_file.file_type == "pandas":
-            logger.info("Routing to Pandas Agent")
-            answer, steps = ChatService.run_pandas_agent(current_file.path, request.message)
-            return {
-                "response": answer,
-                "steps": steps
-            }
+    async with chat_limiter.slot():
+        if request.timings:
+            start_timings()
+        try:
+            # --- MODE 1: PANDAS AGENT / DUCKDB SQL (Excel/CSV) ---
+            if session.file_type == "pandas":
+                if session.engine == "sql":
+                    logger.info("Routing to SQL Agent", extra=SAMPLED)
+                    answer, steps = await ChatService.run_sql_agent(session.path, request.message)
+                else:
+                    logger.info("Routing to Pandas Agent", extra=SAMPLED)
+                    answer, steps = await ChatService.run_pandas_agent(session.path, request.message)
+                response = {
+                    "response": answer,
+                    "steps": steps
+                }
 
-        # --- MODE 2: RAG (PDF/TXT) ---
-        else:
-            logger.info("Routing to RAG Chain")
-            answer = ChatService.run_rag_chain(request.message)
-            return {"response": answer}
-            
-    except Exception as e:
-        logger.error(f"Error during chat generation: {str(e)}", exc_info=True)
-        raise HTTPException(status_code=500, detail=str(e))
+            # --- MODE 2: RAG (PDF/TXT) ---
+            else:
+                logger.info("Routing to RAG Chain", extra=SAMPLED)
+                answer = await ChatService.run_rag_chain(request.message, session.collection or COLLECTION_NAME)
+                response = {"response": answer}
+
+            if request.timings:
+                response["timings"] = get_timings()
+            return response
+                
+        except Exception as e:
+            logger.error(f"Error during chat generation: {str(e)}", exc_info=True)
+            raise HTTPException(status_code=500, detail=str(e))
+
+def _sse(event: str, data: dict) -> str:
+    """Format one Server-Sent Event."""
+    return f"event: {event}\ndata: {json.dumps(data, ensure_ascii=False, default=str)}\n\n"
+
+@router.post("/chat/stream")
+async def chat_stream(request: ChatRequest, session_id: str = Depends(get_session_id)):
+    """
+    Streaming variant of /chat (Server-Sent Events). Emits `step` events as agent tool calls finish,
+    `token` events as the answer is generated, and a final `done` (or `error`) event.
+    """
+    logger.info("Received streaming chat request: %s...", request.message[:50], extra=SAMPLED)
+    # Pin the active file now; an upload during generation must not switch it mid-stream
+    session = await run_in_threadpool(session_store.get, session_id)
+    if not session.path:
+        return StreamingResponse(
+            iter([_sse("done", {"response": "No file uploaded yet. Please upload a file first.", "steps": []})]),
+            media_type="text/event-stream"
+        )
+
+    # Slot acquired before the response starts (so overload is a plain 429/503) and held until the stream ends
+    release = await chat_limiter.acquire()
+
+    async def event_stream():
+        answer, steps = "", []
+        if request.timings:
+            start_timings()
+        try:
+            if session.file_type == "pandas":
+                if session.engine == "sql":
+                    logger.info("Streaming SQL Agent", extra=SAMPLED)
+                    events = ChatService.stream_sql_agent(session.path, request.message)
+                else:
+                    logger.info("Streaming Pandas Agent", extra=SAMPLED)
+                    events = ChatService.stream_pandas_agent(session.path, request.message)
+            else:
+                logger.info("Streaming RAG Chain", extra=SAMPLED)
+                events = ChatService.stream_rag_chain(request.message, session.collection or COLLECTION_NAME)
+
+            async for event, payload in events:
+                if event == "step":
+                    steps.append(payload)
+                    yield _sse("step", payload)
+                else:
+                    answer += payload
+                    yield _sse("token", {"text": payload})
+            done = {"response": answer, "steps": steps}
+            if request.timings:
+                done["timings"] = get_timings()
+            yield _sse("done", done)
+        except Exception as e:
+            logger.error(f"Error during streaming chat generation: {str(e)}", exc_info=True)
+            yield _sse("error", {"detail": str(e)})
+        finally:
+            release()
+
+    return StreamingResponse(
+        event_stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+        background=BackgroundTask(release)  # In case the stream never started
+    )
@@ -0,0 +1,79 @@
+import asyncio
+import logging
+from contextlib import asynccontextmanager
+from fastapi import HTTPException
+from backend.core.settings import settings
+
+logger = logging.getLogger("app")
+
+class ConcurrencyLimiter:
+    """
+    Caps the number of requests served at once. Up to `max_queue` extra requests wait for a slot;
+    beyond that they are rejected immediately with 429, and waiting longer than `queue_timeout`
+    seconds fails with 503, so overload surfaces fast instead of as client timeouts.
+    """
+
+    def __init__(self, max_concurrency: int, max_queue: int, queue_timeout: float):
+        self.max_concurrency = max_concurrency
+        self.max_queue = max_queue
+        self.queue_timeout = queue_timeout
+        self._semaphore = asyncio.Semaphore(max_concurrency)
+        self.active = 0
+        self.waiting = 0
+        self.rejected = 0
+        self.timed_out = 0
+
+    async def acquire(self):
+        """Wait for a slot and return its (idempotent) release callback."""
+        if not self._semaphore.locked():
+            await self._semaphore.acquire()  # Free slot: returns without suspending
+        elif self.waiting >= self.max_queue:
+            self.rejected += 1
+            logger.warning(f"🚦 Rejected request: {self.active} active, {self.waiting} waiting")
+            raise HTTPException(status_code=429, detail="Server busy, please retry shortly.", headers={"Retry-After": "1"})
+        else:
+            self.waiting += 1
+            try:
+                await asyncio.wait_for(self._semaphore.acquire(), timeout=self.queue_timeout)
+            except asyncio.TimeoutError:
+                self.timed_out += 1
+                logger.warning(f"🚦 Request waited {self.queue_timeout}s without getting a slot")
+                raise HTTPException(status_code=503, detail="Server overloaded, please retry later.", headers={"Retry-After": "5"})
+            finally:
+                self.waiting -= 1
+        self.active += 1
+
+        released = False
+
+        def release():
+            nonlocal released
+            if not released:
+                released = True
+                self.active -= 1
+                self._semaphore.release()
+
+        return release
+
+    @asynccontextmanager
+    async def slot(self):
+        release = await self.acquire()
+        try:
+            yield
+        finally:
+            release()
+
+    def stats(self) -> dict:
+        return {
+            "max_concurrency": self.max_concurrency,
+            "active": self.active,
+            "waiting": self.waiting,
+            "rejected": self.rejected,
+            "timed_out": self.timed_out,
+        }
+
+# Singleton instance
+chat_limiter = ConcurrencyLimiter(
+    max_concurrency=settings.CHAT_MAX_CONCURRENCY,
+    max_queue=settings.CHAT_MAX_QUEUE,
+    queue_timeout=settings.CHAT_QUEUE_TIMEOUT_SECONDS
+)
@@ -1,7 +1,13 @@
-import logging
-import logging.config
 import os
-from datetime import datetime
+import json
+import queue
+import atexit
+import random
+import logging
+import logging.handlers
+from contextvars import ContextVar
+from datetime import datetime, timezone
+from backend.core.settings import settings
 
 # Ensure logs directory exists
 LOG_DIR = "logs"
@@ -11,53 +17,136 @@ if not os.path.exists(LOG_DIR):
 # Log file path
 LOG_FILE_PATH = os.path.join(LOG_DIR, "app.log")
 
-LOGGING_CONFIG = {
-    "version": 1,
-    "disable_existing_loggers": False,
-    "formatters": {
-        "standard": {
-            "format": "%(asctime)s - %(name)s - %(levelname)s - %(message)s",
-            "datefmt": "%Y-%m-%d %H:%M:%S",
-        },
-        "json": {
-            "format": "%(asctime)s %(levelname)s %(message)s", 
-            # In a real app, you might use python-json-logger here
+TEXT_FORMAT = "%(asctime)s - %(name)s - %(levelname)s - %(message)s"
+DATE_FORMAT = "%Y-%m-%d %H:%M:%S"
+
+# Loggers routed through the queue (besides root); they don't propagate, so each record is written once.
+# Uvicorn's own loggers are listed one by one: its CLI (`uvicorn backend.main:app`) configures them
+# before the app is imported, giving uvicorn.access a synchronous handler of its own.
+QUEUED_LOGGERS = ("app", "uvicorn", "uvicorn.error", "uvicorn.access")
+# Loggers whose every record is high-volume (one per request), sampled like extra={"sampled": True} lines
+SAMPLED_LOGGERS = ("uvicorn.access",)
+
+# `extra` marking a high-volume line for sampling, e.g. logger.info("Routing to RAG Chain", extra=SAMPLED)
+SAMPLED = {"sampled": True}
+
+# Id of the request being handled, set by the request middleware
+request_id_var: ContextVar = ContextVar("request_id", default=None)
+
+# Attributes every LogRecord has; anything else came from `extra` and is emitted as a JSON field
+_RECORD_ATTRIBUTES = set(vars(logging.makeLogRecord({}))) | {"message", "asctime", "request_id", "sampled"}
+
+class RequestContextFilter(logging.Filter):
+    """Stamps records with the current request id (runs in the calling thread, before queueing)."""
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        record.request_id = request_id_var.get()
+        return True
+
+class SamplingFilter(logging.Filter):
+    """Keeps `rate` of the high-volume records (extra={"sampled": True} or SAMPLED_LOGGERS). Warnings and errors always pass."""
+
+    def __init__(self, rate: float):
+        super().__init__()
+        self.rate = rate
+
+    def filter(self, record: logging.LogRecord) -> bool:
+        if record.levelno >= logging.WARNING:
+            return True
+        if getattr(record, "sampled", False) or record.name in SAMPLED_LOGGERS:
+            return random.random() < self.rate
+        return True
+
+class JsonFormatter(logging.Formatter):
+    """One JSON object per line: time, level, logger, message, request id and any `extra` fields (e.g. timings)."""
+
+    def format(self, record: logging.LogRecord) -> str:
+        entry = {
+            "ts": datetime.fromtimestamp(record.created, timezone.utc).isoformat(timespec="milliseconds"),
+            "level": record.levelname,
+            "logger": record.name,
+            "message": record.getMessage(),
         }
-    },
-    "handlers": {
-        "console": {
-            "level": "INFO",
-            "class": "logging.StreamHandler",
-            "formatter": "standard",
-        },
-        "file": {
-            "level": "INFO",
-            "class": "logging.handlers.RotatingFileHandler",
-            "filename": LOG_FILE_PATH,
-            "maxBytes": 10 * 1024 * 1024,  # 10 MB
-            "backupCount": 5,
-            "formatter": "standard",
-            "encoding": "utf8"
-        },
-    },
-    "loggers": {
-        "uvicorn": {
-            "handlers": ["console", "file"],
-            "level": "INFO",
-            "propagate": False
-        },
-        "app": {  # Our application logger
-            "handlers": ["console", "file"],
-            "level": "INFO",
-            "propagate": False
-        },
-    },
-    "root": {
-        "handlers": ["console", "file"],
-        "level": "INFO",
-    }
-}
+        if getattr(record, "request_id", None):
+            entry["request_id"] = record.request_id
+        for name, value in vars(record).items():
+            if name not in _RECORD_ATTRIBUTES:
+                entry[name] = value
+        if record.exc_info:
+            entry["exception"] = self.formatException(record.exc_info)
+        return json.dumps(entry, ensure_ascii=False, default=str)
+
+class NonBlockingQueueHandler(logging.handlers.QueueHandler):
+    """
+    Hands records to the background writer as-is: message formatting happens in the writer thread,
+    not on the event loop. When the queue is full, records are dropped (and counted) instead of blocking.
+    """
+
+    def __init__(self, log_queue: queue.Queue):
+        super().__init__(log_queue)
+        self.dropped = 0
+
+    def prepare(self, record: logging.LogRecord) -> logging.LogRecord:
+        # Same-process queue: no need to pre-format or make the record picklable
+        return record
+
+    def enqueue(self, record: logging.LogRecord):
+        try:
+            self.queue.put_nowait(record)
+        except queue.Full:
+            self.dropped += 1
+
+_queue_handler = None
+_listener = None
 
 def setup_logging():
-    """Apply logging configuration."""
-    logging.config.dictConfig(LOGGING_CONFIG)
+    """
+    Route all logging through a bounded queue to a background writer thread (console + rotating file),
+    so request handlers never block on log I/O. Replaces any handlers already set on QUEUED_LOGGERS.
+    """
+    global _queue_handler, _listener
+    if _listener is not None:
+        return
+
+    if settings.LOG_FORMAT == "json":
+        formatter = JsonFormatter()
+    else:
+        formatter = logging.Formatter(TEXT_FORMAT, datefmt=DATE_FORMAT)
+    console = logging.StreamHandler()
+    file = logging.handlers.RotatingFileHandler(
+        LOG_FILE_PATH,
+        maxBytes=10 * 1024 * 1024,  # 10 MB
+        backupCount=5,
+        encoding="utf8"
+    )
+    for handler in (console, file):
+        handler.setFormatter(formatter)
+
+    _queue_handler = NonBlockingQueueHandler(queue.Queue(settings.LOG_QUEUE_SIZE))
+    _queue_handler.addFilter(SamplingFilter(settings.LOG_SAMPLE_RATE))
+    _queue_handler.addFilter(RequestContextFilter())
+
+    for name in QUEUED_LOGGERS:
+        logger = logging.getLogger(name)
+        logger.handlers = [_queue_handler]
+        logger.setLevel(settings.LOG_LEVEL)
+        logger.propagate = False
+    root = logging.getLogger()
+    root.handlers = [_queue_handler]
+    root.setLevel(settings.LOG_LEVEL)
+
+    _listener = logging.handlers.QueueListener(_queue_handler.queue, console, file, respect_handler_level=True)
+    _listener.start()
+    atexit.register(shutdown_logging)
+
+def shutdown_logging():
+    """Stop the background writer after it has written every queued record."""
+    global _listener
+    if _listener is not None:
+        _listener.stop()
+        _listener = None
+
+def logging_stats() -> dict:
+    if _queue_handler is None:
+        return {}
+    return {"queued": _queue_handler.queue.qsize(), "dropped": _queue_handler.dropped}
@@ -0,0 +1,107 @@
+import json
+import os
+import logging
+import threading
+from datetime import datetime
+
+logger = logging.getLogger("app")
+MANIFEST_FILE = "data/manifest.json"
+CORRUPT_MANIFEST_FILE = f"{MANIFEST_FILE}.corrupt"  # A manifest that failed to load, set aside for recovery
+
+class DocumentManifest:
+    """Maps upload content hashes (sha256) to the collection and chunk ids they were indexed into."""
+
+    def __init__(self):
+        self.entries: dict = {}
+        self._lock = threading.Lock()
+        self._save_lock = threading.Lock()
+
+    @property
+    def trusted(self) -> bool:
+        """False while a manifest that failed to load is set aside: entries may be missing, so data
+        they don't refer to must not be treated as garbage (see /documents/gc)."""
+        return not os.path.exists(CORRUPT_MANIFEST_FILE)
+
+    def get(self, content_hash: str):
+        """Return the manifest entry for a content hash, or None if it was never indexed."""
+        with self._lock:
+            return self.entries.get(content_hash)
+
+    def items(self) -> list:
+        """Snapshot of all (content_hash, entry) pairs."""
+        with self._lock:
+            return list(self.entries.items())
+
+    def latest_in(self, collection: str):
+        """Return (content_hash, entry) of the most recently indexed revision in a document's collection, or None."""
+        with self._lock:
+            revisions = [
+                (entry["indexed_at"], content_hash, entry)
+                for content_hash, entry in self.entries.items()
+                if entry["collection"] == collection and entry["chunk_ids"]
+            ]
+        if not revisions:
+            return None
+        _, content_hash, entry = max(revisions, key=lambda r: r[0])
+        return content_hash, entry
+
+    def id_for_path(self, path: str):
+        """Content hash of the entry stored at `path`, or None."""
+        with self._lock:
+            return next((content_hash for content_hash, entry in self.entries.items() if entry["path"] == path), None)
+
+    def remove(self, content_hash: str):
+        """Forget a superseded revision and persist the manifest."""
+        with self._lock:
+            self.entries.pop(content_hash, None)
+        self.save()
+
+    def record(self, content_hash: str, path: str, file_type: str, collection: str = None, chunk_ids: list = None, backend: str = None):
+        """Register an indexed upload (`backend`: vector backend holding its chunks) and persist the manifest."""
+        with self._lock:
+            self.entries[content_hash] = {
+                "path": path,
+                "filename": os.path.basename(path),
+                "file_type": file_type,
+                "collection": collection,
+                "chunk_ids": chunk_ids or [],
+                "backend": backend,
+                "indexed_at": datetime.now().isoformat(timespec="seconds"),
+            }
+        self.save()
+
+    def save(self):
+        """Persist manifest to disk atomically. Saves are serialized, so the file always holds the latest snapshot."""
+        try:
+            with self._save_lock:
+                with self._lock:
+                    data = json.dumps(self.entries)
+                os.makedirs(os.path.dirname(MANIFEST_FILE), exist_ok=True)
+                tmp_path = f"{MANIFEST_FILE}.tmp"
+                with open(tmp_path, "w") as f:
+                    f.write(data)
+                os.replace(tmp_path, MANIFEST_FILE)
+        except Exception as e:
+            logger.error(f"❌ Failed to save document manifest: {e}")
+
+    def load(self):
+        """Load manifest from disk. An unreadable one is moved to CORRUPT_MANIFEST_FILE and the manifest marked untrusted."""
+        if not os.path.exists(MANIFEST_FILE):
+            logger.info("No document manifest found. Starting fresh.")
+            return
+
+        try:
+            with open(MANIFEST_FILE, "r") as f:
+                entries = json.load(f)
+            with self._lock:
+                self.entries = entries
+            logger.info(f"♻️ Document manifest restored: {len(entries)} entries")
+        except Exception as e:
+            os.replace(MANIFEST_FILE, CORRUPT_MANIFEST_FILE)
+            logger.error(
+                f"❌ Failed to load document manifest ({e}). Moved it to {CORRUPT_MANIFEST_FILE}; garbage collection "
+                "is disabled until it is repaired and restored, or removed."
+            )
+
+# Singleton instance
+manifest = DocumentManifest()
@@ -0,0 +1,104 @@
+import time
+import logging
+from contextlib import contextmanager
+from contextvars import ContextVar
+from prometheus_client import Counter, Histogram
+from langchain_core.callbacks import BaseCallbackHandler
+
+logger = logging.getLogger("app")
+
+# Seconds; spans range from sub-millisecond cache hits to minute-long indexing batches
+LATENCY_BUCKETS = (0.001, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120)
+
+STAGE_SECONDS = Histogram("chatfile_stage_seconds", "Latency of pipeline stages", ["stage"], buckets=LATENCY_BUCKETS)
+REQUEST_SECONDS = Histogram("chatfile_request_seconds", "HTTP request latency", ["method", "path", "status"], buckets=LATENCY_BUCKETS)
+LLM_TTFT_SECONDS = Histogram("chatfile_llm_ttft_seconds", "Time to first streamed LLM token", buckets=LATENCY_BUCKETS)
+LLM_TOKENS = Counter("chatfile_llm_tokens_total", "LLM tokens used", ["kind"])
+AGENT_STEPS = Counter("chatfile_agent_steps_total", "Agent tool executions", ["tool"])
+
+# Per-request timing breakdown, collected only while a request asked for it (see start_timings)
+_request_timings: ContextVar = ContextVar("request_timings", default=None)
+
+def start_timings():
+    """Start collecting the spans of the current request (and the threads/tasks it spawns); no-op if already collecting."""
+    if _request_timings.get() is None:
+        _request_timings.set({"stages": {}, "tokens": {}})
+
+def get_timings() -> dict:
+    """Timing breakdown of the current request: {"stages": {stage: {"ms", "count"}}, "tokens": {...}}."""
+    timings = _request_timings.get()
+    if timings is None:
+        return {}
+    return {
+        "stages": {stage: {"ms": round(ms, 2), "count": count} for stage, (ms, count) in timings["stages"].items()},
+        "tokens": dict(timings["tokens"]),
+    }
+
+def observe(stage: str, seconds: float):
+    """Record a stage duration measured by the caller."""
+    STAGE_SECONDS.labels(stage=stage).observe(seconds)
+    timings = _request_timings.get()
+    if timings is not None:
+        ms, count = timings["stages"].get(stage, (0.0, 0))
+        timings["stages"][stage] = (ms + seconds * 1000, count + 1)
+
+@contextmanager
+def span(stage: str):
+    """Time a block as one occurrence of `stage`."""
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        observe(stage, time.perf_counter() - start)
+
+def record_tokens(prompt_tokens: int, completion_tokens: int):
+    LLM_TOKENS.labels(kind="prompt").inc(prompt_tokens)
+    LLM_TOKENS.labels(kind="completion").inc(completion_tokens)
+    timings = _request_timings.get()
+    if timings is not None:
+        for kind, count in (("prompt", prompt_tokens), ("completion", completion_tokens)):
+            timings["tokens"][kind] = timings["tokens"].get(kind, 0) + count
+
+class LLMMetricsCallback(BaseCallbackHandler):
+    """Records LLM call latency, time to first token (streaming calls) and token usage."""
+
+    run_inline = True  # Run in the caller's context so per-request timings see the events
+
+    def __init__(self):
+        self._started: dict = {}  # run id -> (start time, first token seen)
+
+    def on_chat_model_start(self, serialized, messages, *, run_id, **kwargs):
+        self._started[run_id] = (time.perf_counter(), False)
+
+    def on_llm_start(self, serialized, prompts, *, run_id, **kwargs):
+        self._started[run_id] = (time.perf_counter(), False)
+
+    def on_llm_new_token(self, token: str, *, run_id, **kwargs):
+        started = self._started.get(run_id)
+        if started and not started[1]:
+            self._started[run_id] = (started[0], True)
+            ttft = time.perf_counter() - started[0]
+            LLM_TTFT_SECONDS.observe(ttft)
+            observe("llm_ttft", ttft)
+
+    def on_llm_end(self, response, *, run_id, **kwargs):
+        started = self._started.pop(run_id, None)
+        if started:
+            observe("llm", time.perf_counter() - started[0])
+
+        usage = (response.llm_output or {}).get("token_usage") or {}
+        prompt_tokens, completion_tokens = usage.get("prompt_tokens", 0), usage.get("completion_tokens", 0)
+        if not usage:
+            # Streamed responses report usage on the message instead
+            for generations in response.generations:
+                for generation in generations:
+                    usage_metadata = getattr(getattr(generation, "message", None), "usage_metadata", None) or {}
+                    prompt_tokens += usage_metadata.get("input_tokens", 0)
+                    completion_tokens += usage_metadata.get("output_tokens", 0)
+        record_tokens(prompt_tokens, completion_tokens)
+
+    def on_llm_error(self, error, *, run_id, **kwargs):
+        self._started.pop(run_id, None)
+
+# Singleton instance
+llm_metrics = LLMMetricsCallback()
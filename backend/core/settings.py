@@ -6,6 +6,71 @@ class Settings(BaseSettings):
     DEEPSEEK_BASE_URL: str = "https://api.deepseek.com"
     MODEL_NAME: str = "deepseek-chat"
 
+    # LLM HTTP connection pool (shared by all requests)
+    LLM_MAX_CONNECTIONS: int = 100
+    LLM_MAX_KEEPALIVE_CONNECTIONS: int = 20
+    LLM_KEEPALIVE_EXPIRY_SECONDS: float = 30
+    LLM_TIMEOUT_SECONDS: float = 120
+
+    # Chat concurrency limits
+    CHAT_MAX_CONCURRENCY: int = 32  # Chat requests served at once
+    CHAT_MAX_QUEUE: int = 64  # Requests allowed to wait for a slot, beyond this -> 429
+    CHAT_QUEUE_TIMEOUT_SECONDS: float = 10  # Max wait for a slot, beyond this -> 503
+
+    # Embeddings
+    EMBEDDING_MODEL_NAME: str = "all-MiniLM-L6-v2"
+    EMBEDDING_BACKEND: str = "torch"  # 'torch' or 'onnx'
+    EMBEDDING_ONNX_FILE: str = "onnx/model_quint8_avx2.onnx"  # int8-quantized export shipped with the model
+    EMBEDDING_BATCH_SIZE: int = 32
+    EMBEDDING_WORKERS: int = 0  # Model replicas, 0 = half the CPUs
+    EMBEDDING_CACHE_MAX_ENTRIES: int = 100_000
+    EMBEDDING_CACHE_FLUSH_INTERVAL_SECONDS: float = 30.0  # Write-behind interval of the embedding cache (new vectors and LRU updates)
+
+    # Retrieval
+    VECTOR_BACKEND: str = "chroma"  # 'chroma' or 'flat' (exact NumPy search, for small/medium documents); documents indexed under the other backend are re-indexed when uploaded again
+    FLAT_VECTOR_DTYPE: str = "float16"  # 'float16' or 'int8' storage for the flat backend
+    HYBRID_RETRIEVAL: bool = True  # Fuse BM25 with dense search
+    CONTEXT_TOKEN_BUDGET: int = 3000  # Max context tokens sent to the LLM (tiktoken cl100k_base)
+    OPEN_COLLECTIONS_MAX: int = 64  # Collections whose vector store handle, BM25 index and RAG chain stay loaded (LRU)
+
+    # Semantic answer cache
+    ANSWER_CACHE_ENABLED: bool = True
+    ANSWER_CACHE_THRESHOLD: float = 0.95  # Min cosine similarity between queries
+    ANSWER_CACHE_TTL_SECONDS: int = 3600
+    ANSWER_CACHE_MAX_ENTRIES: int = 1000
+
+    # Data analysis (Excel/CSV)
+    DATAFRAME_CACHE_MAX_MB: int = 2048  # Split across pandas workers (each file is resident in one worker)
+    PANDAS_WORKERS: int = 0  # Agent code execution processes, 0 = one per CPU
+    PANDAS_CPU_SECONDS: int = 30  # CPU-time limit per code execution
+    PANDAS_MEMORY_LIMIT_MB: int = 4096  # Address-space limit per worker, 0 = unlimited
+    PANDAS_TIMEOUT_SECONDS: int = 60  # Wall-clock limit per code execution
+    ANALYSIS_ENGINE: str = "pandas"  # Default engine for uploads: 'pandas' (agent) or 'sql' (DuckDB)
+    SQL_MAX_RESULT_ROWS: int = 200
+    SQL_THREADS: int = 0  # 0 = DuckDB default (all cores)
+    SQL_MEMORY_LIMIT: str = "2GB"  # Beyond this DuckDB spills to disk
+
+    # Sessions
+    SESSION_CACHE_MAX_ENTRIES: int = 10_000  # Sessions kept in memory
+    SESSION_FLUSH_INTERVAL_SECONDS: float = 1.0  # Write-behind interval to data/sessions.db
+
+    # Uploads
+    UPLOAD_MAX_MB: int = 200  # Larger uploads are rejected with 413 as soon as the limit is crossed
+
+    # Background indexing
+    INDEX_WORKERS: int = 2
+    INDEX_QUEUE_SIZE: int = 8
+    INDEX_BATCH_SIZE: int = 64
+    INGEST_WORKERS: int = 0  # PDF extraction processes, 0 = one per CPU
+    INGEST_PAGES_PER_TASK: int = 8
+
+    # Logging
+    LOG_LEVEL: str = "INFO"
+    LOG_FORMAT: str = "text"  # 'text' or 'json' (one JSON object per line, with request id and timings)
+    LOG_QUEUE_SIZE: int = 10_000  # Records waiting for the background writer; beyond that they are dropped
+    LOG_SAMPLE_RATE: float = 0.1  # Fraction of high-volume lines (fast, successful requests) that are written
+    LOG_SLOW_REQUEST_MS: float = 1000  # Requests slower than this (or failing) are always logged
+
     class Config:
         env_file = ".env"
 
@@ -1,56 +1,222 @@
 import json
 import os
+import time
+import sqlite3
 import logging
+import threading
+from collections import OrderedDict
+from backend.core.settings import settings
 
 logger = logging.getLogger("app")
-STATE_FILE = "data/session_state.json"
-
-class CurrentFileState:
-    def __init__(self):
-        self.path: str = None
-        self.file_type: str = None # 'rag' or 'pandas'
-
-    def save(self):
-        """Persist current state to disk."""
-        data = {
-            "path": self.path, 
-            "file_type": self.file_type
+STATE_FILE = "data/session_state.json"  # Legacy single-session state, migrated to DEFAULT_SESSION_ID
+SESSIONS_DB = "data/sessions.db"
+DEFAULT_SESSION_ID = "default"
+
+class SessionState:
+    """The document a session is chatting with."""
+
+    def __init__(self, path: str = None, file_type: str = None, engine: str = None, collection: str = None, updated_at: float = 0.0):
+        self.path = path
+        self.file_type = file_type # 'rag' or 'pandas'
+        self.engine = engine # 'pandas' or 'sql' (for file_type 'pandas')
+        self.collection = collection # Vector collection of the document (for file_type 'rag')
+        self.updated_at = updated_at
+
+    def to_dict(self) -> dict:
+        return {
+            "path": self.path,
+            "file_type": self.file_type,
+            "engine": self.engine,
+            "collection": self.collection,
+            "updated_at": self.updated_at
         }
+
+class SessionStore:
+    """
+    Session id -> SessionState. Sessions live in an in-memory LRU; changes are written behind to
+    SQLite in batches every `flush_interval` seconds, so requests never wait on disk writes.
+    Sessions with unflushed changes are never evicted. Cache misses are read from SQLite without
+    holding the store lock, so a slow read only delays its own session.
+    """
+
+    def __init__(self, db_path: str, max_cached: int, flush_interval: float):
+        self.db_path = db_path
+        self.max_cached = max_cached
+        self.flush_interval = flush_interval
+        self._cache: OrderedDict = OrderedDict()  # session id -> SessionState, least recently used first
+        self._dirty: dict = {}  # session id -> row snapshot waiting to be flushed
+        self._lock = threading.Lock()
+        self._path_rewrites = 0  # Bumped by detach()/move(), so reads that raced with them are retried
+        self._db_lock = threading.Lock()
+        self._conn = None
+        self._stop = threading.Event()
+        self._flusher = None
+
+    def _db(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.db_path), exist_ok=True)
+            self._conn = sqlite3.connect(self.db_path, check_same_thread=False)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS sessions ("
+                "session_id TEXT PRIMARY KEY, path TEXT, file_type TEXT, engine TEXT, collection TEXT, updated_at REAL)"
+            )
+        return self._conn
+
+    def _read(self, session_id: str) -> SessionState:
+        with self._db_lock:
+            row = self._db().execute(
+                "SELECT path, file_type, engine, collection, updated_at FROM sessions WHERE session_id = ?", (session_id,)
+            ).fetchone()
+        if not row:
+            return SessionState()
+        state = SessionState(*row)
+        # Verify the file still exists on disk
+        if state.path and not os.path.exists(state.path):
+            logger.warning(f"⚠️ Session {session_id}: saved file path {state.path} not found on disk. Resetting state.")
+            return SessionState()
+        return state
+
+    def _with_state(self, session_id: str, fn):
+        """Return fn(state) of a session's cached state, called under the store lock. A cache miss
+        is read from SQLite outside the lock, then inserted unless another thread cached it first."""
+        loaded = None
+        while True:
+            with self._lock:
+                state = self._cache.get(session_id)
+                if state is None and loaded is not None and loaded_at == self._path_rewrites:
+                    state = self._cache[session_id] = loaded
+                    if len(self._cache) > self.max_cached:
+                        for evicted in [sid for sid in self._cache if sid not in self._dirty][:len(self._cache) - self.max_cached]:
+                            if evicted != session_id:
+                                del self._cache[evicted]
+                if state is not None:
+                    self._cache.move_to_end(session_id)
+                    return fn(state)
+                loaded_at = self._path_rewrites
+            loaded = self._read(session_id)
+
+    def get(self, session_id: str) -> SessionState:
+        """Snapshot of a session's state (unaffected by later updates)."""
+        return self._with_state(session_id, lambda state: SessionState(**state.to_dict()))
+
+    def update(self, session_id: str, **fields) -> SessionState:
+        """Atomically set fields of a session; persisted by the next flush."""
+        def apply(state: SessionState) -> SessionState:
+            for name, value in fields.items():
+                setattr(state, name, value)
+            state.updated_at = time.time()
+            self._dirty[session_id] = state.to_dict()
+            return SessionState(**state.to_dict())
+
+        return self._with_state(session_id, apply)
+
+    def detach(self, path: str):
+        """Reset every session (cached or persisted) whose active document is `path`, e.g. after it was deleted."""
+        with self._lock:
+            self._path_rewrites += 1
+            for session_id, state in self._cache.items():
+                if state.path == path:
+                    state.path = state.file_type = state.engine = state.collection = None
+                    state.updated_at = time.time()
+                    self._dirty[session_id] = state.to_dict()
+            with self._db_lock, self._db():
+                self._db().execute(
+                    "UPDATE sessions SET path = NULL, file_type = NULL, engine = NULL, collection = NULL, updated_at = ? WHERE path = ?",
+                    (time.time(), path)
+                )
+
+    def move(self, path: str, new_path: str):
+        """Point every session (cached or persisted) whose active document is `path` at `new_path`, e.g. its new revision."""
+        with self._lock:
+            self._path_rewrites += 1
+            for session_id, state in self._cache.items():
+                if state.path == path:
+                    state.path = new_path
+                    state.updated_at = time.time()
+                    self._dirty[session_id] = state.to_dict()
+            with self._db_lock, self._db():
+                self._db().execute("UPDATE sessions SET path = ?, updated_at = ? WHERE path = ?", (new_path, time.time(), path))
+
+    def collections_in_use(self) -> set:
+        """Vector collections some session (cached or persisted) is chatting with."""
+        with self._lock:
+            collections = {state.collection for state in self._cache.values() if state.collection}
+        with self._db_lock:
+            rows = self._db().execute("SELECT DISTINCT collection FROM sessions WHERE collection IS NOT NULL").fetchall()
+        return collections | {row[0] for row in rows}
+
+    def flush(self):
+        """Write all pending session changes to SQLite in one transaction."""
+        with self._lock:
+            pending = dict(self._dirty)
+        if not pending:
+            return
+
+        rows = [
+            (sid, row["path"], row["file_type"], row["engine"], row["collection"], row["updated_at"])
+            for sid, row in pending.items()
+        ]
         try:
-            # Ensure data dir exists
-            os.makedirs(os.path.dirname(STATE_FILE), exist_ok=True)
-            
-            with open(STATE_FILE, "w") as f:
-                json.dump(data, f)
-            logger.info(f"💾 Session state saved: {self.path}")
+            with self._db_lock, self._db():
+                self._db().executemany("INSERT OR REPLACE INTO sessions VALUES (?, ?, ?, ?, ?, ?)", rows)
         except Exception as e:
             logger.error(f"❌ Failed to save session state: {e}")
+            return
 
-    def load(self):
-        """Load state from disk."""
+        with self._lock:
+            for sid, row in pending.items():
+                if self._dirty.get(sid) is row:  # Not changed again while writing
+                    del self._dirty[sid]
+        logger.debug(f"💾 Flushed {len(rows)} sessions")
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            self.flush()
+
+    def _migrate_legacy_state(self):
+        """Import the old single-session json as the default session."""
         if not os.path.exists(STATE_FILE):
-            logger.info("No session state file found. Starting fresh.")
             return
-
         try:
             with open(STATE_FILE, "r") as f:
                 data = json.load(f)
-                
-            path = data.get("path")
-            file_type = data.get("file_type")
-
-            # Verify the file still exists on disk
-            if path and os.path.exists(path):
-                self.path = path
-                self.file_type = file_type
-                logger.info(f"♻️ Session state restored: {self.path} ({self.file_type})")
-            else:
-                logger.warning(f"⚠️ Saved file path {path} not found on disk. Resetting state.")
-                self.path = None
-                self.file_type = None
-                
+            with self._db_lock:
+                exists = self._db().execute("SELECT 1 FROM sessions WHERE session_id = ?", (DEFAULT_SESSION_ID,)).fetchone()
+            if not exists and data.get("path"):
+                self.update(DEFAULT_SESSION_ID, path=data["path"], file_type=data.get("file_type"), engine=data.get("engine"))
+                self.flush()
+                logger.info(f"♻️ Migrated legacy session state: {data['path']} ({data.get('file_type')})")
+            os.replace(STATE_FILE, f"{STATE_FILE}.migrated")
         except Exception as e:
-            logger.error(f"❌ Failed to load session state: {e}")
+            logger.error(f"❌ Failed to migrate legacy session state: {e}")
+
+    def load(self):
+        """Open the session database and start the write-behind flusher."""
+        self._migrate_legacy_state()
+        with self._db_lock:
+            count = self._db().execute("SELECT count(*) FROM sessions").fetchone()[0]
+        logger.info(f"♻️ Session store ready: {count} persisted sessions")
+        if self._flusher is None:
+            self._stop.clear()
+            self._flusher = threading.Thread(target=self._flush_loop, name="session-flusher", daemon=True)
+            self._flusher.start()
+
+    def close(self):
+        """Stop the flusher and persist pending changes."""
+        self._stop.set()
+        if self._flusher is not None:
+            self._flusher.join()
+            self._flusher = None
+        self.flush()
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"cached": len(self._cache), "pending_writes": len(self._dirty)}
 
 # Singleton instance
-current_file = CurrentFileState()
\ No newline at end of file
+session_store = SessionStore(
+    db_path=SESSIONS_DB,
+    max_cached=settings.SESSION_CACHE_MAX_ENTRIES,
+    flush_interval=settings.SESSION_FLUSH_INTERVAL_SECONDS
+)
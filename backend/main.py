@@ -1,12 +1,19 @@
 import time
+import uuid
 import logging
 from contextlib import asynccontextmanager
 from fastapi import FastAPI, HTTPException, Request
+from fastapi.responses import JSONResponse
 from backend.api.endpoints import router
 from backend.core.exceptions import global_exception_handler, http_exception_handler
-from backend.core.logging import setup_logging
-from backend.services.file_service import initialize_embeddings
-from backend.core.state import current_file
+from backend.core.logging import setup_logging, request_id_var
+from backend.core.settings import settings
+from backend.services.file_service import start_embeddings_warmup, embeddings_status, close_embeddings
+from backend.core.state import session_store
+from backend.core.metrics import REQUEST_SECONDS, start_timings, get_timings
+from backend.core.manifest import manifest
+from backend.services.pandas_workers import pandas_pool
+from backend.services.chat_service import close_http_clients
 
 # 1. Setup Logging
 setup_logging()
@@ -18,11 +25,12 @@ async def lifespan(app: FastAPI):
     # Startup logic
     logger.info("🚀 Application starting up...")
     try:
-        # Initialize Embeddings
-        initialize_embeddings()
+        # Load the embedding model in the background: the API serves immediately, /readyz reports when it is warm
+        start_embeddings_warmup()
         
         # Restore Session State
-        current_file.load()
+        session_store.load()
+        manifest.load()
         
     except Exception as e:
         logger.error(f"Critical error during startup: {e}")
@@ -31,6 +39,10 @@ async def lifespan(app: FastAPI):
     
     # Shutdown logic
     logger.info("🛑 Application shutting down...")
+    pandas_pool.shutdown()
+    await close_http_clients()
+    session_store.close()
+    close_embeddings()
 
 app = FastAPI(title="Chat-File Agent Backend", lifespan=lifespan)
 
@@ -41,17 +53,37 @@ app.add_exception_handler(HTTPException, http_exception_handler)
 # 4. Request Logging Middleware
 @app.middleware("http")
 async def log_requests(request: Request, call_next):
+    # Request id (client-supplied or generated) tags every log line of this request and is echoed back
+    request_id = request.headers.get("X-Request-Id") or uuid.uuid4().hex[:16]
+    request_id_var.set(request_id)
+    start_timings()
     start_time = time.time()
     
     # Process request
     response = await call_next(request)
     
-    process_time = (time.time() - start_time) * 1000
-    formatted_process_time = "{0:.2f}".format(process_time)
+    elapsed = time.time() - start_time
+    process_time = elapsed * 1000
+    # Labelled by route template (/documents/{document_id}), not the raw path, to bound cardinality
+    route = request.scope.get("route")
+    REQUEST_SECONDS.labels(
+        method=request.method, path=getattr(route, "path", "unmatched"), status=response.status_code
+    ).observe(elapsed)
     
+    response.headers["X-Request-Id"] = request_id
+
+    # Formatted by the background log writer; fast successful requests are sampled (LOG_SAMPLE_RATE)
     logger.info(
-        f"Path: {request.url.path} | Method: {request.method} | "
-        f"Status: {response.status_code} | Duration: {formatted_process_time}ms"
+        "Path: %s | Method: %s | Status: %s | Duration: %.2fms",
+        request.url.path, request.method, response.status_code, process_time,
+        extra={
+            "sampled": response.status_code < 400 and process_time < settings.LOG_SLOW_REQUEST_MS,
+            "path": request.url.path,
+            "method": request.method,
+            "status": response.status_code,
+            "duration_ms": round(process_time, 2),
+            "timings": get_timings()["stages"],
+        }
     )
     
     return response
@@ -64,8 +96,22 @@ def read_root():
     logger.info("Root endpoint accessed")
     return {"status": "ok", "service": "Chat-File Backend"}
 
+@app.get("/healthz")
+def healthz():
+    """Liveness: the process is up and serving requests."""
+    return {"status": "ok"}
+
+@app.get("/readyz")
+def readyz():
+    """Readiness: the embedding model is loaded, so uploads and RAG chat won't wait on it."""
+    embeddings = embeddings_status()
+    ready = embeddings == "ready"
+    return JSONResponse(
+        status_code=200 if ready else 503,
+        content={"status": "ready" if ready else "not_ready", "checks": {"embeddings": embeddings}}
+    )
+
 if __name__ == "__main__":
     import uvicorn
-    # Note: When running with uvicorn programmatically, logging config might be overridden by uvicorn's defaults
-    # but our setup_logging() sets root logger handler, so it should be fine.
-    uvicorn.run(app, host="0.0.0.0", port=8000)
+    # log_config=None: keep our queued handlers instead of uvicorn's default (synchronous) logging config
+    uvicorn.run(app, host="0.0.0.0", port=8000, log_config=None)
@@ -0,0 +1,95 @@
+import time
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from backend.core.settings import settings
+
+logger = logging.getLogger("app")
+
+class SemanticAnswerCache:
+    """
+    In-memory LRU cache of RAG answers keyed by (document version, query embedding).
+
+    A lookup hits when a cached query of the same document version has cosine similarity
+    >= `threshold` with the new query and is younger than `ttl_seconds`.
+    """
+
+    def __init__(self, threshold: float = 0.95, ttl_seconds: float = 3600, max_entries: int = 1000):
+        self.threshold = threshold
+        self.ttl_seconds = ttl_seconds
+        self.max_entries = max_entries
+        self.hits = 0
+        self.misses = 0
+        self.saved_tokens = 0
+        self._entries: OrderedDict = OrderedDict()  # entry id -> entry dict, least recently used first
+        self._next_id = 0
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def _normalize(vector) -> np.ndarray:
+        vector = np.asarray(vector, dtype=np.float32)
+        norm = np.linalg.norm(vector)
+        return vector / norm if norm else vector
+
+    def lookup(self, version: str, query_vector):
+        """Return the cached answer of the most similar query, or None."""
+        query = self._normalize(query_vector)
+        now = time.time()
+        with self._lock:
+            expired = [entry_id for entry_id, entry in self._entries.items() if now - entry["created_at"] > self.ttl_seconds]
+            for entry_id in expired:
+                del self._entries[entry_id]
+
+            candidates = [(entry_id, entry) for entry_id, entry in self._entries.items() if entry["version"] == version]
+            if candidates:
+                similarities = np.stack([entry["vector"] for _, entry in candidates]) @ query
+                best = int(np.argmax(similarities))
+                if similarities[best] >= self.threshold:
+                    entry_id, entry = candidates[best]
+                    self._entries.move_to_end(entry_id)
+                    self.hits += 1
+                    self.saved_tokens += entry["tokens"]
+                    return entry["answer"]
+            self.misses += 1
+            return None
+
+    def store(self, version: str, query_vector, answer: str, tokens: int = 0):
+        with self._lock:
+            self._entries[self._next_id] = {
+                "version": version,
+                "vector": self._normalize(query_vector),
+                "answer": answer,
+                "tokens": tokens,
+                "created_at": time.time(),
+            }
+            self._next_id += 1
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+
+    def invalidate(self, prefix: str):
+        """Drop all entries whose version starts with `prefix` (e.g. a re-indexed collection)."""
+        with self._lock:
+            stale = [entry_id for entry_id, entry in self._entries.items() if entry["version"].startswith(prefix)]
+            for entry_id in stale:
+                del self._entries[entry_id]
+        if stale:
+            logger.info(f"🧹 Answer cache: dropped {len(stale)} answers for {prefix}")
+
+    def stats(self) -> dict:
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "saved_tokens": self.saved_tokens,
+                "entries": len(self._entries),
+            }
+
+# Singleton instance
+answer_cache = SemanticAnswerCache(
+    threshold=settings.ANSWER_CACHE_THRESHOLD,
+    ttl_seconds=settings.ANSWER_CACHE_TTL_SECONDS,
+    max_entries=settings.ANSWER_CACHE_MAX_ENTRIES
+)
@@ -1,72 +1,213 @@
-from langchain_openai import ChatOpenAI
+import asyncio
+import threading
+from collections import OrderedDict
+import httpx
+from starlette.concurrency import iterate_in_threadpool
 from langchain_core.prompts import ChatPromptTemplate
-from langchain.chains.combine_documents import create_stuff_documents_chain
-from langchain.chains import create_retrieval_chain
-from langchain_experimental.agents.agent_toolkits import create_pandas_dataframe_agent
-import pandas as pd
+from langchain_core.runnables import RunnableLambda
 from backend.core.settings import settings
-from backend.services.file_service import get_retriever
+from backend.core.metrics import span, llm_metrics
+from backend.services.file_service import get_retriever, get_store_generation, get_document_version, get_embeddings, COLLECTION_NAME
+from backend.services.answer_cache import answer_cache
+from backend.services.context_packer import pack_context
 
-# Initialize LLM
-llm = ChatOpenAI(
-    api_key=settings.DEEPSEEK_API_KEY,
-    base_url=settings.DEEPSEEK_BASE_URL,
-    model=settings.MODEL_NAME,
-    temperature=0  # Temperature 0 is generally better for agents
-)
+# langchain_openai, the langchain chains/agents and DuckDB are imported on first use, not at startup
+
+# Shared HTTP connection pools for LLM calls: keep-alive connections are reused across requests
+http_client = None
+http_async_client = None
+
+_llm = None
+_llm_lock = threading.Lock()
+
+def get_llm():
+    """The shared chat model, created (with its connection pools) on first use."""
+    global _llm, http_client, http_async_client
+    with _llm_lock:
+        if _llm is None:
+            from langchain_openai import ChatOpenAI
+
+            limits = httpx.Limits(
+                max_connections=settings.LLM_MAX_CONNECTIONS,
+                max_keepalive_connections=settings.LLM_MAX_KEEPALIVE_CONNECTIONS,
+                keepalive_expiry=settings.LLM_KEEPALIVE_EXPIRY_SECONDS
+            )
+            timeout = httpx.Timeout(settings.LLM_TIMEOUT_SECONDS, connect=10.0)
+            http_client = httpx.Client(limits=limits, timeout=timeout)
+            http_async_client = httpx.AsyncClient(limits=limits, timeout=timeout)
+            _llm = ChatOpenAI(
+                api_key=settings.DEEPSEEK_API_KEY,
+                base_url=settings.DEEPSEEK_BASE_URL,
+                model=settings.MODEL_NAME,
+                temperature=0,  # Temperature 0 is generally better for agents
+                stream_usage=True,  # Token usage is reported for streamed answers too
+                callbacks=[llm_metrics],  # Latency, time to first token and token usage (see /metrics)
+                http_client=http_client,
+                http_async_client=http_async_client
+            )
+        return _llm
+
+async def close_http_clients():
+    """Close the pooled LLM connections (application shutdown)."""
+    if http_client is not None:
+        http_client.close()
+        await http_async_client.aclose()
+
+RAG_PROMPT = ChatPromptTemplate.from_template("""
+    Answer the following question based only on the provided context:
+
+    <context>
+    {context}
+    </context>
+
+    Question: {input}
+""")
+
+# Compiled retrieval chains, keyed by collection -> (store generation, chain), least recently used first
+_rag_chains: OrderedDict = OrderedDict()
+_chain_lock = threading.Lock()
+
+def _timed(stage: str, func, *args):
+    with span(stage):
+        return func(*args)
+
+def get_rag_chain(collection: str = COLLECTION_NAME):
+    """Return the compiled retrieval chain of a collection, rebuilding it only after the collection was re-indexed."""
+    generation = get_store_generation(collection)
+    with _chain_lock:
+        cached = _rag_chains.get(collection)
+        if cached and cached[0] == generation:
+            _rag_chains.move_to_end(collection)
+            return cached[1]
+
+        retriever = get_retriever(collection)
+        if not retriever:
+            return None
+        # Retrieved chunks are merged, deduplicated and trimmed to the token budget before stuffing
+        packed_retriever = (
+            (lambda x: x["input"])
+            | RunnableLambda(lambda query, config: _timed("retrieve", retriever.invoke, query, config))
+            | RunnableLambda(lambda docs: _timed("pack_context", pack_context, docs, settings.CONTEXT_TOKEN_BUDGET))
+        )
+        from langchain.chains.combine_documents import create_stuff_documents_chain
+        from langchain.chains import create_retrieval_chain
+
+        document_chain = create_stuff_documents_chain(get_llm(), RAG_PROMPT)
+        retrieval_chain = create_retrieval_chain(packed_retriever, document_chain)
+        _rag_chains[collection] = (generation, retrieval_chain)
+        _rag_chains.move_to_end(collection)
+        while len(_rag_chains) > settings.OPEN_COLLECTIONS_MAX:
+            _rag_chains.popitem(last=False)
+        return retrieval_chain
+
+def _format_step(action, observation) -> dict:
+    return {
+        "tool": action.tool,
+        "input": action.tool_input,
+        "log": action.log,
+        "output": str(observation)
+    }
+
+def _pandas_agent(file_path: str):
+    from backend.services.pandas_agent import get_pandas_agent
+
+    return get_pandas_agent(get_llm(), file_path)
 
 class ChatService:
     @staticmethod
-    def run_pandas_agent(file_path: str, message: str):
-        """Run the Pandas DataFrame Agent on the given file."""
-        if file_path.endswith(".csv"):
-            df = pd.read_csv(file_path)
-        else:
-            df = pd.read_excel(file_path)
-        
-        agent = create_pandas_dataframe_agent(
-            llm,
-            df,
-            verbose=True,
-            allow_dangerous_code=True,
-            agent_type="openai-tools",
-            return_intermediate_steps=True
-        )
+    async def run_pandas_agent(file_path: str, message: str):
+        """Run the Pandas DataFrame Agent on the given file. Its code executes in the pandas worker pool."""
+        # Agent reused across follow-up questions; the DataFrame stays resident in the workers
+        agent = await asyncio.to_thread(_pandas_agent, file_path)
         
-        response = agent.invoke({"input": message})
+        response = await agent.ainvoke({"input": message})
         
         # Format steps
         steps_log = []
         if "intermediate_steps" in response:
             for action, observation in response["intermediate_steps"]:
-                steps_log.append({
-                    "tool": action.tool,
-                    "input": action.tool_input,
-                    "log": action.log,
-                    "output": str(observation)
-                })
+                steps_log.append(_format_step(action, observation))
 
         return response["output"], steps_log
 
     @staticmethod
-    def run_rag_chain(message: str):
+    async def stream_pandas_agent(file_path: str, message: str):
+        """Yield ("step", step) as soon as each tool call finishes, then ("token", final answer)."""
+        agent = await asyncio.to_thread(_pandas_agent, file_path)
+        async for chunk in agent.astream({"input": message}):
+            for agent_step in chunk.get("steps", []):
+                yield "step", _format_step(agent_step.action, agent_step.observation)
+            if "output" in chunk:
+                yield "token", chunk["output"]
+
+    @staticmethod
+    async def run_sql_agent(file_path: str, message: str):
+        """Answer with LLM-generated DuckDB SQL over the file's Parquet copy (out-of-core)."""
+        # DuckDB is blocking: the whole agent runs in a worker thread
+        from backend.services.sql_service import run_sql_agent
+
+        return await asyncio.to_thread(run_sql_agent, get_llm(), file_path, message)
+
+    @staticmethod
+    async def stream_sql_agent(file_path: str, message: str):
+        """Yield ("step", step) for each executed query, then ("token", text) answer chunks."""
+        from backend.services.sql_service import iter_sql_agent
+
+        async for event in iterate_in_threadpool(iter_sql_agent(get_llm(), file_path, message)):
+            yield event
+
+    @staticmethod
+    async def _cached_answer(message: str, collection: str):
+        """Return (cached answer or None, cache key) for a RAG question."""
+        if not settings.ANSWER_CACHE_ENABLED:
+            return None, None
+        # Near-identical question about the same document version -> reuse the answer
+        version = get_document_version(collection)
+        query_vector = await get_embeddings().aembed_query(message)
+        return answer_cache.lookup(version, query_vector), (version, query_vector)
+
+    @staticmethod
+    async def run_rag_chain(message: str, collection: str = COLLECTION_NAME):
         """Run the standard RAG chain using the vector store."""
-        retriever = get_retriever()
-        if not retriever:
+        # First use of a collection opens Chroma and loads the BM25 index: keep it off the event loop
+        retrieval_chain = await asyncio.to_thread(get_rag_chain, collection)
+        if not retrieval_chain:
             raise ValueError("Index not found. Please upload a document first.")
-            
-        prompt = ChatPromptTemplate.from_template("""
-            Answer the following question based only on the provided context:
 
-            <context>
-            {context}
-            </context>
+        cached_answer, cache_key = await ChatService._cached_answer(message, collection)
+        if cached_answer is not None:
+            return cached_answer
 
-            Question: {input}
-        """)
+        from langchain_community.callbacks import get_openai_callback
 
-        document_chain = create_stuff_documents_chain(llm, prompt)
-        retrieval_chain = create_retrieval_chain(retriever, document_chain)
+        with get_openai_callback() as usage:
+            response = await retrieval_chain.ainvoke({"input": message})
 
-        response = retrieval_chain.invoke({"input": message})
+        if cache_key:
+            answer_cache.store(*cache_key, response["answer"], usage.total_tokens)
         return response["answer"]
+
+    @staticmethod
+    async def stream_rag_chain(message: str, collection: str = COLLECTION_NAME):
+        """Run the RAG chain, yielding ("token", text) as the LLM generates the answer."""
+        retrieval_chain = await asyncio.to_thread(get_rag_chain, collection)
+        if not retrieval_chain:
+            raise ValueError("Index not found. Please upload a document first.")
+
+        cached_answer, cache_key = await ChatService._cached_answer(message, collection)
+        if cached_answer is not None:
+            yield "token", cached_answer
+            return
+
+        answer = ""
+        from langchain_community.callbacks import get_openai_callback
+
+        with get_openai_callback() as usage:
+            async for chunk in retrieval_chain.astream({"input": message}):
+                token = chunk.get("answer")
+                if token:
+                    answer += token
+                    yield "token", token
+
+        if cache_key:
+            answer_cache.store(*cache_key, answer, usage.total_tokens)
@@ -0,0 +1,77 @@
+import logging
+from functools import lru_cache
+import tiktoken
+from langchain_core.documents import Document
+
+logger = logging.getLogger("app")
+
+@lru_cache(maxsize=4)
+def _encoding(name: str):
+    return tiktoken.get_encoding(name)
+
+def _merge_spans(spans: list[dict]) -> list[dict]:
+    """Merge spans of one page that overlap or touch, keeping the best (lowest) retrieval rank."""
+    spans.sort(key=lambda span: span["start"])
+    merged = [spans[0]]
+    for span in spans[1:]:
+        current = merged[-1]
+        if span["start"] <= current["end"]:
+            # Append only the part of the next chunk that isn't already covered (the splitter overlap)
+            if span["end"] > current["end"]:
+                current["text"] += span["text"][current["end"] - span["start"]:]
+                current["end"] = span["end"]
+            current["rank"] = min(current["rank"], span["rank"])
+        else:
+            merged.append(span)
+    return merged
+
+def pack_context(docs: list[Document], max_tokens: int, encoding_name: str = "cl100k_base") -> list[Document]:
+    """
+    Turn retrieved chunks into a compact context: merge contiguous/overlapping chunks via their
+    `start_index`, drop duplicates, keep the most relevant spans that fit `max_tokens` and return
+    them in document order.
+    """
+    if not docs:
+        return []
+
+    # 1. Group by (source, page); chunks without a position can only be deduplicated
+    groups: dict[tuple, list[dict]] = {}
+    loose: dict[str, dict] = {}
+    for rank, doc in enumerate(docs):
+        start = doc.metadata.get("start_index")
+        source = doc.metadata.get("source", "")
+        page = doc.metadata.get("page", 0)
+        if start is None:
+            loose.setdefault(doc.page_content, {"source": source, "page": page, "start": 0, "end": len(doc.page_content), "text": doc.page_content, "rank": rank})
+            continue
+        span = {"source": source, "page": page, "start": start, "end": start + len(doc.page_content), "text": doc.page_content, "rank": rank}
+        groups.setdefault((source, page), []).append(span)
+
+    spans = list(loose.values())
+    for group in groups.values():
+        spans.extend(_merge_spans(group))
+
+    # 2. Fill the token budget in relevance order, truncating the last span that doesn't fit
+    encoding = _encoding(encoding_name)
+    selected = []
+    remaining = max_tokens
+    for span in sorted(spans, key=lambda span: span["rank"]):
+        if remaining <= 0:
+            break
+        tokens = encoding.encode(span["text"])
+        if len(tokens) > remaining:
+            span["text"] = encoding.decode(tokens[:remaining])
+            tokens = tokens[:remaining]
+        remaining -= len(tokens)
+        selected.append(span)
+
+    # 3. Present in document order
+    selected.sort(key=lambda span: (span["source"], span["page"], span["start"]))
+    logger.debug(f"Packed {len(docs)} chunks into {len(selected)} spans, {max_tokens - remaining} tokens")
+    return [
+        Document(
+            page_content=span["text"],
+            metadata={"source": span["source"], "page": span["page"], "start_index": span["start"], "end_index": span["end"]}
+        )
+        for span in selected
+    ]
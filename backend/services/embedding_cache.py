@@ -0,0 +1,230 @@
+import os
+import json
+import hashlib
+import logging
+import threading
+from collections import OrderedDict
+import numpy as np
+from langchain_core.embeddings import Embeddings
+from backend.core.metrics import span
+
+logger = logging.getLogger("app")
+
+EMBEDDING_CACHE_PATH = "data/embedding_cache"
+INITIAL_CAPACITY = 1024
+KEY_BYTES = 16
+QUERY_CACHE_MAX_ENTRIES = 1024  # Recent query vectors, kept in memory only
+
+def normalize_text(text: str) -> str:
+    """Collapse whitespace so formatting-only edits still hit the cache."""
+    return " ".join(text.split())
+
+class CachedEmbeddings(Embeddings):
+    """
+    Embeddings wrapper with a persistent, size-bounded cache keyed by model name + normalized text hash.
+
+    On-disk layout (all memory-mapped, row-aligned):
+      vectors.f32  float32[capacity, dim]   embedding rows
+      keys.bin     uint8[capacity, 16]      truncated sha256 of (model, kind, text)
+      ticks.bin    uint64[capacity]         last-use counter, used for LRU eviction
+      meta.json    model name, dim, row count, tick
+
+    Only document chunks are persisted. Queries are mostly one-off and would push chunk vectors out,
+    so they go to a small in-memory LRU instead (it still saves the second embedding of a question,
+    by the answer cache and then the retriever).
+
+    New vectors and LRU ticks are written behind every `flush_interval` seconds (and by close()),
+    so neither lookups nor embedding calls wait on disk.
+    """
+
+    def __init__(self, embeddings: Embeddings, model_name: str, cache_dir: str = None, max_entries: int = 100_000,
+                 flush_interval: float = 30.0):
+        self.embeddings = embeddings
+        self.model_name = model_name
+        self.cache_dir = cache_dir or EMBEDDING_CACHE_PATH
+        self.max_entries = max_entries
+        self.flush_interval = flush_interval
+        self.hits = 0
+        self.misses = 0
+
+        self._lock = threading.Lock()
+        self._rows: dict[bytes, int] = {}
+        self._dim = None
+        self._count = 0
+        self._capacity = 0
+        self._tick = 0
+        self._vectors = None
+        self._keys = None
+        self._ticks = None
+        self._dirty = False  # Vectors or LRU ticks changed since the last flush
+        self._queries: OrderedDict = OrderedDict()  # key -> vector, least recently used first
+        self._stop = threading.Event()
+        self._load()
+        self._flusher = threading.Thread(target=self._flush_loop, name="embedding-cache-flusher", daemon=True)
+        self._flusher.start()
+
+    # --- Embeddings interface ---
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return self._embed(texts, "doc", self.embeddings.embed_documents)
+
+    def embed_query(self, text: str) -> list[float]:
+        key = self._key(text, "query")
+        with self._lock:
+            vector = self._queries.get(key)
+            if vector is not None:
+                self._queries.move_to_end(key)
+                self.hits += 1
+                return vector
+            self.misses += 1
+
+        with span("embed"):
+            vector = self.embeddings.embed_query(text)
+        with self._lock:
+            self._queries[key] = vector
+            if len(self._queries) > QUERY_CACHE_MAX_ENTRIES:
+                self._queries.popitem(last=False)
+        return vector
+
+    def stats(self) -> dict:
+        """Hit/miss counters and occupancy."""
+        with self._lock:
+            total = self.hits + self.misses
+            return {
+                "hits": self.hits,
+                "misses": self.misses,
+                "hit_rate": round(self.hits / total, 4) if total else 0.0,
+                "entries": self._count,
+                "max_entries": self.max_entries,
+            }
+
+    # --- Cache internals ---
+
+    def _key(self, text: str, kind: str) -> bytes:
+        raw = f"{self.model_name}\0{kind}\0{normalize_text(text)}".encode("utf-8")
+        return hashlib.sha256(raw).digest()[:KEY_BYTES]
+
+    def _embed(self, texts: list[str], kind: str, embed_fn) -> list[list[float]]:
+        keys = [self._key(t, kind) for t in texts]
+        results = [None] * len(texts)
+        missing: dict[bytes, list[int]] = {}
+
+        with self._lock:
+            for i, key in enumerate(keys):
+                row = self._rows.get(key)
+                if row is not None:
+                    self._touch(row)
+                    results[i] = self._vectors[row].tolist()
+                    self.hits += 1
+                else:
+                    missing.setdefault(key, []).append(i)
+            self.misses += len(missing)
+
+        if missing:
+            # Only cache misses reach the model, once per distinct text
+            with span("embed"):
+                vectors = embed_fn([texts[idxs[0]] for idxs in missing.values()])
+            with self._lock:
+                for (key, idxs), vector in zip(missing.items(), vectors):
+                    for i in idxs:
+                        results[i] = vector
+                    self._store(key, vector)
+        return results
+
+    def flush(self):
+        """Persist pending vectors and LRU tick updates."""
+        with self._lock:
+            if self._dirty:
+                self._flush()
+
+    def close(self):
+        """Stop the background flusher and persist pending updates."""
+        self._stop.set()
+        self._flusher.join()
+        self.flush()
+
+    def _touch(self, row: int):
+        self._tick += 1
+        self._ticks[row] = self._tick
+        self._dirty = True
+
+    def _store(self, key: bytes, vector: list[float]):
+        if self._dim is None:
+            self._dim = len(vector)
+            self._allocate(INITIAL_CAPACITY)
+        elif len(vector) != self._dim:
+            return  # Model changed shape under us; don't poison the cache
+        if key in self._rows:
+            return
+
+        if self._count < self.max_entries:
+            if self._count >= self._capacity:
+                self._allocate(min(self._capacity * 2, self.max_entries))
+            row = self._count
+            self._count += 1
+        else:
+            # Evict the least recently used row and reuse its slot
+            row = int(np.argmin(self._ticks[:self._count]))
+            del self._rows[self._keys[row].tobytes()]
+
+        self._vectors[row] = vector
+        self._keys[row] = np.frombuffer(key, dtype=np.uint8)
+        self._rows[key] = row
+        self._touch(row)
+
+    def _allocate(self, capacity: int):
+        """(Re)open the memory-mapped arrays, growing the files to `capacity` rows."""
+        os.makedirs(self.cache_dir, exist_ok=True)
+        self._vectors = self._open("vectors.f32", np.float32, (capacity, self._dim))
+        self._keys = self._open("keys.bin", np.uint8, (capacity, KEY_BYTES))
+        self._ticks = self._open("ticks.bin", np.uint64, (capacity,))
+        self._capacity = capacity
+
+    def _open(self, name: str, dtype, shape: tuple):
+        path = os.path.join(self.cache_dir, name)
+        size = int(np.prod(shape)) * np.dtype(dtype).itemsize
+        with open(path, "ab") as f:
+            if f.tell() < size:
+                f.truncate(size)
+        return np.memmap(path, dtype=dtype, mode="r+", shape=shape)
+
+    def _flush(self):
+        if self._vectors is None:
+            return
+        self._vectors.flush()
+        self._keys.flush()
+        self._ticks.flush()
+        meta = {"model": self.model_name, "dim": self._dim, "count": self._count, "tick": self._tick}
+        with open(os.path.join(self.cache_dir, "meta.json"), "w") as f:
+            json.dump(meta, f)
+        self._dirty = False
+
+    def _flush_loop(self):
+        while not self._stop.wait(self.flush_interval):
+            try:
+                self.flush()
+            except Exception as e:
+                logger.error(f"❌ Failed to flush embedding cache: {e}")
+
+    def _load(self):
+        meta_path = os.path.join(self.cache_dir, "meta.json")
+        if not os.path.exists(meta_path):
+            return
+
+        try:
+            with open(meta_path, "r") as f:
+                meta = json.load(f)
+            if meta.get("model") != self.model_name:
+                logger.warning(f"⚠️ Embedding cache was built for {meta.get('model')}. Starting a fresh cache.")
+                return
+
+            self._dim = meta["dim"]
+            self._count = min(meta["count"], self.max_entries)
+            self._tick = meta["tick"]
+            self._allocate(max(self._count, INITIAL_CAPACITY))
+            self._rows = {self._keys[row].tobytes(): row for row in range(self._count)}
+            logger.info(f"♻️ Embedding cache restored: {self._count} vectors")
+        except Exception as e:
+            logger.error(f"❌ Failed to load embedding cache, starting fresh: {e}")
+            self._rows, self._dim, self._count, self._tick = {}, None, 0, 0
+            self._vectors = self._keys = self._ticks = None
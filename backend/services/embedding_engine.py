@@ -0,0 +1,94 @@
+import os
+import math
+import queue
+import logging
+from concurrent.futures import ThreadPoolExecutor
+from langchain_core.embeddings import Embeddings
+
+logger = logging.getLogger("app")
+
+BACKENDS = ("torch", "onnx")
+
+class EmbeddingEngine(Embeddings):
+    """
+    Batched sentence-transformers embeddings over a pool of model replicas.
+
+    Each call is cut into sub-batches (at most `batch_size` texts, spread across all workers) that run
+    concurrently, one replica per worker. `backend="onnx"` loads the ONNX export named by `onnx_file`
+    (e.g. an int8-quantized one) through sentence-transformers' ONNX Runtime backend.
+    """
+
+    def __init__(self, model_name: str, backend: str = "torch", batch_size: int = 32, workers: int = 0, onnx_file: str = None):
+        if backend not in BACKENDS:
+            raise ValueError(f"Unknown embedding backend '{backend}', expected one of {BACKENDS}")
+
+        cpus = os.cpu_count() or 1
+        self.model_name = model_name
+        self.backend = backend
+        self.batch_size = batch_size
+        self.workers = workers or max(1, cpus // 2)
+        self.onnx_file = onnx_file
+        self._threads_per_worker = max(1, cpus // self.workers)
+
+        if backend == "torch":
+            import torch
+            # Intra-op threads are process-wide: split the cores between replicas instead of oversubscribing
+            torch.set_num_threads(self._threads_per_worker)
+
+        self._replicas = queue.Queue()
+        for _ in range(self.workers):
+            self._replicas.put(self._load_replica())
+        self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="embedder")
+        logger.info(f"⚙️ Embedding engine: {model_name} [{backend}] x{self.workers} workers, batch size {batch_size}")
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the exact vectors this engine produces (quantized models differ from the reference)."""
+        if self.backend == "onnx":
+            return f"{self.model_name}:onnx:{self.onnx_file}"
+        return self.model_name
+
+    def _load_replica(self):
+        from langchain_huggingface import HuggingFaceEmbeddings
+
+        model_kwargs = {}
+        if self.backend == "onnx":
+            import onnxruntime
+            session_options = onnxruntime.SessionOptions()
+            session_options.intra_op_num_threads = self._threads_per_worker
+            model_kwargs = {
+                "backend": "onnx",
+                "model_kwargs": {"file_name": self.onnx_file, "session_options": session_options},
+            }
+        return HuggingFaceEmbeddings(
+            model_name=self.model_name,
+            model_kwargs=model_kwargs,
+            encode_kwargs={"batch_size": self.batch_size}
+        )
+
+    def _embed_batch(self, texts: list[str]) -> list[list[float]]:
+        replica = self._replicas.get()
+        try:
+            return replica.embed_documents(texts)
+        finally:
+            self._replicas.put(replica)
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        if not texts:
+            return []
+        size = min(self.batch_size, math.ceil(len(texts) / self.workers))
+        batches = [texts[i:i + size] for i in range(0, len(texts), size)]
+        if len(batches) == 1:
+            return self._embed_batch(batches[0])
+
+        vectors = []
+        for batch_vectors in self._executor.map(self._embed_batch, batches):
+            vectors.extend(batch_vectors)
+        return vectors
+
+    def embed_query(self, text: str) -> list[float]:
+        replica = self._replicas.get()
+        try:
+            return replica.embed_query(text)
+        finally:
+            self._replicas.put(replica)
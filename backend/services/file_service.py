@@ -1,19 +1,57 @@
 import os
-import shutil
+import time
+import uuid
+import hashlib
 import logging
+import itertools
+import threading
+import contextlib
+from collections import OrderedDict
+import anyio
 from fastapi import UploadFile
-from langchain_community.document_loaders import PyPDFLoader, TextLoader
-from langchain_text_splitters import RecursiveCharacterTextSplitter
-from langchain_huggingface import HuggingFaceEmbeddings
-from langchain_chroma import Chroma
+from langchain_core.vectorstores import VectorStore
+from backend.core.settings import settings
+from backend.core.metrics import span, observe
+from backend.services.embedding_cache import CachedEmbeddings
+from backend.services.embedding_engine import EmbeddingEngine
+from backend.services.ingestion import iter_pdf_pages, pdf_page_count
+from backend.services.flat_store import FlatVectorStore, list_flat_collections, drop_flat_collection, FLAT_STORE_PATH
+from backend.services.lexical_index import get_lexical_index, release_lexical_index, drop_lexical_index, HybridRetriever
+from backend.services.answer_cache import answer_cache
 
 logger = logging.getLogger("app")
 
 CHROMA_PATH = "data/chroma_db"
 DATA_PATH = "data/uploads"
+VECTOR_BACKENDS = ("chroma", "flat")
+COLLECTION_NAME = "langchain"  # langchain_chroma's default collection, shared by documents indexed before per-document collections
+HASH_CHUNK_SIZE = 1024 * 1024  # 1 MB
+INCOMING_PATH = os.path.join(DATA_PATH, ".incoming")  # Partial uploads, renamed into place once complete
+UPLOAD_DIR_LENGTH = 16  # Hex digits of the content hash naming an upload's directory
+STALE_UPLOAD_SECONDS = 600  # Partial uploads not written to for this long are abandoned
+
+class UploadTooLarge(Exception):
+    """Raised when an upload exceeds settings.UPLOAD_MAX_MB."""
 
 # Global variable to hold the initialized embedding model
 _embeddings_instance = None
+_embeddings_error = None
+_embeddings_warmup = None  # Background thread loading the model (see start_embeddings_warmup)
+_embeddings_done = threading.Event()
+
+# Long-lived vector store handles, keyed by collection, least recently used first (at most
+# OPEN_COLLECTIONS_MAX). A collection's generation changes whenever index_document writes to it, so
+# dependents (e.g. compiled chains) know to rebuild. Generations come from one process-wide counter:
+# a collection whose generation was evicted gets a fresh one, never an old value.
+_vector_stores: OrderedDict = OrderedDict()
+_store_generations: OrderedDict = OrderedDict()
+_generation_counter = itertools.count(1)
+_store_lock = threading.Lock()
+
+# Uploads saved to their final path but not yet owned by the manifest: path -> number of uploads
+# in flight there. Registered when an upload is committed, released once its job has finished.
+_uploads_in_flight: dict = {}
+_uploads_lock = threading.Lock()
 
 def initialize_embeddings():
     """Initialize the embedding model. Should be called at app startup."""
@@ -22,75 +60,454 @@ def initialize_embeddings():
         logger.info("Embedding model is already initialized.")
         return
 
-    logger.info("⏳ Initializing Embedding Model (all-MiniLM-L6-v2)... This may take a moment.")
+    model_name = settings.EMBEDDING_MODEL_NAME
+    logger.info(f"⏳ Initializing Embedding Model ({model_name}, {settings.EMBEDDING_BACKEND})... This may take a moment.")
     try:
-        # Initialize the model (downloads if not present)
-        _embeddings_instance = HuggingFaceEmbeddings(model_name="all-MiniLM-L6-v2")
+        # Initialize the model replicas (downloads if not present), fronted by the persistent embedding cache
+        engine = EmbeddingEngine(
+            model_name,
+            backend=settings.EMBEDDING_BACKEND,
+            batch_size=settings.EMBEDDING_BATCH_SIZE,
+            workers=settings.EMBEDDING_WORKERS,
+            onnx_file=settings.EMBEDDING_ONNX_FILE
+        )
+        # One throwaway call (bypassing the cache) so lazy model/runtime setup isn't paid by the first upload
+        engine.embed_query("warmup")
+        _embeddings_instance = CachedEmbeddings(
+            engine,
+            model_name=engine.fingerprint,
+            max_entries=settings.EMBEDDING_CACHE_MAX_ENTRIES,
+            flush_interval=settings.EMBEDDING_CACHE_FLUSH_INTERVAL_SECONDS
+        )
         logger.info("✅ Embedding Model initialized successfully.")
     except Exception as e:
         logger.critical(f"❌ Failed to initialize Embedding Model: {e}")
         raise e
 
+def _warm_up_embeddings():
+    global _embeddings_error
+    start = time.perf_counter()
+    try:
+        initialize_embeddings()
+        logger.info(f"🔥 Embedding model warm in {time.perf_counter() - start:.1f}s")
+    except Exception as e:
+        _embeddings_error = e
+    finally:
+        _embeddings_done.set()
+
+def start_embeddings_warmup():
+    """Load the embedding model in a background thread so the API can serve requests meanwhile."""
+    global _embeddings_warmup
+    if _embeddings_warmup is None:
+        _embeddings_warmup = threading.Thread(target=_warm_up_embeddings, name="embeddings-warmup", daemon=True)
+        _embeddings_warmup.start()
+
+def embeddings_status() -> str:
+    """'ready', 'loading', 'failed' or 'not_started'."""
+    if _embeddings_instance is not None:
+        return "ready"
+    if _embeddings_error is not None:
+        return "failed"
+    return "loading" if _embeddings_warmup is not None else "not_started"
+
 def get_embeddings():
-    """Get the initialized embedding model instance."""
+    """Get the initialized embedding model instance, waiting for the background warmup if it is still running."""
+    if _embeddings_instance is None and _embeddings_warmup is not None:
+        _embeddings_done.wait()
     if _embeddings_instance is None:
+        if _embeddings_error is not None:
+            raise RuntimeError(f"Embedding model failed to load: {_embeddings_error}")
         raise RuntimeError("Embedding model is not initialized. Call initialize_embeddings() during startup.")
     return _embeddings_instance
 
-def save_upload_file(upload_file: UploadFile) -> str:
-    """Save uploaded file to disk and return the path."""
-    if not os.path.exists(DATA_PATH):
-        os.makedirs(DATA_PATH)
-    
-    file_path = os.path.join(DATA_PATH, upload_file.filename)
-    with open(file_path, "wb") as buffer:
-        shutil.copyfileobj(upload_file.file, buffer)
+def close_embeddings():
+    """Persist the embedding cache's pending updates. Called at app shutdown."""
+    if _embeddings_instance is not None:
+        _embeddings_instance.close()
+
+def get_embedding_cache_stats() -> dict:
+    """Hit/miss counters of the embedding cache (empty until the model is initialized)."""
+    if _embeddings_instance is None:
+        return {}
+    return _embeddings_instance.stats()
+
+def _open_vector_store(collection: str) -> VectorStore:
+    """Vector store factory for the configured VECTOR_BACKEND."""
+    if settings.VECTOR_BACKEND == "flat":
+        return FlatVectorStore(
+            collection_name=collection,
+            embedding_function=get_embeddings(),
+            persist_directory=FLAT_STORE_PATH,
+            dtype=settings.FLAT_VECTOR_DTYPE
+        )
+    from langchain_chroma import Chroma  # Deferred: chromadb is slow to import
+
+    return Chroma(
+        collection_name=collection,
+        embedding_function=get_embeddings(),
+        persist_directory=CHROMA_PATH
+    )
+
+def _vector_store_path() -> str:
+    return FLAT_STORE_PATH if settings.VECTOR_BACKEND == "flat" else CHROMA_PATH
+
+def _evict(cache: OrderedDict):
+    """Drop least recently used entries beyond OPEN_COLLECTIONS_MAX. Caller holds _store_lock."""
+    while len(cache) > settings.OPEN_COLLECTIONS_MAX:
+        cache.popitem(last=False)
+
+def get_vector_store(collection: str = COLLECTION_NAME) -> VectorStore:
+    """Return the process-wide handle for a collection, opening it on first use.
+
+    Evicted handles are only released: users still holding one (a running job, a compiled chain)
+    keep a working store, and neither backend holds anything else open per collection.
+    """
+    with _store_lock:
+        vector_store = _vector_stores.get(collection)
+        if vector_store is None:
+            vector_store = _open_vector_store(collection)
+            _vector_stores[collection] = vector_store
+            _evict(_vector_stores)
+        else:
+            _vector_stores.move_to_end(collection)
+        return vector_store
+
+def get_store_generation(collection: str = COLLECTION_NAME) -> int:
+    """Write counter of a collection: changes whenever it is written to."""
+    with _store_lock:
+        generation = _store_generations.get(collection)
+        if generation is None:
+            generation = _store_generations[collection] = next(_generation_counter)
+            _evict(_store_generations)
+        else:
+            _store_generations.move_to_end(collection)
+        return generation
+
+def get_document_version(collection: str = COLLECTION_NAME) -> str:
+    """Identifies the current content of a collection, e.g. for caching answers derived from it."""
+    return f"{collection}@{get_store_generation(collection)}"
+
+def invalidate_vector_store(collection: str = COLLECTION_NAME):
+    """Drop the pooled handle and BM25 index of a collection (and answers derived from them) after it was written to."""
+    with _store_lock:
+        _vector_stores.pop(collection, None)
+        _store_generations[collection] = next(_generation_counter)
+        _store_generations.move_to_end(collection)
+        _evict(_store_generations)
+    release_lexical_index(collection)  # An evicted copy may have been reloaded while the writer held its own
+    answer_cache.invalidate(f"{collection}@")
+
+def new_document_collection() -> str:
+    """Vector collection for a newly uploaded document, named by a fresh upload id. Its revisions
+    (uploads with replaces=<document id>) reuse it; a shared filename never does."""
+    return f"doc_{uuid.uuid4().hex[:12]}"
+
+def list_collections(backend: str = None) -> list[str]:
+    """Names of all collections of a vector backend (default: the configured VECTOR_BACKEND)."""
+    if (backend or settings.VECTOR_BACKEND) == "flat":
+        return list_flat_collections(FLAT_STORE_PATH)
+    if not os.path.exists(CHROMA_PATH):
+        return []
+    import chromadb
+
+    collections = chromadb.PersistentClient(path=CHROMA_PATH).list_collections()
+    # chromadb >= 0.6 returns names, older versions Collection objects
+    return [collection if isinstance(collection, str) else collection.name for collection in collections]
+
+def delete_chunks(collection: str, chunk_ids: list[str]):
+    """Remove chunks from a collection and its BM25 index."""
+    if not chunk_ids:
+        return
+    vector_store = get_vector_store(collection)
+    vector_store.delete(ids=chunk_ids)
+    _persist(vector_store)
+    lexical_index = get_lexical_index(collection)
+    lexical_index.remove(chunk_ids)
+    lexical_index.save()
+    invalidate_vector_store(collection)
+
+def drop_collection(collection: str, backend: str = None):
+    """Delete a whole collection (vectors + index files) and its BM25 index from disk.
+
+    A collection of another `backend` than the configured one (left behind by a VECTOR_BACKEND switch)
+    only loses its vectors: the BM25 index is shared with the configured backend's collection of that name.
+    """
+    if backend and backend != settings.VECTOR_BACKEND:
+        if backend == "flat":
+            drop_flat_collection(collection, FLAT_STORE_PATH)
+        else:
+            import chromadb
+
+            chromadb.PersistentClient(path=CHROMA_PATH).delete_collection(collection)
+        logger.info(f"🗑️ Dropped {backend} collection {collection}")
+        return
+    get_vector_store(collection).delete_collection()
+    drop_lexical_index(collection)
+    invalidate_vector_store(collection)
+    logger.info(f"🗑️ Dropped collection {collection}")
+
+def upload_limit_bytes() -> int:
+    return settings.UPLOAD_MAX_MB * 1024 * 1024
+
+def safe_filename(filename: str) -> str:
+    """Basename of a client-supplied filename. Raises ValueError if nothing usable is left."""
+    name = os.path.basename((filename or "").replace("\\", "/")).strip()
+    if name in ("", ".", "..") or "\x00" in name:
+        raise ValueError(f"Invalid filename: {filename!r}")
+    return name
+
+def _part_path() -> str:
+    os.makedirs(INCOMING_PATH, exist_ok=True)
+    return os.path.join(INCOMING_PATH, f"{uuid.uuid4().hex}.part")
+
+def _check_size(size: int):
+    if size > upload_limit_bytes():
+        raise UploadTooLarge(f"Upload exceeds the {settings.UPLOAD_MAX_MB} MB limit")
+
+def _commit_upload(part_path: str, filename: str, content_hash: str) -> str:
+    """Atomically move a complete upload to data/uploads/<content hash prefix>/<filename>.
+
+    Uploads are stored by content, so same-named files never overwrite each other on disk; the
+    filename is kept for display only (documents are identified by upload, see new_document_collection).
+    """
+    file_path = os.path.join(DATA_PATH, content_hash[:UPLOAD_DIR_LENGTH], filename)
+    with _uploads_lock:
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        os.replace(part_path, file_path)
+        _uploads_in_flight[file_path] = _uploads_in_flight.get(file_path, 0) + 1
     return file_path
 
-def load_and_split_document(file_path: str):
-    """Load document based on extension and split into chunks."""
-    if file_path.endswith(".pdf"):
-        loader = PyPDFLoader(file_path)
-    else:
-        # Default to text loader for .txt, .md, etc.
-        loader = TextLoader(file_path, encoding="utf-8")
-    
-    docs = loader.load()
-    
-    # Split text
-    text_splitter = RecursiveCharacterTextSplitter(
+def release_upload(file_path: str):
+    """End an upload's in-flight period (see _commit_upload): its job finished or it was not needed."""
+    with _uploads_lock:
+        remaining = _uploads_in_flight.get(file_path, 0) - 1
+        if remaining > 0:
+            _uploads_in_flight[file_path] = remaining
+        else:
+            _uploads_in_flight.pop(file_path, None)
+
+@contextlib.contextmanager
+def hold_uploads():
+    """Block uploads from being committed while held; yields the paths of uploads still in flight."""
+    with _uploads_lock:
+        yield set(_uploads_in_flight)
+
+def _discard(part_path: str):
+    if os.path.exists(part_path):
+        os.remove(part_path)
+
+def save_upload_file(upload_file: UploadFile) -> tuple[str, str]:
+    """Save a multipart upload, hashing and size-checking it while it streams to disk. Returns (path, sha256 hex digest)."""
+    filename = safe_filename(upload_file.filename)
+    part_path = _part_path()
+    hasher, size = hashlib.sha256(), 0
+    try:
+        with span("save"), open(part_path, "wb") as buffer:
+            while chunk := upload_file.file.read(HASH_CHUNK_SIZE):
+                size += len(chunk)
+                _check_size(size)
+                hasher.update(chunk)
+                buffer.write(chunk)
+        content_hash = hasher.hexdigest()
+        return _commit_upload(part_path, filename, content_hash), content_hash
+    except BaseException:
+        _discard(part_path)
+        raise
+
+async def save_upload_stream(filename: str, chunks) -> tuple[str, str]:
+    """Save a raw request body (async iterator of bytes) with async file I/O, hashing and size-checking
+    each chunk as it arrives. Stops reading at the first chunk over the limit. Returns (path, sha256 hex digest)."""
+    filename = safe_filename(filename)
+    part_path = _part_path()
+    hasher, size, pending = hashlib.sha256(), 0, bytearray()
+    try:
+        with span("save"):
+            async with await anyio.open_file(part_path, "wb") as buffer:
+                async for chunk in chunks:
+                    size += len(chunk)
+                    _check_size(size)
+                    hasher.update(chunk)
+                    pending += chunk
+                    # Batch the server's small body chunks into fewer writes (each one is a thread hop)
+                    if len(pending) >= HASH_CHUNK_SIZE:
+                        await buffer.write(bytes(pending))
+                        pending.clear()
+                if pending:
+                    await buffer.write(bytes(pending))
+        content_hash = hasher.hexdigest()
+        # Off the event loop: committing waits while garbage collection holds the uploads
+        return await anyio.to_thread.run_sync(_commit_upload, part_path, filename, content_hash), content_hash
+    except BaseException:
+        _discard(part_path)
+        raise
+
+def remove_upload(file_path: str):
+    """Delete an uploaded file, and its upload directory once empty."""
+    if os.path.exists(file_path):
+        os.remove(file_path)
+    upload_dir = os.path.dirname(os.path.normpath(file_path))
+    if upload_dir != os.path.normpath(DATA_PATH) and os.path.isdir(upload_dir) and not os.listdir(upload_dir):
+        os.rmdir(upload_dir)
+
+def _report(progress, phase: str, done: int = None, total: int = None):
+    if progress is not None:
+        progress(phase, done, total)
+
+def _text_splitter():
+    from langchain_text_splitters import RecursiveCharacterTextSplitter
+
+    return RecursiveCharacterTextSplitter(
         chunk_size=1000,
         chunk_overlap=200,
         add_start_index=True
     )
-    chunks = text_splitter.split_documents(docs)
-    return chunks
 
-def index_document(file_path: str):
-    """Full pipeline: Load -> Split -> Embed -> Store in Chroma."""
+def iter_document_chunks(file_path: str, progress=None):
+    """
+    Yield chunks as the document is parsed. PDFs are extracted page range by page range in a process pool.
+
+    After each page, `progress` gets an estimate of the document's chunk total, extrapolated from
+    the pages split so far (exact once the last page is split).
+    """
+    _report(progress, "parse")
+    is_pdf = file_path.endswith(".pdf")
+    if is_pdf:
+        pages_total = pdf_page_count(file_path)
+        docs = iter_pdf_pages(
+            file_path, workers=settings.INGEST_WORKERS, pages_per_task=settings.INGEST_PAGES_PER_TASK, num_pages=pages_total
+        )
+    else:
+        # Default to text loader for .txt, .md, etc.
+        from langchain_community.document_loaders import TextLoader
+
+        with span("load"):
+            docs = TextLoader(file_path, encoding="utf-8").load()
+        pages_total = len(docs)
+
+    # Split text page by page as it arrives
+    text_splitter = _text_splitter()
+    docs = iter(docs)
+    pages_done = chunks_split = 0
+    while True:
+        start = time.perf_counter()
+        doc = next(docs, None)
+        if doc is None:
+            break
+        if is_pdf:
+            observe("load", time.perf_counter() - start)  # Waiting for the next extracted page
+        with span("split"):
+            chunks = text_splitter.split_documents([doc])
+        pages_done += 1
+        chunks_split += len(chunks)
+        # Phase is only set for the first page: afterwards splitting and embedding interleave
+        _report(progress, "split" if pages_done == 1 else None, None, round(chunks_split * pages_total / pages_done))
+        yield from chunks
+
+def load_and_split_document(file_path: str, progress=None):
+    """Load document based on extension and split into chunks."""
+    return list(iter_document_chunks(file_path, progress))
+
+def _chunk_id(doc_key: str, chunk, seen: dict) -> str:
+    """Content-addressed chunk id: document key + chunk text hash (+ occurrence for repeated text)."""
+    chunk_hash = hashlib.sha256(chunk.page_content.encode("utf-8")).hexdigest()[:16]
+    occurrence = seen.get(chunk_hash, 0)
+    seen[chunk_hash] = occurrence + 1
+    return f"{doc_key}-{chunk_hash}-{occurrence}"
+
+def _update_metadata(vector_store: VectorStore, ids: list[str], metadatas: list[dict]):
+    """Overwrite chunk metadata in place (no re-embedding)."""
+    if isinstance(vector_store, FlatVectorStore):
+        vector_store.update_metadata(ids, metadatas)
+    else:
+        vector_store._collection.update(ids=ids, metadatas=metadatas)  # Chroma
+
+def _persist(vector_store: VectorStore):
+    """Flush buffered writes of backends that need it (Chroma writes through)."""
+    if isinstance(vector_store, FlatVectorStore):
+        vector_store.persist()
+
+def _store_batch(vector_store, lexical_index, chunks: list, ids: list[str], existing_ids: set) -> int:
+    """Embed & store chunks the collection doesn't have yet; refresh position metadata of the others. Returns #embedded."""
+    new_pos = [i for i, cid in enumerate(ids) if cid not in existing_ids]
+    kept_pos = [i for i, cid in enumerate(ids) if cid in existing_ids]
+    # Includes embedding of the new chunks (also reported separately as "embed")
+    with span("store"):
+        if new_pos:
+            vector_store.add_documents(
+                documents=[chunks[i] for i in new_pos],
+                ids=[ids[i] for i in new_pos]
+            )
+            lexical_index.add([ids[i] for i in new_pos], [chunks[i].page_content for i in new_pos])
+        # Unchanged chunks may have moved: refresh start_index/page without re-embedding
+        if kept_pos:
+            _update_metadata(vector_store, [ids[i] for i in kept_pos], [chunks[i].metadata for i in kept_pos])
+    return len(new_pos)
+
+def index_document(file_path: str, collection: str, previous_chunk_ids: list[str] = None, incremental: bool = True, progress=None) -> list[str]:
+    """
+    Streaming pipeline: Load -> Split -> Embed -> Store in Chroma, in fixed-size batches so memory
+    stays bounded by INDEX_BATCH_SIZE rather than the document size. Each document gets its own
+    collection (see new_document_collection), so search cost only depends on that document's size.
+    Returns the stored chunk ids.
+
+    When `previous_chunk_ids` of an earlier revision are given, only new/changed chunks are embedded
+    (unless `incremental` is False), unchanged chunks get their position metadata refreshed and
+    chunks that no longer exist are deleted from the collection.
+
+    `progress(phase, chunks_done, chunks_total)` is called as the pipeline moves through
+    parse -> split -> embed -> store; chunks_total is estimated from the pages split so far
+    (see iter_document_chunks) and chunks_done counts stored chunks. A None phase keeps the current one.
+    """
     
     # Skip vector indexing for Excel/CSV (Structured Data)
     if file_path.endswith((".xlsx", ".xls", ".csv")):
-        return 0
+        return []
 
-    chunks = load_and_split_document(file_path)
-    
-    # Store in ChromaDB
-    Chroma.from_documents(
-        documents=chunks,
-        embedding=get_embeddings(),
-        persist_directory=CHROMA_PATH
-    )
-    return len(chunks)
+    vector_store = get_vector_store(collection)
+    lexical_index = get_lexical_index(collection)
+    doc_key = collection.removeprefix("doc_")  # Same chunk ids across the revisions sharing the collection
+    existing_ids = set(previous_chunk_ids or []) if incremental else set()
+    batch_size = settings.INDEX_BATCH_SIZE
 
-def get_retriever():
-    """Return a retriever connected to the vector store."""
-    if not os.path.exists(CHROMA_PATH):
+    chunk_ids = []
+    seen = {}
+    embedded = 0
+    batch, batch_ids = [], []
+    for chunk in iter_document_chunks(file_path, progress):
+        chunk_id = _chunk_id(doc_key, chunk, seen)
+        chunk_ids.append(chunk_id)
+        batch.append(chunk)
+        batch_ids.append(chunk_id)
+        if len(batch) >= batch_size:
+            embedded += _store_batch(vector_store, lexical_index, batch, batch_ids, existing_ids)
+            _report(progress, "embed", len(chunk_ids))
+            batch, batch_ids = [], []
+    if batch:
+        embedded += _store_batch(vector_store, lexical_index, batch, batch_ids, existing_ids)
+    _report(progress, "embed", len(chunk_ids), len(chunk_ids))
+
+    # Drop vectors of chunks removed from the document
+    _report(progress, "store")
+    stale_ids = list(set(previous_chunk_ids or []) - set(chunk_ids))
+    if stale_ids:
+        vector_store.delete(ids=stale_ids)
+        lexical_index.remove(stale_ids)
+    if chunk_ids or stale_ids:
+        _persist(vector_store)
+        lexical_index.save()
+        invalidate_vector_store(collection)
+
+    if previous_chunk_ids:
+        logger.info(f"🔁 Re-indexed {os.path.basename(file_path)}: {embedded} embedded, {len(chunk_ids) - embedded} reused, {len(stale_ids)} removed")
+    return chunk_ids
+
+def get_retriever(collection: str = COLLECTION_NAME):
+    """Return a retriever connected to the pooled vector store (hybrid dense + BM25 unless disabled)."""
+    if not os.path.exists(_vector_store_path()):
         return None
         
-    vector_store = Chroma(
-        persist_directory=CHROMA_PATH,
-        embedding_function=get_embeddings()
-    )
     # Search for top 5 most relevant chunks
-    return vector_store.as_retriever(search_kwargs={"k": 5})
\ No newline at end of file
+    vector_store = get_vector_store(collection)
+    if settings.HYBRID_RETRIEVAL:
+        return HybridRetriever(vector_store=vector_store, lexical_index=get_lexical_index(collection), k=5)
+    return vector_store.as_retriever(search_kwargs={"k": 5})
@@ -0,0 +1,305 @@
+import os
+import json
+import shutil
+import logging
+import threading
+import numpy as np
+from langchain_core.documents import Document
+from langchain_core.embeddings import Embeddings
+from langchain_core.vectorstores import VectorStore
+
+logger = logging.getLogger("app")
+
+FLAT_STORE_PATH = "data/flat_store"
+DTYPES = ("float16", "int8")
+SEARCH_BLOCK_ROWS = 8192  # Rows upcast to float32 at a time while scoring
+INITIAL_CAPACITY = 256
+FLOAT32_CACHE_MAX_BYTES = 16 * 1024 * 1024  # Collections up to this size keep a float32 copy for fast search
+
+class FlatVectorStore(VectorStore):
+    """
+    Exact (brute-force) cosine search over a memory-mapped matrix, for single documents of up to a
+    few ten thousand chunks where Chroma's SQLite + HNSW overhead dominates. Vectors are unit
+    normalized and stored as float16, or as int8 codes with a per-row scale.
+
+    Writes are buffered in memory (and searchable right away) until persist(), which rewrites the
+    files atomically and memory-maps them again. On-disk layout of a collection directory:
+      vectors.npy   float16|int8[rows, dim]
+      scales.npy    float32[rows]            int8 only: code * scale = normalized vector
+      records.json  dtype, ids, texts, metadatas (row-aligned)
+    """
+
+    def __init__(self, collection_name: str, embedding_function: Embeddings, persist_directory: str = None, dtype: str = "float16"):
+        if dtype not in DTYPES:
+            raise ValueError(f"Unsupported vector dtype '{dtype}'. Use one of {DTYPES}.")
+        self.collection_name = collection_name
+        self._embedding = embedding_function
+        self.path = os.path.join(persist_directory or FLAT_STORE_PATH, collection_name)
+        self.dtype = dtype
+        self._lock = threading.Lock()
+        # Replaced as a whole on every write, so searches read a consistent snapshot without locking
+        self._state = self._empty_state()
+        self._dirty = False
+        self._vectors_dirty = False
+        # In-memory append buffer backing the current snapshot between persists, see _append
+        self._buffer = self._scale_buffer = self._buffer_view = None
+        self._load()
+
+    @property
+    def embeddings(self) -> Embeddings:
+        return self._embedding
+
+    # --- Storage ---
+
+    def _empty_state(self) -> dict:
+        return {"vectors": None, "scales": None, "ids": [], "texts": [], "metadatas": [], "rows": {}}
+
+    def _state_from(self, vectors, scales, ids: list, texts: list, metadatas: list, rows: dict = None) -> dict:
+        return {
+            "vectors": vectors,
+            "scales": scales,
+            "ids": ids,
+            "texts": texts,
+            "metadatas": metadatas,
+            "rows": rows if rows is not None else {chunk_id: row for row, chunk_id in enumerate(ids)},
+            "float32": None,  # Lazily built search matrix (scales folded in), see _search_matrix
+        }
+
+    def _load(self):
+        records_path = os.path.join(self.path, "records.json")
+        if not os.path.exists(records_path):
+            return
+        try:
+            with open(records_path, "r") as f:
+                records = json.load(f)
+            if not records["ids"]:
+                return
+            vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode="r")
+            scales = np.load(os.path.join(self.path, "scales.npy"), mmap_mode="r") if records["dtype"] == "int8" else None
+            if len(vectors) != len(records["ids"]):
+                raise ValueError(f"{len(vectors)} vectors for {len(records['ids'])} records")
+            self.dtype = records["dtype"]  # The stored encoding wins over the configured one
+            self._state = self._state_from(vectors, scales, records["ids"], records["texts"], records["metadatas"])
+        except Exception as e:
+            logger.error(f"❌ Failed to load flat vector store {self.path}: {e}")
+
+    def _publish(self, vectors, scales, ids: list, texts: list, metadatas: list, vectors_changed: bool = True, rows: dict = None):
+        """Make a new in-memory snapshot visible to searches; persisted by the next persist(). Caller holds self._lock."""
+        self._state = self._state_from(vectors, scales, ids, texts, metadatas, rows)
+        self._dirty = True
+        self._vectors_dirty = self._vectors_dirty or vectors_changed
+
+    def persist(self):
+        """Write buffered changes to disk and switch searches to the memory-mapped copy."""
+        with self._lock:
+            if not self._dirty:
+                return
+            state = self._state
+            os.makedirs(self.path, exist_ok=True)
+            arrays = {"vectors.npy": state["vectors"]}
+            if state["scales"] is not None:
+                arrays["scales.npy"] = state["scales"]
+            for name, array in (arrays.items() if self._vectors_dirty else ()):
+                tmp_path = os.path.join(self.path, f"{name}.tmp")
+                with open(tmp_path, "wb") as f:
+                    np.save(f, array)
+                os.replace(tmp_path, os.path.join(self.path, name))
+
+            tmp_path = os.path.join(self.path, "records.json.tmp")
+            with open(tmp_path, "w") as f:
+                json.dump({"dtype": self.dtype, "ids": state["ids"], "texts": state["texts"], "metadatas": state["metadatas"]}, f)
+            os.replace(tmp_path, os.path.join(self.path, "records.json"))
+
+            if state["ids"] and self._vectors_dirty:
+                vectors = np.load(os.path.join(self.path, "vectors.npy"), mmap_mode="r")
+                scales = np.load(os.path.join(self.path, "scales.npy"), mmap_mode="r") if state["scales"] is not None else None
+                self._state = self._state_from(vectors, scales, state["ids"], state["texts"], state["metadatas"])
+            self._dirty = self._vectors_dirty = False
+
+    def _encode(self, embeddings: list[list[float]]):
+        """Normalize and quantize embedding rows. Returns (codes, scales or None)."""
+        matrix = np.asarray(embeddings, dtype=np.float32)
+        norms = np.linalg.norm(matrix, axis=1, keepdims=True)
+        matrix = matrix / np.where(norms == 0, 1, norms)
+        if self.dtype == "float16":
+            return matrix.astype(np.float16), None
+        scales = np.abs(matrix).max(axis=1) / 127
+        scales = np.where(scales == 0, 1, scales).astype(np.float32)
+        return np.round(matrix / scales[:, None]).astype(np.int8), scales
+
+    def _append(self, state: dict, codes: np.ndarray, scales):
+        """
+        Append rows into a capacity-doubling buffer and return views of the filled part, so batch
+        inserts cost amortized O(batch). Older snapshots keep seeing only their own (unchanged) rows.
+        Caller holds self._lock.
+        """
+        count = len(state["ids"])
+        needed = count + len(codes)
+        if self._buffer is None or state["vectors"] is not self._buffer_view or len(self._buffer) < needed:
+            capacity = max(INITIAL_CAPACITY, 2 * needed)
+            buffer = np.empty((capacity, codes.shape[1]), dtype=codes.dtype)
+            scale_buffer = np.empty(capacity, dtype=np.float32) if scales is not None else None
+            if count:
+                buffer[:count] = state["vectors"]
+                if scales is not None:
+                    scale_buffer[:count] = state["scales"]
+            self._buffer, self._scale_buffer = buffer, scale_buffer
+
+        self._buffer[count:needed] = codes
+        if scales is not None:
+            self._scale_buffer[count:needed] = scales
+        self._buffer_view = self._buffer[:needed]
+        return self._buffer_view, (self._scale_buffer[:needed] if scales is not None else None)
+
+    def _rows_to_keep(self, state: dict, drop: set) -> np.ndarray:
+        return np.array([row for row, chunk_id in enumerate(state["ids"]) if chunk_id not in drop], dtype=np.int64)
+
+    # --- VectorStore interface ---
+
+    def add_texts(self, texts, metadatas: list[dict] = None, ids: list[str] = None, **kwargs) -> list[str]:
+        """Embed and store texts; existing ids are replaced."""
+        texts = list(texts)
+        if not texts:
+            return []
+        metadatas = metadatas or [{} for _ in texts]
+        ids = ids or [f"{self.collection_name}-{os.urandom(8).hex()}" for _ in texts]
+        codes, scales = self._encode(self._embedding.embed_documents(texts))
+
+        metadatas = [dict(m) for m in metadatas]
+
+        with self._lock:
+            state = self._state
+            if state["rows"].keys().isdisjoint(ids):
+                # Plain insert (the indexing path): append without touching existing rows
+                codes, scales = self._append(state, codes, scales)
+                rows = dict(state["rows"])
+                rows.update((chunk_id, len(state["ids"]) + i) for i, chunk_id in enumerate(ids))
+                self._publish(codes, scales, state["ids"] + ids, state["texts"] + texts, state["metadatas"] + metadatas, rows=rows)
+                return ids
+
+            keep = self._rows_to_keep(state, set(ids))
+            if len(keep):
+                codes = np.concatenate([state["vectors"][keep], codes])
+                if scales is not None:
+                    scales = np.concatenate([state["scales"][keep], scales])
+            self._publish(
+                codes,
+                scales,
+                [state["ids"][row] for row in keep] + ids,
+                [state["texts"][row] for row in keep] + texts,
+                [state["metadatas"][row] for row in keep] + metadatas,
+            )
+        return ids
+
+    def delete(self, ids: list[str] = None, **kwargs) -> bool:
+        if not ids:
+            return False
+        with self._lock:
+            state = self._state
+            keep = self._rows_to_keep(state, set(ids))
+            if len(keep) == len(state["ids"]):
+                return True
+            self._publish(
+                state["vectors"][keep] if len(keep) else np.empty((0, 0), dtype=self.dtype),
+                state["scales"][keep] if state["scales"] is not None else None,
+                [state["ids"][row] for row in keep],
+                [state["texts"][row] for row in keep],
+                [state["metadatas"][row] for row in keep],
+            )
+        return True
+
+    def update_metadata(self, ids: list[str], metadatas: list[dict]):
+        """Replace the metadata of stored chunks without re-embedding them."""
+        with self._lock:
+            state = self._state
+            new_metadatas = list(state["metadatas"])
+            for chunk_id, metadata in zip(ids, metadatas):
+                row = state["rows"].get(chunk_id)
+                if row is not None:
+                    new_metadatas[row] = dict(metadata)
+            self._publish(state["vectors"], state["scales"], state["ids"], state["texts"], new_metadatas, vectors_changed=False)
+
+    def delete_collection(self):
+        """Remove the collection directory."""
+        with self._lock:
+            shutil.rmtree(self.path, ignore_errors=True)
+            self._state = self._empty_state()
+            self._dirty = self._vectors_dirty = False
+
+    def get_by_ids(self, ids, /) -> list[Document]:
+        state = self._state
+        rows = [state["rows"][chunk_id] for chunk_id in ids if chunk_id in state["rows"]]
+        return [self._document(state, row) for row in rows]
+
+    def _document(self, state: dict, row: int) -> Document:
+        return Document(id=state["ids"][row], page_content=state["texts"][row], metadata=state["metadatas"][row])
+
+    def _search_matrix(self, state: dict):
+        """float32 copy of a small snapshot (upcasting float16 per query dominates search time), else None."""
+        if state["float32"] is None and state["vectors"].size * 4 <= FLOAT32_CACHE_MAX_BYTES:
+            matrix = state["vectors"].astype(np.float32)
+            if state["scales"] is not None:
+                matrix *= state["scales"][:, None]
+            state["float32"] = matrix
+        return state["float32"]
+
+    def similarity_search_with_score_by_vector(self, embedding: list[float], k: int = 4, filter: dict = None) -> list[tuple[Document, float]]:
+        """Exact top-k by cosine similarity (higher is better)."""
+        state = self._state
+        if state["vectors"] is None or not state["ids"]:
+            return []
+
+        query = np.asarray(embedding, dtype=np.float32)
+        query = query / (np.linalg.norm(query) or 1)
+        matrix = self._search_matrix(state)
+        if matrix is not None:
+            scores = matrix @ query
+        else:
+            # Large collection: stream blocks from the memory map
+            vectors = state["vectors"]
+            scores = np.empty(len(vectors), dtype=np.float32)
+            for start in range(0, len(vectors), SEARCH_BLOCK_ROWS):
+                block = vectors[start:start + SEARCH_BLOCK_ROWS]
+                scores[start:start + len(block)] = block.astype(np.float32) @ query
+            if state["scales"] is not None:
+                scores *= state["scales"]
+        if filter:
+            mask = np.array([all(metadata.get(key) == value for key, value in filter.items()) for metadata in state["metadatas"]])
+            scores = np.where(mask, scores, -np.inf)
+
+        k = min(k, len(scores))
+        top = np.argpartition(-scores, k - 1)[:k]
+        top = top[np.argsort(-scores[top])]
+        return [(self._document(state, int(row)), float(scores[row])) for row in top if np.isfinite(scores[row])]
+
+    def similarity_search_by_vector(self, embedding: list[float], k: int = 4, filter: dict = None, **kwargs) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score_by_vector(embedding, k, filter)]
+
+    def similarity_search_with_score(self, query: str, k: int = 4, filter: dict = None, **kwargs) -> list[tuple[Document, float]]:
+        return self.similarity_search_with_score_by_vector(self._embedding.embed_query(query), k, filter)
+
+    def similarity_search(self, query: str, k: int = 4, filter: dict = None, **kwargs) -> list[Document]:
+        return [doc for doc, _ in self.similarity_search_with_score(query, k, filter)]
+
+    def _select_relevance_score_fn(self):
+        # Cosine similarity in [-1, 1] -> relevance in [0, 1]
+        return lambda score: (score + 1) / 2
+
+    @classmethod
+    def from_texts(cls, texts, embedding: Embeddings, metadatas: list[dict] = None, ids: list[str] = None,
+                   collection_name: str = "langchain", **kwargs) -> "FlatVectorStore":
+        store = cls(collection_name=collection_name, embedding_function=embedding, **kwargs)
+        store.add_texts(texts, metadatas=metadatas, ids=ids)
+        store.persist()
+        return store
+
+def list_flat_collections(persist_directory: str = None) -> list[str]:
+    """Names of the collections stored under the flat store directory."""
+    root = persist_directory or FLAT_STORE_PATH
+    if not os.path.exists(root):
+        return []
+    return sorted(name for name in os.listdir(root) if os.path.isdir(os.path.join(root, name)))
+
+def drop_flat_collection(collection: str, persist_directory: str = None):
+    """Remove a collection directory without opening the collection."""
+    shutil.rmtree(os.path.join(persist_directory or FLAT_STORE_PATH, collection), ignore_errors=True)
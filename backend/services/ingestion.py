@@ -0,0 +1,64 @@
+import os
+import logging
+import threading
+import multiprocessing
+from collections import deque
+from concurrent.futures import ProcessPoolExecutor
+from pypdf import PdfReader
+from langchain_core.documents import Document
+
+logger = logging.getLogger("app")
+
+# Process pool shared by all indexing jobs, created on first large PDF
+_pdf_pool: ProcessPoolExecutor = None
+_pdf_pool_workers = 0
+_pool_lock = threading.Lock()
+
+def _get_pdf_pool(workers: int) -> ProcessPoolExecutor:
+    global _pdf_pool, _pdf_pool_workers
+    with _pool_lock:
+        if _pdf_pool is None:
+            # spawn: never fork a process that runs uvicorn + model threads
+            _pdf_pool = ProcessPoolExecutor(max_workers=workers, mp_context=multiprocessing.get_context("spawn"))
+            _pdf_pool_workers = workers
+            logger.info(f"⚙️ Started PDF extraction pool with {workers} processes")
+        return _pdf_pool
+
+def _extract_page_range(file_path: str, start: int, stop: int) -> list[tuple[int, str]]:
+    """Worker: extract text of pages [start, stop)."""
+    reader = PdfReader(file_path)
+    return [(i, reader.pages[i].extract_text() or "") for i in range(start, stop)]
+
+def _to_documents(file_path: str, pages: list[tuple[int, str]]):
+    # Same metadata layout as PyPDFLoader
+    for page_number, text in pages:
+        yield Document(page_content=text, metadata={"source": file_path, "page": page_number})
+
+def pdf_page_count(file_path: str) -> int:
+    return len(PdfReader(file_path).pages)
+
+def iter_pdf_pages(file_path: str, workers: int = 0, pages_per_task: int = 8, num_pages: int = None):
+    """
+    Yield one Document per PDF page, in page order.
+
+    Page ranges are extracted in a process pool; at most 2 ranges per worker are in flight,
+    so memory is bounded by the window rather than by the document size.
+    """
+    workers = workers or os.cpu_count() or 1
+    num_pages = num_pages if num_pages is not None else pdf_page_count(file_path)
+
+    # Small documents: the IPC round trip costs more than it saves
+    if num_pages <= pages_per_task or workers == 1:
+        for start in range(0, num_pages, pages_per_task):
+            yield from _to_documents(file_path, _extract_page_range(file_path, start, min(start + pages_per_task, num_pages)))
+        return
+
+    pool = _get_pdf_pool(workers)
+    window = 2 * _pdf_pool_workers
+    pending = deque()
+    for start in range(0, num_pages, pages_per_task):
+        pending.append(pool.submit(_extract_page_range, file_path, start, min(start + pages_per_task, num_pages)))
+        if len(pending) >= window:
+            yield from _to_documents(file_path, pending.popleft().result())
+    while pending:
+        yield from _to_documents(file_path, pending.popleft().result())
@@ -0,0 +1,116 @@
+import time
+import uuid
+import logging
+import threading
+from collections import OrderedDict
+from concurrent.futures import ThreadPoolExecutor
+from backend.core.settings import settings
+
+logger = logging.getLogger("app")
+
+MAX_FINISHED_JOBS = 500  # How many finished jobs stay queryable
+
+class JobQueueFull(Exception):
+    """Raised when the indexing queue has no free slot (backpressure)."""
+
+class IndexingJob:
+    """Progress of one background indexing run."""
+
+    def __init__(self, filename: str):
+        self.id = uuid.uuid4().hex
+        self.filename = filename
+        self.status = "queued"  # queued | running | succeeded | failed
+        self.phase = "queued"   # queued | parse | split | embed | store | done
+        self.chunks_done = 0
+        self.chunks_total = 0
+        self.error: str = None
+        self.result: dict = None
+        self.created_at = time.time()
+        self.started_at: float = None
+        self.finished_at: float = None
+        self._embed_started_at: float = None
+
+    def update(self, phase: str = None, done: int = None, total: int = None):
+        """Progress callback handed to the indexing pipeline. A None phase keeps the current one."""
+        if phase == "embed" and self._embed_started_at is None:
+            self._embed_started_at = time.time()
+        if phase is not None:
+            self.phase = phase
+        if total is not None:
+            self.chunks_total = total
+        if done is not None:
+            self.chunks_done = done
+
+    def to_dict(self) -> dict:
+        end = self.finished_at or time.time()
+        throughput = 0.0
+        if self._embed_started_at and self.chunks_done:
+            throughput = self.chunks_done / max(end - self._embed_started_at, 1e-6)
+        return {
+            "job_id": self.id,
+            "filename": self.filename,
+            "status": self.status,
+            "phase": self.phase,
+            "chunks_done": self.chunks_done,
+            "chunks_total": self.chunks_total,
+            "progress": round(self.chunks_done / self.chunks_total, 4) if self.chunks_total else 0.0,
+            "throughput_chunks_per_sec": round(throughput, 2),
+            "elapsed_sec": round(end - (self.started_at or self.created_at), 3),
+            "error": self.error,
+            "result": self.result,
+        }
+
+class JobManager:
+    """Bounded worker pool + queue for indexing jobs. Submissions beyond the queue size are rejected."""
+
+    def __init__(self, max_workers: int, max_queued: int):
+        self._executor = ThreadPoolExecutor(max_workers=max_workers, thread_name_prefix="indexer")
+        self._slots = threading.BoundedSemaphore(max_workers + max_queued)
+        self._jobs: OrderedDict = OrderedDict()
+        self._lock = threading.Lock()
+
+    def submit(self, filename: str, fn) -> IndexingJob:
+        """Queue `fn(job)` for background execution. Raises JobQueueFull when saturated."""
+        if not self._slots.acquire(blocking=False):
+            raise JobQueueFull("Indexing queue is full. Please retry shortly.")
+
+        job = IndexingJob(filename)
+        with self._lock:
+            self._jobs[job.id] = job
+            self._prune()
+        self._executor.submit(self._run, job, fn)
+        logger.info(f"📥 Queued indexing job {job.id} for {filename}")
+        return job
+
+    def get(self, job_id: str):
+        with self._lock:
+            return self._jobs.get(job_id)
+
+    def active(self) -> int:
+        """Number of queued or running jobs."""
+        with self._lock:
+            return sum(1 for job in self._jobs.values() if not job.finished_at)
+
+    def _run(self, job: IndexingJob, fn):
+        job.status = "running"
+        job.started_at = time.time()
+        try:
+            job.result = fn(job)
+            job.phase = "done"
+            job.status = "succeeded"
+            logger.info(f"✅ Indexing job {job.id} finished in {time.time() - job.started_at:.2f}s")
+        except Exception as e:
+            job.status = "failed"
+            job.error = str(e)
+            logger.error(f"❌ Indexing job {job.id} failed: {e}", exc_info=True)
+        finally:
+            job.finished_at = time.time()
+            self._slots.release()
+
+    def _prune(self):
+        finished = [job_id for job_id, job in self._jobs.items() if job.finished_at]
+        for job_id in finished[:max(0, len(finished) - MAX_FINISHED_JOBS)]:
+            del self._jobs[job_id]
+
+# Singleton instance
+job_manager = JobManager(max_workers=settings.INDEX_WORKERS, max_queued=settings.INDEX_QUEUE_SIZE)
@@ -0,0 +1,194 @@
+import os
+import re
+import json
+import math
+import logging
+import threading
+from collections import Counter, OrderedDict
+from typing import Any
+from langchain_core.callbacks import CallbackManagerForRetrieverRun
+from langchain_core.documents import Document
+from langchain_core.retrievers import BaseRetriever
+from backend.core.settings import settings
+
+logger = logging.getLogger("app")
+
+LEXICAL_INDEX_PATH = "data/bm25_index"
+
+# Identifiers like "ERR-1042", "4.2.1" or "part_no/77" stay whole; CJK is indexed per character
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+(?:[-_./:][a-z0-9]+)*|[\u4e00-\u9fff]")
+PART_PATTERN = re.compile(r"[a-z0-9]+")
+
+def tokenize(text: str) -> list[str]:
+    """Lowercased tokens; compound identifiers also contribute their parts."""
+    tokens = []
+    for token in TOKEN_PATTERN.findall(text.lower()):
+        tokens.append(token)
+        parts = PART_PATTERN.findall(token)
+        if len(parts) > 1:
+            tokens.extend(parts)
+    return tokens
+
+class BM25Index:
+    """Incrementally updatable in-memory inverted index with Okapi BM25 scoring, persisted as compact JSON."""
+
+    def __init__(self, path: str = None, k1: float = 1.5, b: float = 0.75):
+        self.path = path
+        self.k1 = k1
+        self.b = b
+        self._postings: dict[str, dict[str, int]] = {}  # term -> {chunk_id: term frequency}
+        self._doc_len: dict[str, int] = {}
+        self._doc_terms: dict[str, list[str]] = {}     # chunk_id -> distinct terms, for removal
+        self._total_len = 0
+        self._lock = threading.Lock()
+
+    def __len__(self):
+        return len(self._doc_len)
+
+    def add(self, ids: list[str], texts: list[str]):
+        """Index chunks; re-adding an id replaces its previous content."""
+        with self._lock:
+            for chunk_id, text in zip(ids, texts):
+                if chunk_id in self._doc_len:
+                    self._remove(chunk_id)
+                counts = Counter(tokenize(text))
+                for term, tf in counts.items():
+                    self._postings.setdefault(term, {})[chunk_id] = tf
+                length = sum(counts.values())
+                self._doc_len[chunk_id] = length
+                self._doc_terms[chunk_id] = list(counts)
+                self._total_len += length
+
+    def remove(self, ids: list[str]):
+        with self._lock:
+            for chunk_id in ids:
+                if chunk_id in self._doc_len:
+                    self._remove(chunk_id)
+
+    def _remove(self, chunk_id: str):
+        for term in self._doc_terms.pop(chunk_id):
+            postings = self._postings[term]
+            del postings[chunk_id]
+            if not postings:
+                del self._postings[term]
+        self._total_len -= self._doc_len.pop(chunk_id)
+
+    def search(self, query: str, k: int = 20) -> list[tuple[str, float]]:
+        """Top-k (chunk_id, score) by BM25."""
+        with self._lock:
+            n_docs = len(self._doc_len)
+            if not n_docs:
+                return []
+            avg_len = self._total_len / n_docs
+            scores: dict[str, float] = {}
+            for term in set(tokenize(query)):
+                postings = self._postings.get(term)
+                if not postings:
+                    continue
+                idf = math.log(1 + (n_docs - len(postings) + 0.5) / (len(postings) + 0.5))
+                for chunk_id, tf in postings.items():
+                    norm = tf + self.k1 * (1 - self.b + self.b * self._doc_len[chunk_id] / avg_len)
+                    scores[chunk_id] = scores.get(chunk_id, 0.0) + idf * tf * (self.k1 + 1) / norm
+        return sorted(scores.items(), key=lambda item: item[1], reverse=True)[:k]
+
+    def save(self):
+        """Persist postings and document lengths (term lists are rebuilt on load)."""
+        if not self.path:
+            return
+        with self._lock:
+            data = json.dumps({"doc_len": self._doc_len, "postings": self._postings}, separators=(",", ":"))
+        os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        tmp_path = f"{self.path}.tmp"
+        with open(tmp_path, "w") as f:
+            f.write(data)
+        os.replace(tmp_path, self.path)
+
+    def load(self):
+        if not self.path or not os.path.exists(self.path):
+            return
+        try:
+            with open(self.path, "r") as f:
+                data = json.load(f)
+            doc_terms: dict[str, list[str]] = {chunk_id: [] for chunk_id in data["doc_len"]}
+            for term, postings in data["postings"].items():
+                for chunk_id in postings:
+                    doc_terms[chunk_id].append(term)
+            with self._lock:
+                self._postings = data["postings"]
+                self._doc_len = data["doc_len"]
+                self._doc_terms = doc_terms
+                self._total_len = sum(self._doc_len.values())
+        except Exception as e:
+            logger.error(f"❌ Failed to load lexical index {self.path}: {e}")
+
+# Process-wide lexical indexes, keyed by collection, least recently used first (at most OPEN_COLLECTIONS_MAX)
+_lexical_indexes: OrderedDict = OrderedDict()
+_lexical_lock = threading.Lock()
+
+def lexical_index_path(collection: str) -> str:
+    return os.path.join(LEXICAL_INDEX_PATH, f"{collection}.json")
+
+def get_lexical_index(collection: str) -> BM25Index:
+    """Return the BM25 index of a collection, loading it from disk on first use."""
+    with _lexical_lock:
+        index = _lexical_indexes.get(collection)
+        if index is None:
+            index = BM25Index(lexical_index_path(collection))
+            index.load()
+            _lexical_indexes[collection] = index
+            while len(_lexical_indexes) > settings.OPEN_COLLECTIONS_MAX:
+                _lexical_indexes.popitem(last=False)
+        else:
+            _lexical_indexes.move_to_end(collection)
+        return index
+
+def release_lexical_index(collection: str):
+    """Forget the loaded BM25 index of a collection; the next get_lexical_index() reloads it from disk."""
+    with _lexical_lock:
+        _lexical_indexes.pop(collection, None)
+
+def drop_lexical_index(collection: str):
+    """Forget the BM25 index of a deleted collection and remove its file."""
+    with _lexical_lock:
+        _lexical_indexes.pop(collection, None)
+        if os.path.exists(lexical_index_path(collection)):
+            os.remove(lexical_index_path(collection))
+
+class HybridRetriever(BaseRetriever):
+    """
+    Fuses dense similarity and BM25 rankings with reciprocal rank fusion.
+
+    Lexical hits scoring below `min_lexical_ratio` of the best one are dropped first: a query like
+    "ERR-1042" matches every chunk mentioning "err", and those weak hits would otherwise outvote the
+    one chunk that contains the exact identifier.
+    """
+
+    vector_store: Any
+    lexical_index: Any
+    k: int = 5
+    fetch_k: int = 20
+    rrf_k: int = 60
+    min_lexical_ratio: float = 0.2
+
+    def _get_relevant_documents(self, query: str, *, run_manager: CallbackManagerForRetrieverRun) -> list[Document]:
+        dense = self.vector_store.similarity_search(query, k=self.fetch_k)
+        lexical = self.lexical_index.search(query, k=self.fetch_k)
+        if lexical:
+            lexical = [(chunk_id, score) for chunk_id, score in lexical if score >= self.min_lexical_ratio * lexical[0][1]]
+
+        # Lexical ranks are added first so exact matches win ties
+        scores: dict[str, float] = {}
+        for rank, (chunk_id, _) in enumerate(lexical):
+            scores[chunk_id] = 1 / (self.rrf_k + rank + 1)
+        docs: dict[str, Document] = {}
+        for rank, doc in enumerate(dense):
+            scores[doc.id] = scores.get(doc.id, 0.0) + 1 / (self.rrf_k + rank + 1)
+            docs[doc.id] = doc
+
+        top_ids = sorted(scores, key=scores.get, reverse=True)[:self.k]
+        # Lexical-only hits are fetched from the vector store by id
+        missing = [chunk_id for chunk_id in top_ids if chunk_id not in docs]
+        if missing:
+            for doc in self.vector_store.get_by_ids(missing):
+                docs[doc.id] = doc
+        return [docs[chunk_id] for chunk_id in top_ids if chunk_id in docs]
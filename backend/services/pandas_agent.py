@@ -0,0 +1,71 @@
+import os
+import threading
+from collections import OrderedDict
+from pydantic import BaseModel, Field
+from langchain_core.tools import BaseTool
+from langchain_core.prompts import ChatPromptTemplate, MessagesPlaceholder
+from langchain.agents import AgentExecutor, create_openai_tools_agent
+from backend.core.metrics import span, AGENT_STEPS
+from backend.services.pandas_workers import pandas_pool
+
+MAX_CACHED_AGENTS = 16
+
+PANDAS_AGENT_PREFIX = """
+You are working with a pandas dataframe in Python. The name of the dataframe is `df`.
+It has {rows} rows. This is the result of `print(df.head())`:
+{head}
+
+Use the python_repl_ast tool to run Python against `df` and answer the question.
+Each call starts from the original `df`; variables do not persist between calls.
+"""
+
+class PythonInputs(BaseModel):
+    query: str = Field(description="code snippet to run")
+
+class RemotePythonTool(BaseTool):
+    """python_repl_ast look-alike that runs code in the pandas worker pool instead of the API process."""
+
+    name: str = "python_repl_ast"
+    description: str = (
+        "A Python shell. Use this to execute python commands. Input should be a valid python command. "
+        "When using this tool, sometimes output is abbreviated - make sure it does not look abbreviated before using it in your answer."
+    )
+    args_schema: type[BaseModel] = PythonInputs
+    file_path: str
+
+    def _run(self, query: str, run_manager=None) -> str:
+        AGENT_STEPS.labels(tool=self.name).inc()
+        with span("agent_step"):
+            return pandas_pool.execute(self.file_path, query)
+
+# Compiled agents keyed by (file path, mtime)
+_agents: OrderedDict = OrderedDict()
+_agents_lock = threading.Lock()
+
+def get_pandas_agent(llm, file_path: str) -> AgentExecutor:
+    """Return the agent for a file, building it (and loading the frame into a worker) only once per file version."""
+    key = (file_path, os.path.getmtime(file_path))
+    with _agents_lock:
+        agent = _agents.get(key)
+        if agent is not None:
+            _agents.move_to_end(key)
+            return agent
+
+    summary = pandas_pool.describe(file_path)
+    prompt = ChatPromptTemplate.from_messages([
+        ("system", PANDAS_AGENT_PREFIX.format(rows=summary["rows"], head=summary["head"]).replace("{", "{{").replace("}", "}}")),
+        ("human", "{input}"),
+        MessagesPlaceholder("agent_scratchpad"),
+    ])
+    tools = [RemotePythonTool(file_path=file_path)]
+    agent = AgentExecutor(
+        agent=create_openai_tools_agent(llm, tools, prompt),
+        tools=tools,
+        verbose=True,
+        return_intermediate_steps=True
+    )
+    with _agents_lock:
+        _agents[key] = agent
+        while len(_agents) > MAX_CACHED_AGENTS:
+            _agents.popitem(last=False)
+    return agent
@@ -0,0 +1,179 @@
+import io
+import os
+import ast
+import math
+import signal
+import hashlib
+import logging
+import resource
+import threading
+import multiprocessing
+import contextlib
+from concurrent.futures import ProcessPoolExecutor, TimeoutError as FutureTimeoutError
+from concurrent.futures.process import BrokenProcessPool
+from backend.core.settings import settings
+
+logger = logging.getLogger("app")
+
+# --- Worker process side ---
+
+# DataFrames stay resident in each worker between executions
+_worker_frames = None
+
+class CPUTimeExceeded(Exception):
+    pass
+
+def _on_sigxcpu(signum, frame):
+    raise CPUTimeExceeded()
+
+def _worker_init(memory_limit_bytes: int, cache_bytes: int):
+    global _worker_frames
+    from backend.services.table_service import DataFrameCache
+
+    _worker_frames = DataFrameCache(max_bytes=cache_bytes)
+    signal.signal(signal.SIGXCPU, _on_sigxcpu)
+    if memory_limit_bytes:
+        _, hard = resource.getrlimit(resource.RLIMIT_AS)
+        resource.setrlimit(resource.RLIMIT_AS, (memory_limit_bytes, hard))
+
+def _run_code(code: str, namespace: dict) -> str:
+    """Run code like a REPL: execute all statements, echo the value of a trailing expression."""
+    tree = ast.parse(code)
+    stdout = io.StringIO()
+    with contextlib.redirect_stdout(stdout):
+        if tree.body and isinstance(tree.body[-1], ast.Expr):
+            exec(compile(ast.Module(body=tree.body[:-1], type_ignores=[]), "<agent>", "exec"), namespace)
+            value = eval(compile(ast.Expression(body=tree.body[-1].value), "<agent>", "eval"), namespace)
+            if value is not None:
+                print(value)
+        else:
+            exec(compile(tree, "<agent>", "exec"), namespace)
+    return stdout.getvalue()
+
+def _execute(file_path: str, code: str, cpu_seconds: int) -> str:
+    import numpy as np
+    import pandas as pd
+
+    df = _worker_frames.get(file_path)
+    # Copy-on-write shallow copy: generated code can't mutate the resident frame
+    namespace = {"df": df.copy(deep=False), "pd": pd, "np": np}
+
+    soft, hard = resource.getrlimit(resource.RLIMIT_CPU)
+    usage = resource.getrusage(resource.RUSAGE_SELF)
+    used = math.ceil(usage.ru_utime + usage.ru_stime)
+    resource.setrlimit(resource.RLIMIT_CPU, (used + cpu_seconds, hard))
+    try:
+        return _run_code(code, namespace)
+    except CPUTimeExceeded:
+        return f"Error: code exceeded the CPU time limit of {cpu_seconds}s"
+    except MemoryError:
+        return "Error: code exceeded the worker memory limit"
+    except Exception as e:
+        return f"{type(e).__name__}: {e}"
+    finally:
+        resource.setrlimit(resource.RLIMIT_CPU, (soft, hard))
+
+def _describe(file_path: str) -> dict:
+    df = _worker_frames.get(file_path)
+    return {"head": df.head().to_markdown(), "rows": len(df), "columns": [str(c) for c in df.columns]}
+
+# --- Server side ---
+
+class PandasWorkerPool:
+    """
+    Long-lived worker processes that run agent-generated pandas code next to resident DataFrames,
+    keeping heavy computations off the API process (and its GIL). Each execution gets a CPU-time
+    limit (RLIMIT_CPU) and each worker a memory limit (RLIMIT_AS); a call that exceeds the
+    wall-clock timeout has its worker killed and replaced.
+
+    Every file is pinned to one worker (by a hash of its path), so its DataFrame is resident in a
+    single process and each worker's cache share only holds the files routed to it.
+    """
+
+    def __init__(self, workers: int, cpu_seconds: int, memory_limit_mb: int, timeout_seconds: int, cache_mb: int):
+        self.workers = workers or os.cpu_count() or 1
+        self.cpu_seconds = cpu_seconds
+        self.timeout_seconds = timeout_seconds
+        self._memory_limit_bytes = memory_limit_mb * 1024 * 1024
+        self._cache_bytes = cache_mb * 1024 * 1024 // self.workers
+        self._pools: list = [None] * self.workers  # One single-process executor per worker
+        self._lock = threading.Lock()
+        self.executed = 0
+        self.failed = 0
+
+    def _worker_for(self, file_path: str) -> int:
+        digest = hashlib.sha256(os.path.normpath(file_path).encode("utf-8")).digest()
+        return int.from_bytes(digest[:8], "big") % self.workers
+
+    def _get_pool(self, worker: int) -> ProcessPoolExecutor:
+        with self._lock:
+            if self._pools[worker] is None:
+                self._pools[worker] = ProcessPoolExecutor(
+                    max_workers=1,
+                    mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_worker_init,
+                    initargs=(self._memory_limit_bytes, self._cache_bytes)
+                )
+                logger.info(f"⚙️ Started pandas worker {worker + 1}/{self.workers}")
+            return self._pools[worker]
+
+    def _reset_pool(self, worker: int, pool: ProcessPoolExecutor, reason: str, kill: bool = False):
+        with self._lock:
+            if self._pools[worker] is pool:
+                self._pools[worker] = None
+        if kill:
+            # No public API to stop an executor's process; terminating it fails the executor's pending calls
+            for process in list((pool._processes or {}).values()):
+                process.terminate()
+        pool.shutdown(wait=False, cancel_futures=True)
+        logger.warning(f"♻️ Pandas worker {worker + 1} {reason} and will be restarted")
+
+    def _submit(self, fn, file_path: str, *args):
+        worker = self._worker_for(file_path)
+        pool = self._get_pool(worker)
+        try:
+            return pool.submit(fn, file_path, *args).result(timeout=self.timeout_seconds)
+        except FutureTimeoutError:
+            # Code that sleeps or blocks never hits RLIMIT_CPU: kill it rather than leave the worker occupied
+            self._reset_pool(worker, pool, "timed out", kill=True)
+            raise
+        except BrokenProcessPool:
+            # The worker died (e.g. killed for memory); start a fresh process for the next call
+            self._reset_pool(worker, pool, "crashed")
+            raise
+
+    def execute(self, file_path: str, code: str) -> str:
+        """Run agent code against the file's DataFrame (`df`) and return its output as text."""
+        try:
+            output = self._submit(_execute, file_path, code, self.cpu_seconds)
+            self.executed += 1
+            return output
+        except FutureTimeoutError:
+            self.failed += 1
+            return f"Error: code did not finish within {self.timeout_seconds}s"
+        except BrokenProcessPool:
+            self.failed += 1
+            return "Error: the worker running this code crashed (likely out of memory)"
+
+    def describe(self, file_path: str) -> dict:
+        """head()/shape of the file's DataFrame, loaded into a worker."""
+        return self._submit(_describe, file_path)
+
+    def stats(self) -> dict:
+        return {"workers": self.workers, "executed": self.executed, "failed": self.failed}
+
+    def shutdown(self):
+        with self._lock:
+            pools, self._pools = self._pools, [None] * self.workers
+        for pool in pools:
+            if pool:
+                pool.shutdown(wait=False, cancel_futures=True)
+
+# Singleton instance
+pandas_pool = PandasWorkerPool(
+    workers=settings.PANDAS_WORKERS,
+    cpu_seconds=settings.PANDAS_CPU_SECONDS,
+    memory_limit_mb=settings.PANDAS_MEMORY_LIMIT_MB,
+    timeout_seconds=settings.PANDAS_TIMEOUT_SECONDS,
+    cache_mb=settings.DATAFRAME_CACHE_MAX_MB
+)
@@ -0,0 +1,156 @@
+import os
+import re
+import logging
+import duckdb
+from langchain_core.prompts import ChatPromptTemplate
+from langchain_core.output_parsers import StrOutputParser
+from backend.core.settings import settings
+from backend.core.metrics import span, AGENT_STEPS
+from backend.services.table_service import COLUMNAR_PATH, columnar_path, convert_to_columnar
+
+logger = logging.getLogger("app")
+
+DUCKDB_TEMP_PATH = "data/duckdb_tmp"
+TABLE_NAME = "data"
+SAMPLE_ROWS = 5
+
+SQL_PROMPT = ChatPromptTemplate.from_template("""
+    You are a DuckDB SQL expert. The user's spreadsheet is the table `data`.
+
+    Schema:
+    {schema}
+
+    Sample rows:
+    {sample}
+
+    Write ONE read-only DuckDB SQL query (SELECT or WITH) that answers the question below.
+    Aggregate in SQL instead of returning raw rows whenever possible.
+    Return only the SQL, without explanation or markdown.
+    {error}
+    Question: {input}
+""")
+
+ANSWER_PROMPT = ChatPromptTemplate.from_template("""
+    Answer the question using the SQL query result below. Be concise and mention if the result was truncated.
+
+    Question: {input}
+
+    SQL:
+    {sql}
+
+    Result ({row_count} rows{truncated}):
+    {result}
+""")
+
+def _quote(value: str) -> str:
+    """SQL string literal (DuckDB can't bind parameters in SET/COPY/DDL)."""
+    return "'" + value.replace("'", "''") + "'"
+
+def convert_with_duckdb(file_path: str, progress=None) -> dict:
+    """
+    CSV -> Parquet conversion that streams through DuckDB instead of pandas, so files larger than RAM
+    work. Excel files fall back to the pandas conversion.
+    """
+    if not file_path.endswith(".csv"):
+        return convert_to_columnar(file_path, progress)
+
+    if progress:
+        progress("parse")
+    os.makedirs(COLUMNAR_PATH, exist_ok=True)
+    target = columnar_path(file_path)
+    tmp_target = f"{target}.tmp"
+    with duckdb.connect() as con:
+        con.execute(f"SET temp_directory = {_quote(DUCKDB_TEMP_PATH)}")
+        con.execute(f"COPY (SELECT * FROM read_csv_auto({_quote(file_path)})) TO {_quote(tmp_target)} (FORMAT PARQUET)")
+        if progress:
+            progress("store")
+        rows = con.execute("SELECT count(*) FROM read_parquet(?)", [tmp_target]).fetchone()[0]
+        columns = {name: dtype for name, dtype, *_ in con.execute("DESCRIBE SELECT * FROM read_parquet(?)", [tmp_target]).fetchall()}
+    os.replace(tmp_target, target)
+    logger.info(f"📦 Converted {os.path.basename(file_path)} to Parquet via DuckDB: {rows} rows x {len(columns)} columns")
+    return {"rows": rows, "columns": columns}
+
+def _connect(file_path: str) -> duckdb.DuckDBPyConnection:
+    """In-memory DuckDB with the upload's Parquet copy as view `data`; all other file access is locked out."""
+    source = columnar_path(file_path)
+    if not os.path.exists(source):
+        convert_with_duckdb(file_path)
+
+    os.makedirs(DUCKDB_TEMP_PATH, exist_ok=True)
+    con = duckdb.connect()
+    if settings.SQL_THREADS:
+        con.execute(f"SET threads = {int(settings.SQL_THREADS)}")
+    con.execute(f"SET memory_limit = {_quote(settings.SQL_MEMORY_LIMIT)}")
+    con.execute(f"SET temp_directory = {_quote(os.path.abspath(DUCKDB_TEMP_PATH))}")
+    con.execute(f"SET allowed_directories = [{_quote(os.path.abspath(COLUMNAR_PATH) + os.sep)}]")
+    con.execute("SET enable_external_access = false")
+    con.execute("SET lock_configuration = true")
+    con.execute(f"CREATE VIEW {TABLE_NAME} AS SELECT * FROM read_parquet({_quote(os.path.abspath(source))})")
+    return con
+
+def _clean_sql(text: str) -> str:
+    """Strip markdown fences and trailing semicolons from LLM output."""
+    text = re.sub(r"^```(?:sql)?\s*|\s*```$", "", text.strip(), flags=re.IGNORECASE)
+    return text.strip().rstrip(";").strip()
+
+def _is_read_only(sql: str) -> bool:
+    return re.match(r"^\s*(select|with)\b", sql, flags=re.IGNORECASE) is not None and ";" not in sql
+
+def iter_sql_agent(llm, file_path: str, message: str, max_attempts: int = 2):
+    """
+    Answer a question over an Excel/CSV upload with LLM-written DuckDB SQL, as a stream of
+    ("step", step) events for each executed query followed by ("token", text) answer chunks.
+    """
+    max_rows = settings.SQL_MAX_RESULT_ROWS
+    with _connect(file_path) as con:
+        schema = "\n".join(f"- {name}: {dtype}" for name, dtype, *_ in con.execute(f"DESCRIBE {TABLE_NAME}").fetchall())
+        sample = con.execute(f"SELECT * FROM {TABLE_NAME} LIMIT {SAMPLE_ROWS}").df().to_markdown(index=False)
+
+        error_hint = ""
+        for _ in range(max_attempts):
+            sql = _clean_sql((SQL_PROMPT | llm | StrOutputParser()).invoke({
+                "schema": schema, "sample": sample, "input": message, "error": error_hint
+            }))
+            step = {"tool": "sql_db_query", "input": {"query": sql}, "log": "", "output": ""}
+            if not _is_read_only(sql):
+                step["output"] = "Rejected: only a single SELECT/WITH query is allowed."
+                error_hint = f"Your previous answer was rejected: {step['output']}\n"
+                yield "step", step
+                continue
+            AGENT_STEPS.labels(tool="sql_db_query").inc()
+            try:
+                # Row limit applied around the generated query: DuckDB stops scanning early
+                with span("agent_step"):
+                    result = con.execute(f"SELECT * FROM ({sql}) LIMIT {max_rows + 1}").df()
+            except duckdb.Error as e:
+                step["output"] = f"Error: {e}"
+                error_hint = f"Your previous query `{sql}` failed with: {e}\nFix it.\n"
+                yield "step", step
+                continue
+
+            truncated = len(result) > max_rows
+            result = result.head(max_rows)
+            step["output"] = result.to_markdown(index=False)
+            step["log"] = f"{len(result)} rows" + (" (truncated)" if truncated else "")
+            yield "step", step
+            for token in (ANSWER_PROMPT | llm | StrOutputParser()).stream({
+                "input": message,
+                "sql": sql,
+                "row_count": len(result),
+                "truncated": f", truncated to {max_rows}" if truncated else "",
+                "result": step["output"],
+            }):
+                yield "token", token
+            return
+
+    yield "token", "Sorry, I could not write a working SQL query for this question."
+
+def run_sql_agent(llm, file_path: str, message: str, max_attempts: int = 2):
+    """Answer a question over an Excel/CSV upload with LLM-written DuckDB SQL. Returns (answer, steps)."""
+    answer, steps_log = "", []
+    for event, payload in iter_sql_agent(llm, file_path, message, max_attempts):
+        if event == "step":
+            steps_log.append(payload)
+        else:
+            answer += payload
+    return answer, steps_log
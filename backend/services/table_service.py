@@ -0,0 +1,96 @@
+import os
+import json
+import logging
+import threading
+from collections import OrderedDict
+
+logger = logging.getLogger("app")
+
+COLUMNAR_PATH = "data/columnar"
+
+def columnar_path(file_path: str) -> str:
+    """Location of the Parquet copy of an uploaded CSV/Excel file (prefixed by its upload directory, so same-named uploads don't clash)."""
+    upload_dir = os.path.basename(os.path.dirname(os.path.normpath(file_path)))
+    return os.path.join(COLUMNAR_PATH, f"{upload_dir}_{os.path.basename(file_path)}.parquet")
+
+def remove_columnar(file_path: str):
+    """Delete the Parquet copy (and dtype sidecar) of an upload."""
+    for path in (columnar_path(file_path), columnar_path(file_path) + ".json"):
+        if os.path.exists(path):
+            os.remove(path)
+
+def read_source_table(file_path: str):
+    """Parse the original CSV/Excel upload (slow path, done once per upload)."""
+    import pandas as pd  # Deferred: only uploads and pandas workers need it
+
+    if file_path.endswith(".csv"):
+        return pd.read_csv(file_path, engine="pyarrow")
+    return pd.read_excel(file_path)
+
+def convert_to_columnar(file_path: str, progress=None) -> dict:
+    """
+    Parse a CSV/Excel upload once, infer dtypes and store it as Parquet (plus a dtype sidecar)
+    so later loads skip CSV/openpyxl parsing entirely. Returns the table summary.
+    """
+    if progress:
+        progress("parse")
+    df = read_source_table(file_path)
+    df.columns = [str(column) for column in df.columns]  # Parquet requires string column names
+    df = df.convert_dtypes()
+
+    if progress:
+        progress("store")
+    os.makedirs(COLUMNAR_PATH, exist_ok=True)
+    target = columnar_path(file_path)
+    tmp_target = f"{target}.tmp"
+    df.to_parquet(tmp_target, engine="pyarrow", index=False)
+    os.replace(tmp_target, target)
+
+    summary = {
+        "rows": len(df),
+        "columns": {column: str(dtype) for column, dtype in df.dtypes.items()},
+    }
+    with open(f"{target}.json", "w") as f:
+        json.dump(summary, f)
+    logger.info(f"📦 Converted {os.path.basename(file_path)} to Parquet: {len(df)} rows x {len(df.columns)} columns")
+    return summary
+
+class DataFrameCache:
+    """LRU cache of loaded DataFrames keyed by (path, mtime), bounded by their in-memory size."""
+
+    def __init__(self, max_bytes: int):
+        self.max_bytes = max_bytes
+        self._frames: OrderedDict = OrderedDict()  # (path, mtime) -> (DataFrame, nbytes)
+        self._total_bytes = 0
+        self._lock = threading.Lock()
+
+    def get(self, file_path: str):
+        """Return the DataFrame of an upload, loading its Parquet copy (converted on demand) on a miss."""
+        source = columnar_path(file_path)
+        if not os.path.exists(source) or os.path.getmtime(source) < os.path.getmtime(file_path):
+            convert_to_columnar(file_path)
+        key = (source, os.path.getmtime(source))
+
+        with self._lock:
+            cached = self._frames.get(key)
+            if cached is not None:
+                self._frames.move_to_end(key)
+                return cached[0]
+
+        import pandas as pd
+
+        df = pd.read_parquet(source, engine="pyarrow", memory_map=True)
+        nbytes = int(df.memory_usage(deep=True).sum())
+        with self._lock:
+            if key not in self._frames:
+                self._frames[key] = (df, nbytes)
+                self._total_bytes += nbytes
+            # Evict least recently used frames, but always keep the one just loaded
+            while self._total_bytes > self.max_bytes and len(self._frames) > 1:
+                _, (_, evicted_bytes) = self._frames.popitem(last=False)
+                self._total_bytes -= evicted_bytes
+        return df
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {"frames": len(self._frames), "bytes": self._total_bytes, "max_bytes": self.max_bytes}
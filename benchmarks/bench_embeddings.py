@@ -0,0 +1,89 @@
+"""
+Embedding throughput (chunks/sec) and retrieval-quality delta of EmbeddingEngine configurations
+against the reference model (a single default HuggingFaceEmbeddings, i.e. the pre-engine setup).
+
+Quality: each query is a word window cut from one chunk; recall@k is the share of queries whose
+source chunk ranks in the top k. `overlap@k` is the agreement of top-k lists with the reference.
+
+Usage: python -m benchmarks.bench_embeddings [--chunks 2000] [--configs torch:32:0 onnx:32:0]
+       (config = backend:batch_size:workers, workers 0 = auto)
+"""
+import time
+import json
+import random
+import argparse
+import numpy as np
+from langchain_huggingface import HuggingFaceEmbeddings
+from backend.core.settings import settings
+from backend.services.embedding_engine import EmbeddingEngine
+
+TOPICS = {
+    "billing": "invoice payment refund currency tax receipt overdue balance credit ledger",
+    "shipping": "delivery carrier parcel warehouse tracking customs freight route pallet dispatch",
+    "legal": "clause liability indemnity termination jurisdiction warranty breach notice arbitration party",
+    "support": "ticket outage error restart firmware password account escalation timeout reboot",
+}
+
+def make_corpus(n: int, seed: int = 42) -> list[str]:
+    rng = random.Random(seed)
+    topics = list(TOPICS.values())
+    chunks = []
+    for i in range(n):
+        words = rng.choice(topics).split() + rng.choice(topics).split()[:3]
+        chunks.append(f"Item {i}: " + " ".join(rng.choice(words) for _ in range(150)))
+    return chunks
+
+def make_queries(chunks: list[str], n: int, seed: int = 7) -> list[tuple[str, int]]:
+    rng = random.Random(seed)
+    queries = []
+    for _ in range(n):
+        target = rng.randrange(len(chunks))
+        words = chunks[target].split()
+        start = rng.randrange(2, len(words) - 12)
+        queries.append((" ".join(words[start:start + 12]), target))
+    return queries
+
+def top_k(doc_vectors: np.ndarray, query_vectors: np.ndarray, k: int) -> np.ndarray:
+    doc_vectors = doc_vectors / np.linalg.norm(doc_vectors, axis=1, keepdims=True)
+    query_vectors = query_vectors / np.linalg.norm(query_vectors, axis=1, keepdims=True)
+    scores = query_vectors @ doc_vectors.T
+    return np.argsort(-scores, axis=1)[:, :k]
+
+def run(embeddings, chunks: list[str], queries: list[tuple[str, int]], k: int) -> tuple[dict, np.ndarray]:
+    embeddings.embed_documents(chunks[:8])  # warm up
+    start = time.perf_counter()
+    doc_vectors = np.asarray(embeddings.embed_documents(chunks), dtype=np.float32)
+    elapsed = time.perf_counter() - start
+    query_vectors = np.asarray([embeddings.embed_query(q) for q, _ in queries], dtype=np.float32)
+    ranked = top_k(doc_vectors, query_vectors, k)
+    recall = float(np.mean([target in row for row, (_, target) in zip(ranked, queries)]))
+    return {"chunks_per_sec": round(len(chunks) / elapsed, 1), f"recall@{k}": round(recall, 4)}, ranked
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--chunks", type=int, default=2000)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--configs", nargs="+", default=["torch:32:1", "torch:32:0", "onnx:32:0"])
+    args = parser.parse_args()
+
+    chunks = make_corpus(args.chunks)
+    queries = make_queries(chunks, args.queries)
+    model_name = settings.EMBEDDING_MODEL_NAME
+
+    reference, reference_ranked = run(HuggingFaceEmbeddings(model_name=model_name), chunks, queries, args.k)
+    results = {"reference": reference}
+    for config in args.configs:
+        backend, batch_size, workers = config.split(":")
+        engine = EmbeddingEngine(model_name, backend=backend, batch_size=int(batch_size), workers=int(workers), onnx_file=settings.EMBEDDING_ONNX_FILE)
+        result, ranked = run(engine, chunks, queries, args.k)
+        result["workers"] = engine.workers
+        result[f"recall@{args.k}_delta"] = round(result[f"recall@{args.k}"] - reference[f"recall@{args.k}"], 4)
+        result[f"overlap@{args.k}"] = round(float(np.mean([len(set(a) & set(b)) / args.k for a, b in zip(ranked, reference_ranked)])), 4)
+        result["speedup"] = round(result["chunks_per_sec"] / reference["chunks_per_sec"], 2)
+        results[config] = result
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,131 @@
+"""
+Logging overhead on the request path: the old synchronous handlers vs the queued pipeline.
+
+Simulates --requests chat requests across --concurrency asyncio tasks, each emitting the log lines
+a /chat request produces (received, routing, request summary with timings). Reports the time spent
+inside logging calls per request (p50/p99, on the event loop) and overall requests/sec.
+--io-delay-ms adds latency to every file write, like a slow or network disk.
+
+Usage: python -m benchmarks.bench_logging [--requests 20000] [--concurrency 64] [--io-delay-ms 0]
+"""
+import os
+import time
+import json
+import random
+import asyncio
+import argparse
+import tempfile
+import logging
+import logging.config
+import logging.handlers
+
+# Log files go to a scratch directory
+os.chdir(tempfile.mkdtemp(prefix="bench_logging_"))
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+
+from backend.core import logging as app_logging
+from backend.core.settings import settings
+from benchmarks.common import percentiles
+
+# The previous configuration: console + rotating file handlers called synchronously by every logger
+LEGACY_CONFIG = {
+    "version": 1,
+    "disable_existing_loggers": False,
+    "formatters": {"standard": {"format": app_logging.TEXT_FORMAT, "datefmt": app_logging.DATE_FORMAT}},
+    "handlers": {
+        "console": {"level": "INFO", "class": "logging.StreamHandler", "formatter": "standard"},
+        "file": {
+            "level": "INFO", "class": "logging.handlers.RotatingFileHandler", "filename": "legacy.log",
+            "maxBytes": 10 * 1024 * 1024, "backupCount": 5, "formatter": "standard", "encoding": "utf8"
+        },
+    },
+    "loggers": {"app": {"handlers": ["console", "file"], "level": "INFO", "propagate": False}},
+    "root": {"handlers": ["console", "file"], "level": "INFO"},
+}
+
+def _prepare_handlers(handlers, delay: float):
+    """Send console output to a file (not the terminal) and make every file write take `delay` extra seconds."""
+    for handler in handlers:
+        if type(handler) is logging.StreamHandler:
+            handler.setStream(open("console.log", "a"))
+        if delay and isinstance(handler, logging.handlers.RotatingFileHandler):
+            emit = handler.emit
+
+            def slow_emit(record, emit=emit):
+                time.sleep(delay)
+                emit(record)
+            handler.emit = slow_emit
+
+def _legacy_request(logger: logging.Logger, i: int, message: str):
+    logger.info(f"Received chat request: {message[:50]}...")
+    logger.info("Routing to RAG Chain")
+    duration = random.uniform(200, 900)
+    logger.info(f"Path: /chat | Method: POST | Status: 200 | Duration: {'{0:.2f}'.format(duration)}ms")
+
+def _queued_request(logger: logging.Logger, i: int, message: str):
+    app_logging.request_id_var.set(f"req-{i}")
+    logger.info("Received chat request: %s...", message[:50], extra=app_logging.SAMPLED)
+    logger.info("Routing to RAG Chain", extra=app_logging.SAMPLED)
+    duration = random.uniform(200, 900)
+    logger.info(
+        "Path: %s | Method: %s | Status: %s | Duration: %.2fms", "/chat", "POST", 200, duration,
+        extra={
+            "sampled": True, "path": "/chat", "method": "POST", "status": 200, "duration_ms": round(duration, 2),
+            "timings": {"retrieve": {"ms": 12.3, "count": 1}, "llm": {"ms": 640.2, "count": 1}},
+        }
+    )
+
+async def _run(emit, requests: int, concurrency: int) -> dict:
+    logger = logging.getLogger("app")
+    message = "What are the payment terms agreed between the parties in section 4?"
+    overhead_us = []
+    counter = iter(range(requests))
+
+    async def worker():
+        for i in counter:
+            start = time.perf_counter()
+            emit(logger, i, message)
+            overhead_us.append((time.perf_counter() - start) * 1e6)
+            await asyncio.sleep(0)  # Yield like a request awaiting the LLM would
+
+    start = time.perf_counter()
+    await asyncio.gather(*(worker() for _ in range(concurrency)))
+    elapsed = time.perf_counter() - start
+    return {"requests_per_s": round(requests / elapsed, 1), **percentiles(overhead_us, unit="us", digits=1)}
+
+def bench_legacy(args) -> dict:
+    logging.config.dictConfig(LEGACY_CONFIG)
+    _prepare_handlers(logging.getLogger("app").handlers, args.io_delay_ms / 1000)
+    return asyncio.run(_run(_legacy_request, args.requests, args.concurrency))
+
+def bench_queued(args, log_format: str, sample_rate: float) -> dict:
+    settings.LOG_FORMAT = log_format
+    settings.LOG_SAMPLE_RATE = sample_rate
+    settings.LOG_QUEUE_SIZE = max(settings.LOG_QUEUE_SIZE, args.requests * 3)  # Measure overhead, not drops
+    app_logging.setup_logging()
+    _prepare_handlers(app_logging._listener.handlers, args.io_delay_ms / 1000)
+
+    result = asyncio.run(_run(_queued_request, args.requests, args.concurrency))
+    start = time.perf_counter()
+    app_logging.shutdown_logging()  # Waits until the writer has drained the queue
+    result["drain_s"] = round(time.perf_counter() - start, 3)
+    result["dropped"] = app_logging._queue_handler.dropped
+    return result
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--requests", type=int, default=20000)
+    parser.add_argument("--concurrency", type=int, default=64)
+    parser.add_argument("--io-delay-ms", type=float, default=0.0)
+    args = parser.parse_args()
+
+    results = {
+        "sync_text": bench_legacy(args),
+        "queued_text": bench_queued(args, "text", sample_rate=1.0),
+        "queued_json": bench_queued(args, "json", sample_rate=1.0),
+        "queued_json_sampled": bench_queued(args, "json", sample_rate=0.1),
+    }
+    print(json.dumps({"requests": args.requests, "concurrency": args.concurrency, "io_delay_ms": args.io_delay_ms, "results": results}, indent=2))
+
+if __name__ == "__main__":
+    main()
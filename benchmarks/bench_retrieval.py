@@ -0,0 +1,73 @@
+"""
+Retrieval latency: a fresh Chroma client + chain per /chat (old path) vs the pooled handle and compiled chain.
+
+Indexes a synthetic document into a throwaway Chroma directory, then times retriever.invoke() for
+both paths. The LLM is never called.
+
+Usage: python -m benchmarks.bench_retrieval [--paragraphs 300] [--queries 200]
+"""
+import os
+import time
+import json
+import random
+import argparse
+import tempfile
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+
+from langchain_chroma import Chroma
+from langchain.chains.combine_documents import create_stuff_documents_chain
+from langchain.chains import create_retrieval_chain
+from backend.services import file_service
+from backend.services import chat_service
+from backend.services import embedding_cache
+from benchmarks.common import percentiles
+from benchmarks.corpus import write_document, WORDS
+
+def old_path(query: str):
+    vector_store = Chroma(
+        collection_name=file_service.COLLECTION_NAME,
+        persist_directory=file_service.CHROMA_PATH,
+        embedding_function=file_service.get_embeddings()
+    )
+    retriever = vector_store.as_retriever(search_kwargs={"k": 5})
+    create_retrieval_chain(retriever, create_stuff_documents_chain(chat_service.get_llm(), chat_service.RAG_PROMPT))
+    return retriever.invoke(query)
+
+def pooled_path(query: str):
+    chat_service.get_rag_chain()
+    # Dense-only like old_path (get_retriever() may be hybrid), so only pooling is measured
+    return file_service.get_vector_store(file_service.COLLECTION_NAME).as_retriever(search_kwargs={"k": 5}).invoke(query)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--paragraphs", type=int, default=300)
+    parser.add_argument("--queries", type=int, default=200)
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_retrieval_")
+    file_service.CHROMA_PATH = os.path.join(workdir, "chroma_db")
+    embedding_cache.EMBEDDING_CACHE_PATH = os.path.join(workdir, "embedding_cache")
+    file_service.initialize_embeddings()
+
+    doc_path = os.path.join(workdir, "corpus.md")
+    write_document(doc_path, args.paragraphs)
+    file_service.index_document(doc_path, file_service.COLLECTION_NAME)
+
+    rng = random.Random(7)
+    results = {}
+    for name, fn in (("per_request_client", old_path), ("pooled_handle", pooled_path)):
+        # Fresh queries per path so neither benefits from the embedding cache
+        queries = [f"{i} " + " ".join(rng.choice(WORDS) for _ in range(6)) for i in range(args.queries)]
+        fn("warm up")
+        samples = []
+        for query in queries:
+            start = time.perf_counter()
+            fn(query)
+            samples.append((time.perf_counter() - start) * 1000)
+        results[name] = percentiles(samples)
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,84 @@
+"""
+Cold start: time from launching the backend process to its first successful response.
+
+Each run starts `uvicorn backend.main:app` in a fresh working directory (empty data/), polls
+--probe until it answers 200, then polls /readyz until the embedding model is warm (skipped if the
+endpoint doesn't exist or --ready-timeout passes). Reports the median over --runs.
+
+Usage: python -m benchmarks.bench_startup [--runs 5] [--probe /status] [--port 8765] [--ready-timeout 120]
+"""
+import os
+import sys
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import statistics
+import subprocess
+import httpx
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+def _wait_for(client: httpx.Client, url: str, process: subprocess.Popen, timeout: float) -> float | None:
+    """Seconds until `url` answers 200, None on timeout, 404 or process exit."""
+    start = time.perf_counter()
+    while time.perf_counter() - start < timeout and process.poll() is None:
+        try:
+            response = client.get(url)
+            if response.status_code == 200:
+                return time.perf_counter() - start
+            if response.status_code == 404:
+                return None
+        except httpx.TransportError:
+            pass
+        time.sleep(0.02)
+    return None
+
+def run_once(port: int, probe: str, ready_timeout: float) -> dict:
+    workdir = tempfile.mkdtemp(prefix="bench_startup_")
+    env = {**os.environ, "PYTHONPATH": REPO_ROOT, "DEEPSEEK_API_KEY": os.environ.get("DEEPSEEK_API_KEY", "benchmark")}
+    start = time.perf_counter()
+    process = subprocess.Popen(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(port), "--log-level", "warning"],
+        cwd=workdir, env=env, stdout=subprocess.DEVNULL, stderr=subprocess.DEVNULL
+    )
+    try:
+        with httpx.Client(timeout=5) as client:
+            base = f"http://127.0.0.1:{port}"
+            first = _wait_for(client, base + probe, process, timeout=120)
+            if first is None:
+                raise RuntimeError(f"Backend never answered {probe}")
+            first_response_s = time.perf_counter() - start
+            ready = _wait_for(client, base + "/readyz", process, timeout=ready_timeout)
+            ready_s = time.perf_counter() - start if ready is not None else None
+        return {"first_response_s": round(first_response_s, 3), "ready_s": round(ready_s, 3) if ready_s else None}
+    finally:
+        process.terminate()
+        process.wait()
+        shutil.rmtree(workdir, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--runs", type=int, default=5)
+    parser.add_argument("--probe", default="/status", help="Endpoint whose first 200 counts as 'serving'")
+    parser.add_argument("--port", type=int, default=8765)
+    parser.add_argument("--ready-timeout", type=float, default=120)
+    args = parser.parse_args()
+
+    runs = []
+    for _ in range(args.runs):
+        result = run_once(args.port, args.probe, args.ready_timeout)
+        print(json.dumps(result))
+        runs.append(result)
+
+    ready = [run["ready_s"] for run in runs if run["ready_s"] is not None]
+    print(json.dumps({
+        "probe": args.probe,
+        "runs": len(runs),
+        "median_first_response_s": round(statistics.median(run["first_response_s"] for run in runs), 3),
+        "median_ready_s": round(statistics.median(ready), 3) if ready else None,
+    }, indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,115 @@
+"""
+Vector backends: Chroma (HNSW) vs the flat NumPy store (float16 / int8) across document sizes.
+
+For each size, builds a collection from synthetic clustered embeddings in INDEX_BATCH_SIZE-sized
+batches (as index_document does), then reports build time, query latency (search by vector, so the
+embedding model is not timed), on-disk size and recall@k against exact float32 search.
+
+Usage: python -m benchmarks.bench_vector_store [--sizes 200,1000,5000] [--dim 384] [--queries 200] [--k 5]
+"""
+import os
+import time
+import json
+import shutil
+import argparse
+import tempfile
+import numpy as np
+
+os.environ.setdefault("DEEPSEEK_API_KEY", "benchmark")
+
+from langchain_core.embeddings import Embeddings
+from langchain_chroma import Chroma
+from backend.core.settings import settings
+from backend.services.flat_store import FlatVectorStore
+from benchmarks.common import percentiles
+
+class LookupEmbeddings(Embeddings):
+    """Returns precomputed vectors for texts named 'chunk-<row>'."""
+
+    def __init__(self, matrix: np.ndarray):
+        self.matrix = matrix
+
+    def embed_documents(self, texts: list[str]) -> list[list[float]]:
+        return [self.matrix[int(text.split("-")[1])].tolist() for text in texts]
+
+    def embed_query(self, text: str) -> list[float]:
+        return self.embed_documents([text])[0]
+
+def _clustered_vectors(rng: np.random.Generator, n: int, dim: int) -> np.ndarray:
+    """Topic clusters, like chunks of one document: nearest neighbours are close but not trivial."""
+    centers = rng.normal(size=(max(1, n // 20), dim))
+    vectors = centers[rng.integers(0, len(centers), n)] + 0.6 * rng.normal(size=(n, dim))
+    return (vectors / np.linalg.norm(vectors, axis=1, keepdims=True)).astype(np.float32)
+
+def _directory_size(path: str) -> int:
+    return sum(os.path.getsize(os.path.join(root, name)) for root, _, files in os.walk(path) for name in files)
+
+def _open(backend: str, embeddings: Embeddings, path: str):
+    if backend == "chroma":
+        return Chroma(collection_name="bench", embedding_function=embeddings, persist_directory=path)
+    return FlatVectorStore(collection_name="bench", embedding_function=embeddings, persist_directory=path, dtype=backend.split("-")[1])
+
+def run_backend(backend: str, matrix: np.ndarray, queries: np.ndarray, truth: np.ndarray, k: int) -> dict:
+    path = tempfile.mkdtemp(prefix=f"bench_{backend}_")
+    try:
+        embeddings = LookupEmbeddings(matrix)
+        texts = [f"chunk-{row}" for row in range(len(matrix))]
+        batch_size = settings.INDEX_BATCH_SIZE
+
+        start = time.perf_counter()
+        store = _open(backend, embeddings, path)
+        for offset in range(0, len(texts), batch_size):
+            batch = texts[offset:offset + batch_size]
+            store.add_texts(batch, metadatas=[{"row": offset + i} for i in range(len(batch))], ids=batch)
+        if isinstance(store, FlatVectorStore):
+            store.persist()
+        build_s = time.perf_counter() - start
+
+        # Re-open, as the app does after indexing, so queries hit the persisted (memory-mapped) data
+        start = time.perf_counter()
+        store = _open(backend, embeddings, path)
+        open_ms = (time.perf_counter() - start) * 1000
+
+        latencies, hits = [], 0
+        for query, expected in zip(queries, truth):
+            start = time.perf_counter()
+            docs = store.similarity_search_by_vector(query.tolist(), k=k)
+            latencies.append((time.perf_counter() - start) * 1000)
+            hits += len({doc.metadata["row"] for doc in docs} & set(expected.tolist()))
+
+        return {
+            "backend": backend,
+            "build_s": round(build_s, 3),
+            "open_ms": round(open_ms, 3),
+            **percentiles(latencies),
+            "disk_bytes": _directory_size(path),
+            f"recall@{k}": round(hits / (len(queries) * k), 4),
+        }
+    finally:
+        shutil.rmtree(path, ignore_errors=True)
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--sizes", default="200,1000,5000", help="Comma-separated chunk counts")
+    parser.add_argument("--dim", type=int, default=384)
+    parser.add_argument("--queries", type=int, default=200)
+    parser.add_argument("--k", type=int, default=5)
+    parser.add_argument("--backends", default="chroma,flat-float16,flat-int8")
+    args = parser.parse_args()
+
+    rng = np.random.default_rng(42)
+    results = []
+    for size in [int(size) for size in args.sizes.split(",")]:
+        matrix = _clustered_vectors(rng, size, args.dim)
+        # Queries near existing chunks; ground truth by exact float32 cosine search
+        queries = matrix[rng.integers(0, size, args.queries)] + 0.3 * rng.normal(size=(args.queries, args.dim)).astype(np.float32)
+        truth = np.argsort(-(queries @ matrix.T), axis=1)[:, :args.k]
+        for backend in args.backends.split(","):
+            result = {"chunks": size, **run_backend(backend, matrix, queries, truth, args.k)}
+            print(json.dumps(result))
+            results.append(result)
+
+    print(json.dumps(results, indent=2))
+
+if __name__ == "__main__":
+    main()
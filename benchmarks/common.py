@@ -0,0 +1,87 @@
+"""
+Helpers shared by the benchmark scripts: latency percentiles and peak RSS sampling of a process tree.
+"""
+import os
+import time
+import statistics
+import threading
+import httpx
+
+def percentiles(samples: list[float], unit: str = "ms", points: tuple = (50, 95, 99), digits: int = 3) -> dict:
+    """{"p50_ms": ..., "p95_ms": ..., "p99_ms": ..., "mean_ms": ...} of the samples (None without samples)."""
+    keys = [f"p{point}_{unit}" for point in points] + [f"mean_{unit}"]
+    if not samples:
+        return dict.fromkeys(keys)
+    if len(samples) == 1:
+        return dict.fromkeys(keys, round(samples[0], digits))
+    cuts = statistics.quantiles(samples, n=100)
+    result = {f"p{point}_{unit}": round(cuts[point - 1], digits) for point in points}
+    result[f"mean_{unit}"] = round(statistics.fmean(samples), digits)
+    return result
+
+def _children(pid: int) -> list[int]:
+    children = []
+    try:
+        for task in os.listdir(f"/proc/{pid}/task"):
+            with open(f"/proc/{pid}/task/{task}/children") as f:
+                children.extend(int(child) for child in f.read().split())
+    except OSError:
+        pass
+    return children
+
+def _rss_bytes(pid: int) -> int:
+    try:
+        with open(f"/proc/{pid}/statm") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        return 0
+
+def tree_rss_bytes(pid: int) -> int:
+    """Resident memory of a process and all its descendants (Linux /proc)."""
+    total, pending = 0, [pid]
+    while pending:
+        current = pending.pop()
+        total += _rss_bytes(current)
+        pending.extend(_children(current))
+    return total
+
+class PeakRssSampler:
+    """Background sampler of a process tree's RSS; `peak_bytes` is the maximum seen since the last reset()."""
+
+    def __init__(self, pid: int, interval: float = 0.1):
+        self.pid = pid
+        self.interval = interval
+        self.peak_bytes = 0
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, name="rss-sampler", daemon=True)
+
+    def _run(self):
+        while not self._stop.is_set():
+            self.peak_bytes = max(self.peak_bytes, tree_rss_bytes(self.pid))
+            self._stop.wait(self.interval)
+
+    def start(self):
+        self._thread.start()
+        return self
+
+    def reset(self) -> int:
+        """Start a new measurement window; returns the peak of the previous one."""
+        peak = max(self.peak_bytes, tree_rss_bytes(self.pid))
+        self.peak_bytes = 0
+        return peak
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+
+def wait_for_http(client: httpx.Client, url: str, timeout: float, process=None) -> bool:
+    """Poll `url` until it answers 200; False on timeout or if `process` exits."""
+    deadline = time.perf_counter() + timeout
+    while time.perf_counter() < deadline and (process is None or process.poll() is None):
+        try:
+            if client.get(url).status_code == 200:
+                return True
+        except httpx.TransportError:
+            pass
+        time.sleep(0.05)
+    return False
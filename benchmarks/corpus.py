@@ -0,0 +1,72 @@
+"""
+Synthetic, seeded benchmark corpus: markdown documents for RAG and a sales CSV for data analysis.
+
+Usage: python -m benchmarks.corpus --out bench_corpus [--docs 20] [--paragraphs 100] [--csv-rows 100000]
+"""
+import os
+import csv
+import json
+import random
+import argparse
+from datetime import date, timedelta
+
+WORDS = (
+    "contract clause payment invoice delivery warranty liability termination notice party supplier "
+    "customer service level agreement renewal penalty schedule milestone acceptance audit confidential "
+    "obligation remedy dispute arbitration jurisdiction amendment assignment insurance indemnity"
+).split()
+REGIONS = ["north", "south", "east", "west", "central"]
+PRODUCTS = ["laptop", "monitor", "keyboard", "mouse", "dock", "headset", "webcam", "cable"]
+
+def write_document(path: str, paragraphs: int, seed: int = 42, words_per_paragraph: int = 120) -> str:
+    """Markdown document of numbered sections of random vocabulary words."""
+    rng = random.Random(seed)
+    with open(path, "w") as f:
+        f.write(f"# Agreement {seed}\n\n")
+        for i in range(paragraphs):
+            f.write(f"## Section {i}\n\n" + " ".join(rng.choice(WORDS) for _ in range(words_per_paragraph)) + "\n\n")
+    return path
+
+def write_csv(path: str, rows: int, seed: int = 42) -> str:
+    """Sales table: order_id, order_date, region, product, quantity, unit_price, revenue."""
+    rng = random.Random(seed)
+    start = date(2023, 1, 1)
+    with open(path, "w", newline="") as f:
+        writer = csv.writer(f)
+        writer.writerow(["order_id", "order_date", "region", "product", "quantity", "unit_price", "revenue"])
+        for order_id in range(rows):
+            quantity = rng.randint(1, 20)
+            unit_price = round(rng.uniform(5, 2000), 2)
+            writer.writerow([
+                order_id,
+                (start + timedelta(days=rng.randrange(730))).isoformat(),
+                rng.choice(REGIONS),
+                rng.choice(PRODUCTS),
+                quantity,
+                unit_price,
+                round(quantity * unit_price, 2),
+            ])
+    return path
+
+def generate(out_dir: str, docs: int, paragraphs: int, csv_rows: int, seed: int = 42) -> dict:
+    """Write the corpus into out_dir; returns {"documents": [...], "csv": path}."""
+    os.makedirs(out_dir, exist_ok=True)
+    documents = [
+        write_document(os.path.join(out_dir, f"agreement_{i:03d}.md"), paragraphs, seed=seed + i)
+        for i in range(docs)
+    ]
+    table = write_csv(os.path.join(out_dir, f"sales_{csv_rows}.csv"), csv_rows, seed=seed) if csv_rows else None
+    return {"documents": documents, "csv": table}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--out", required=True)
+    parser.add_argument("--docs", type=int, default=20)
+    parser.add_argument("--paragraphs", type=int, default=100)
+    parser.add_argument("--csv-rows", type=int, default=100_000)
+    parser.add_argument("--seed", type=int, default=42)
+    args = parser.parse_args()
+    print(json.dumps(generate(args.out, args.docs, args.paragraphs, args.csv_rows, args.seed), indent=2))
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,88 @@
+"""
+Chat load test: closed-loop clients hammer a running backend at increasing concurrency levels.
+
+For each level reports successful requests/sec, p50/p99 latency and how many requests were shed
+with 429/503 by the concurrency limiter, then the highest throughput whose p99 stays within
+--p99-ms. Start the backend (pointed at a real or stub LLM) and upload a document first.
+
+Usage: python -m benchmarks.load_test [--url http://localhost:8000] [--levels 1,8,32,64] [--duration 20] [--p99-ms 5000]
+"""
+import time
+import json
+import asyncio
+import argparse
+import httpx
+from benchmarks.common import percentiles
+
+QUESTIONS = [
+    "Summarize the document in two sentences.",
+    "What are the payment terms?",
+    "Who are the parties involved?",
+    "List the termination conditions.",
+]
+
+async def _client(client: httpx.AsyncClient, path: str, deadline: float, worker: int, results: dict, questions: list[str]):
+    i = worker
+    while time.perf_counter() < deadline:
+        payload = {"message": questions[i % len(questions)] + f" (#{i})"}  # Unique text: bypasses the answer cache
+        i += 1
+        start = time.perf_counter()
+        try:
+            response = await client.post(path, json=payload)
+            if path.endswith("/stream"):
+                await response.aread()
+            status = response.status_code
+        except httpx.HTTPError:
+            status = "error"
+        elapsed_ms = (time.perf_counter() - start) * 1000
+        if status == 200:
+            results["latencies_ms"].append(elapsed_ms)
+        else:
+            results["statuses"][str(status)] = results["statuses"].get(str(status), 0) + 1
+            if status in (429, 503):
+                await asyncio.sleep(0.1)  # Back off like a well-behaved client
+
+async def run_level(url: str, path: str, concurrency: int, duration: float, headers: dict = None, questions: list[str] = QUESTIONS) -> dict:
+    limits = httpx.Limits(max_connections=concurrency, max_keepalive_connections=concurrency)
+    results = {"latencies_ms": [], "statuses": {}}
+    async with httpx.AsyncClient(base_url=url, limits=limits, timeout=300, headers=headers) as client:
+        start = time.perf_counter()
+        deadline = start + duration
+        await asyncio.gather(*(_client(client, path, deadline, worker, results, questions) for worker in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    return {
+        "concurrency": concurrency,
+        "requests_ok": len(results["latencies_ms"]),
+        "rps": round(len(results["latencies_ms"]) / elapsed, 2),
+        **percentiles(results["latencies_ms"]),
+        "rejected": results["statuses"],
+    }
+
+async def main_async(args):
+    levels = []
+    for concurrency in [int(level) for level in args.levels.split(",")]:
+        level = await run_level(args.url, args.path, concurrency, args.duration)
+        print(json.dumps(level))
+        levels.append(level)
+
+    within_target = [level for level in levels if level["p99_ms"] is not None and level["p99_ms"] <= args.p99_ms]
+    best = max(within_target, key=lambda level: level["rps"], default=None)
+    print(json.dumps({
+        "p99_target_ms": args.p99_ms,
+        "max_rps_within_target": best["rps"] if best else None,
+        "at_concurrency": best["concurrency"] if best else None,
+        "levels": levels,
+    }, indent=2))
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--url", default="http://localhost:8000")
+    parser.add_argument("--path", default="/chat", help="/chat or /chat/stream")
+    parser.add_argument("--levels", default="1,8,32,64", help="Comma-separated client concurrency levels")
+    parser.add_argument("--duration", type=float, default=20, help="Seconds per level")
+    parser.add_argument("--p99-ms", type=float, default=5000)
+    asyncio.run(main_async(parser.parse_args()))
+
+if __name__ == "__main__":
+    main()
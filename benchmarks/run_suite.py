@@ -0,0 +1,255 @@
+"""
+Offline benchmark suite: stub LLM + backend + synthetic corpus, scenario workloads, JSON results.
+
+Starts benchmarks.stub_llm and the backend (uvicorn in a fresh working directory, DEEPSEEK_BASE_URL
+pointed at the stub), generates the corpus, then runs the scenarios:
+- upload: uploads --docs documents from --upload-concurrency clients and waits for their indexing jobs
+- rag_chat: closed-loop /chat against one indexed document at each --rag-levels concurrency
+- pandas_chat: uploads a --csv-rows CSV (--engine pandas or sql), then closed-loop /chat against it
+Each scenario reports throughput, p50/p95/p99 latency and the peak RSS of the backend process tree.
+Results (with commit and host info) are written to --output as JSON; --baseline prints the relative
+change of every metric against an earlier results file, so regressions show up between commits.
+
+Usage: python -m benchmarks.run_suite [--output bench_results.json] [--baseline old.json]
+       [--scenarios upload,rag_chat,pandas_chat] [--ttft-ms 300] [--tokens-per-s 50]
+"""
+import os
+import sys
+import time
+import json
+import shutil
+import asyncio
+import argparse
+import platform
+import tempfile
+import subprocess
+import httpx
+from benchmarks.common import percentiles, PeakRssSampler, wait_for_http
+from benchmarks.corpus import generate
+from benchmarks.load_test import run_level, QUESTIONS
+
+REPO_ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+SCENARIOS = ("upload", "rag_chat", "pandas_chat")
+PANDAS_QUESTIONS = [
+    "What is the total revenue per region?",
+    "Which product sold the most units?",
+    "What is the average unit price per product?",
+]
+
+def _start(command: list[str], cwd: str, env: dict, log_name: str) -> subprocess.Popen:
+    log = open(os.path.join(cwd, log_name), "w")
+    return subprocess.Popen(command, cwd=cwd, env=env, stdout=log, stderr=subprocess.STDOUT)
+
+def _stop(process: subprocess.Popen):
+    process.terminate()
+    try:
+        process.wait(timeout=30)
+    except subprocess.TimeoutExpired:
+        process.kill()
+        process.wait()
+
+async def _upload(client: httpx.AsyncClient, path: str, session_id: str, params: dict = None) -> dict:
+    """Upload a file and wait for its processing job; returns {"ok", "latency_ms"}."""
+    start = time.perf_counter()
+    with open(path, "rb") as f:
+        content = f.read()
+    response = await client.post(
+        "/upload", files={"file": (os.path.basename(path), content)}, params=params, headers={"X-Session-Id": session_id}
+    )
+    ok = response.status_code == 200
+    job_id = response.json().get("job_id") if ok else None
+    while job_id:
+        job = (await client.get(f"/jobs/{job_id}")).json()
+        if job["status"] in ("succeeded", "failed"):
+            ok = job["status"] == "succeeded"
+            break
+        await asyncio.sleep(0.05)
+    return {"ok": ok, "latency_ms": (time.perf_counter() - start) * 1000, "bytes": len(content)}
+
+async def scenario_upload(url: str, documents: list[str], concurrency: int) -> dict:
+    pending = iter(enumerate(documents))
+    results = []
+
+    async def worker(client):
+        for i, path in pending:
+            results.append(await _upload(client, path, f"bench-upload-{i}"))
+
+    async with httpx.AsyncClient(base_url=url, timeout=600) as client:
+        start = time.perf_counter()
+        await asyncio.gather(*(worker(client) for _ in range(concurrency)))
+        elapsed = time.perf_counter() - start
+
+    succeeded = [result for result in results if result["ok"]]
+    return {
+        "documents": len(results),
+        "failed": len(results) - len(succeeded),
+        "docs_per_s": round(len(succeeded) / elapsed, 3),
+        "mb_per_s": round(sum(result["bytes"] for result in succeeded) / elapsed / 1e6, 3),
+        **percentiles([result["latency_ms"] for result in succeeded]),
+    }
+
+async def scenario_chat(url: str, session_id: str, levels: list[int], duration: float, questions: list[str] = QUESTIONS) -> dict:
+    headers = {"X-Session-Id": session_id}
+    # One untimed request first: builds the chain/agent and loads the data, which is not steady-state cost
+    async with httpx.AsyncClient(base_url=url, timeout=600, headers=headers) as client:
+        await client.post("/chat", json={"message": questions[0]})
+    return {"levels": [await run_level(url, "/chat", concurrency, duration, headers=headers, questions=questions) for concurrency in levels]}
+
+async def run_scenarios(args, url: str, corpus: dict, sampler: PeakRssSampler) -> dict:
+    results = {}
+    scenarios = args.scenarios.split(",")
+    if "upload" in scenarios:
+        sampler.reset()
+        results["upload"] = await scenario_upload(url, corpus["documents"], args.upload_concurrency)
+        results["upload"]["peak_rss_mb"] = round(sampler.reset() / 1e6, 1)
+        print(json.dumps({"upload": results["upload"]}), file=sys.stderr)
+
+    if "rag_chat" in scenarios:
+        async with httpx.AsyncClient(base_url=url, timeout=600) as client:
+            # Re-uploading an indexed document only switches the session to it
+            setup = await _upload(client, corpus["documents"][0], "bench-rag")
+        if not setup["ok"]:
+            raise RuntimeError("Indexing the RAG document failed; see backend.log")
+        sampler.reset()
+        levels = [int(level) for level in args.rag_levels.split(",")]
+        results["rag_chat"] = await scenario_chat(url, "bench-rag", levels, args.duration)
+        results["rag_chat"]["peak_rss_mb"] = round(sampler.reset() / 1e6, 1)
+        print(json.dumps({"rag_chat": results["rag_chat"]}), file=sys.stderr)
+
+    if "pandas_chat" in scenarios and corpus["csv"]:
+        sampler.reset()
+        async with httpx.AsyncClient(base_url=url, timeout=600) as client:
+            setup = await _upload(client, corpus["csv"], "bench-pandas", params={"engine": args.engine})
+        if not setup["ok"]:
+            raise RuntimeError("Converting the CSV failed; see backend.log")
+        levels = [int(level) for level in args.pandas_levels.split(",")]
+        results["pandas_chat"] = {
+            "engine": args.engine,
+            "rows": args.csv_rows,
+            "convert_ms": round(setup["latency_ms"], 1),
+            **await scenario_chat(url, "bench-pandas", levels, args.duration, questions=PANDAS_QUESTIONS),
+        }
+        results["pandas_chat"]["peak_rss_mb"] = round(sampler.reset() / 1e6, 1)
+        print(json.dumps({"pandas_chat": results["pandas_chat"]}), file=sys.stderr)
+    return results
+
+def _commit() -> str | None:
+    try:
+        return subprocess.check_output(["git", "rev-parse", "--short", "HEAD"], cwd=REPO_ROOT, text=True).strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+def _flatten(value, prefix: str = "") -> dict:
+    """{"rag_chat.levels[8].p99_ms": 812.0, ...} of every numeric metric (levels keyed by concurrency)."""
+    if isinstance(value, dict):
+        flat = {}
+        for key, item in value.items():
+            flat.update(_flatten(item, f"{prefix}.{key}" if prefix else key))
+        return flat
+    if isinstance(value, list):
+        flat = {}
+        for i, item in enumerate(value):
+            label = item.get("concurrency", i) if isinstance(item, dict) else i
+            flat.update(_flatten(item, f"{prefix}[{label}]"))
+        return flat
+    if isinstance(value, (int, float)) and not isinstance(value, bool):
+        return {prefix: value}
+    return {}
+
+def compare(baseline: dict, current: dict) -> dict:
+    """Relative change (%) of every metric present in both results."""
+    before, after = _flatten(baseline["scenarios"]), _flatten(current["scenarios"])
+    return {
+        metric: {"baseline": before[metric], "current": after[metric], "change_pct": round((after[metric] - before[metric]) / before[metric] * 100, 1)}
+        for metric in after
+        if metric in before and before[metric]
+    }
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--output", default="bench_results.json")
+    parser.add_argument("--baseline", help="Earlier results file to compare against")
+    parser.add_argument("--scenarios", default=",".join(SCENARIOS))
+    parser.add_argument("--port", type=int, default=8766)
+    parser.add_argument("--stub-port", type=int, default=8901)
+    parser.add_argument("--ttft-ms", type=float, default=300)
+    parser.add_argument("--tokens-per-s", type=float, default=50)
+    parser.add_argument("--completion-tokens", type=int, default=60)
+    parser.add_argument("--docs", type=int, default=10)
+    parser.add_argument("--paragraphs", type=int, default=100)
+    parser.add_argument("--upload-concurrency", type=int, default=4)
+    parser.add_argument("--rag-levels", default="1,8,32")
+    parser.add_argument("--csv-rows", type=int, default=200_000)
+    parser.add_argument("--engine", default="pandas", choices=("pandas", "sql"))
+    parser.add_argument("--pandas-levels", default="1,4")
+    parser.add_argument("--duration", type=float, default=15, help="Seconds per chat concurrency level")
+    parser.add_argument("--ready-timeout", type=float, default=300, help="Seconds to wait for the embedding model")
+    parser.add_argument("--answer-cache", action="store_true", help="Keep the semantic answer cache on (off: every chat reaches the LLM)")
+    parser.add_argument("--keep-workdir", action="store_true")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix="bench_suite_")
+    corpus = generate(os.path.join(workdir, "corpus"), args.docs, args.paragraphs, args.csv_rows)
+    url = f"http://127.0.0.1:{args.port}"
+    stub_url = f"http://127.0.0.1:{args.stub_port}"
+    pythonpath = os.pathsep.join(filter(None, [REPO_ROOT, os.environ.get("PYTHONPATH")]))
+    env = {
+        **os.environ,
+        "PYTHONPATH": pythonpath,
+        "DEEPSEEK_API_KEY": "benchmark",
+        "DEEPSEEK_BASE_URL": f"{stub_url}/v1",
+        "ANSWER_CACHE_ENABLED": "true" if args.answer_cache else "false",
+    }
+
+    stub = _start(
+        [sys.executable, "-m", "benchmarks.stub_llm", "--port", str(args.stub_port), "--ttft-ms", str(args.ttft_ms),
+         "--tokens-per-s", str(args.tokens_per_s), "--completion-tokens", str(args.completion_tokens)],
+        workdir, env, "stub_llm.log"
+    )
+    backend = _start(
+        [sys.executable, "-m", "uvicorn", "backend.main:app", "--port", str(args.port), "--log-level", "warning"],
+        workdir, env, "backend.log"
+    )
+    sampler = PeakRssSampler(backend.pid).start()
+    try:
+        with httpx.Client(timeout=5) as client:
+            if not wait_for_http(client, f"{stub_url}/healthz", 30, stub):
+                raise RuntimeError("Stub LLM did not start; see stub_llm.log")
+            start = time.perf_counter()
+            if not wait_for_http(client, f"{url}/readyz", args.ready_timeout, backend):
+                raise RuntimeError(f"Backend not ready after {args.ready_timeout}s; see {workdir}/backend.log")
+            ready_s = time.perf_counter() - start
+
+        scenarios = asyncio.run(run_scenarios(args, url, corpus, sampler))
+        results = {
+            "meta": {
+                "commit": _commit(),
+                "timestamp": time.strftime("%Y-%m-%dT%H:%M:%S%z"),
+                "python": platform.python_version(),
+                "platform": platform.platform(),
+                "cpus": os.cpu_count(),
+                "backend_ready_s": round(ready_s, 2),
+                "args": vars(args),
+            },
+            "scenarios": scenarios,
+        }
+        with open(args.output, "w") as f:
+            json.dump(results, f, indent=2)
+        print(json.dumps(results, indent=2))
+
+        if args.baseline:
+            with open(args.baseline) as f:
+                changes = compare(json.load(f), results)
+            print(json.dumps({"baseline": args.baseline, "changes": changes}, indent=2))
+    except Exception:
+        args.keep_workdir = True  # Keep the logs for inspection
+        raise
+    finally:
+        sampler.stop()
+        _stop(backend)
+        _stop(stub)
+        if not args.keep_workdir:
+            shutil.rmtree(workdir, ignore_errors=True)
+
+if __name__ == "__main__":
+    main()
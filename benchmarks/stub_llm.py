@@ -0,0 +1,114 @@
+"""
+OpenAI-compatible stub chat model for offline benchmarks: no credits, deterministic timing.
+
+Serves POST /v1/chat/completions (and /chat/completions), streaming or not. Every answer waits
+--ttft-ms before its first token, then emits --completion-tokens tokens at --tokens-per-s. Replies
+are shaped so every chat mode works end to end:
+- requests offering tools (pandas agent) get one python_repl_ast call, then a text answer;
+- the DuckDB SQL prompt gets a valid query over `data`;
+- anything else (RAG answers, SQL answer summaries) gets filler text.
+
+Usage: python -m benchmarks.stub_llm [--port 8901] [--ttft-ms 300] [--tokens-per-s 50] [--completion-tokens 60]
+Point the backend at it with DEEPSEEK_BASE_URL=http://127.0.0.1:8901/v1
+"""
+import time
+import json
+import uuid
+import asyncio
+import argparse
+import uvicorn
+from fastapi import FastAPI, Request
+from fastapi.responses import StreamingResponse
+
+FILLER = "the answer is based on the provided context and covers the requested points in detail".split()
+PANDAS_CODE = "df.describe(include='all').T.head(10)"
+SQL_QUERY = "SELECT count(*) AS row_count FROM data"
+
+class StubConfig:
+    ttft_ms: float = 300
+    tokens_per_s: float = 50
+    completion_tokens: int = 60
+
+config = StubConfig()
+app = FastAPI(title="Stub LLM")
+
+def _reply(body: dict) -> tuple[str, dict | None]:
+    """(text, tool call) to answer a chat completion request with."""
+    messages = body.get("messages", [])
+    if body.get("tools") and not any(message.get("role") == "tool" for message in messages):
+        name = body["tools"][0]["function"]["name"]
+        return "", {"id": f"call_{uuid.uuid4().hex[:12]}", "type": "function", "function": {"name": name, "arguments": json.dumps({"query": PANDAS_CODE})}}
+    if any("DuckDB SQL expert" in str(message.get("content", "")) for message in messages):
+        return SQL_QUERY, None
+    tokens = [FILLER[i % len(FILLER)] for i in range(config.completion_tokens)]
+    return " ".join(tokens), None
+
+def _usage(body: dict, text: str) -> dict:
+    prompt_tokens = sum(len(str(message.get("content") or "")) for message in body.get("messages", [])) // 4
+    completion_tokens = max(1, len(text.split()))
+    return {"prompt_tokens": prompt_tokens, "completion_tokens": completion_tokens, "total_tokens": prompt_tokens + completion_tokens}
+
+def _chunk(completion_id: str, model: str, delta: dict, finish_reason: str = None) -> str:
+    payload = {
+        "id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+        "choices": [{"index": 0, "delta": delta, "finish_reason": finish_reason}],
+    }
+    return f"data: {json.dumps(payload)}\n\n"
+
+async def _stream(body: dict, completion_id: str, text: str, tool_call: dict | None):
+    model = body.get("model", "stub")
+    await asyncio.sleep(config.ttft_ms / 1000)
+    yield _chunk(completion_id, model, {"role": "assistant", "content": ""})
+    if tool_call:
+        yield _chunk(completion_id, model, {"tool_calls": [{"index": 0, **tool_call}]})
+        yield _chunk(completion_id, model, {}, "tool_calls")
+    else:
+        for i, token in enumerate(text.split(" ")):
+            if i:
+                await asyncio.sleep(1 / config.tokens_per_s)
+            yield _chunk(completion_id, model, {"content": token if i == 0 else " " + token})
+        yield _chunk(completion_id, model, {}, "stop")
+    if (body.get("stream_options") or {}).get("include_usage"):
+        usage = {"id": completion_id, "object": "chat.completion.chunk", "created": int(time.time()), "model": model,
+                 "choices": [], "usage": _usage(body, text)}
+        yield f"data: {json.dumps(usage)}\n\n"
+    yield "data: [DONE]\n\n"
+
+@app.post("/v1/chat/completions")
+@app.post("/chat/completions")
+async def chat_completions(request: Request):
+    body = await request.json()
+    completion_id = f"chatcmpl-{uuid.uuid4().hex[:12]}"
+    text, tool_call = _reply(body)
+    if body.get("stream"):
+        return StreamingResponse(_stream(body, completion_id, text, tool_call), media_type="text/event-stream")
+
+    generated = 0 if tool_call else len(text.split()) - 1
+    await asyncio.sleep(config.ttft_ms / 1000 + generated / config.tokens_per_s)
+    message = {"role": "assistant", "content": text or None}
+    if tool_call:
+        message["tool_calls"] = [tool_call]
+    return {
+        "id": completion_id, "object": "chat.completion", "created": int(time.time()), "model": body.get("model", "stub"),
+        "choices": [{"index": 0, "message": message, "finish_reason": "tool_calls" if tool_call else "stop"}],
+        "usage": _usage(body, text),
+    }
+
+@app.get("/healthz")
+def healthz():
+    return {"status": "ok"}
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument("--host", default="127.0.0.1")
+    parser.add_argument("--port", type=int, default=8901)
+    parser.add_argument("--ttft-ms", type=float, default=StubConfig.ttft_ms)
+    parser.add_argument("--tokens-per-s", type=float, default=StubConfig.tokens_per_s)
+    parser.add_argument("--completion-tokens", type=int, default=StubConfig.completion_tokens)
+    args = parser.parse_args()
+
+    config.ttft_ms, config.tokens_per_s, config.completion_tokens = args.ttft_ms, args.tokens_per_s, args.completion_tokens
+    uvicorn.run(app, host=args.host, port=args.port, log_level="warning")
+
+if __name__ == "__main__":
+    main()
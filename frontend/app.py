@@ -1,18 +1,55 @@
+import json
+import time
+import uuid
 import streamlit as st
 import requests
 
 # Backend Configuration
 BACKEND_URL = "http://localhost:8000"
 
+def iter_sse(response):
+    """Parse a Server-Sent Events response into (event, data) pairs as they arrive."""
+    event, data = "message", []
+    for line in response.iter_lines(decode_unicode=True):
+        if line.startswith("event:"):
+            event = line[len("event:"):].strip()
+        elif line.startswith("data:"):
+            data.append(line[len("data:"):].strip())
+        elif not line and data:
+            yield event, json.loads("\n".join(data))
+            event, data = "message", []
+
+def render_step(step):
+    """Show one agent tool call (code + result)."""
+    st.markdown(f"**Action:** `{step['tool']}`")
+    # Highlight Python code if present
+    if "python" in step['tool'].lower():
+        st.code(step['input'].get('query', step['input']), language='python')
+    elif "sql" in step['tool'].lower():
+        st.code(step['input'].get('query', step['input']), language='sql')
+    else:
+        st.text(f"Input: {step['input']}")
+
+    st.markdown("**Result:**")
+    st.text(step['output'])
+    st.divider()
+
 st.set_page_config(page_title="DeepSeek Chat File", page_icon="📄", layout="wide")
 
 st.title("📄 Chat with your Files (DeepSeek)")
 
 # --- Session State Management ---
+# Each browser session has its own active document on the backend; the id is kept in the URL
+# so a page reload resumes the same session
+if "session_id" not in st.session_state:
+    st.session_state.session_id = st.query_params.get("session") or uuid.uuid4().hex
+    st.query_params["session"] = st.session_state.session_id
+SESSION_HEADERS = {"X-Session-Id": st.session_state.session_id}
+
 # Fetch backend status on app load
 if "backend_status" not in st.session_state:
     try:
-        status_res = requests.get(f"{BACKEND_URL}/status", timeout=2)
+        status_res = requests.get(f"{BACKEND_URL}/status", headers=SESSION_HEADERS, timeout=2)
         if status_res.status_code == 200:
             st.session_state.backend_status = status_res.json()
         else:
@@ -27,32 +64,81 @@ with st.sidebar:
     # Show Active File info if exists
     status = st.session_state.backend_status
     if status.get("active"):
-        st.info(f"✅ **Active File:**\n\n`{status['filename']}`\n\nMode: **{status['type'].upper()}**")
+        mode = status['type'].upper()
+        if status.get("engine") == "sql":
+            mode += " (SQL)"
+        st.info(f"✅ **Active File:**\n\n`{status['filename']}`\n\nMode: **{mode}**")
         st.caption("Upload a new file below to replace it.")
     
     uploaded_file = st.file_uploader("Choose a file", type=["pdf", "txt", "md", "csv", "xlsx"])
     
     if uploaded_file is not None:
+        engine = "pandas"
+        if uploaded_file.name.endswith((".csv", ".xlsx", ".xls")):
+            engine_label = st.radio(
+                "Analysis engine",
+                ["Pandas Agent", "SQL (DuckDB, large files)"],
+                help="SQL mode queries the file out-of-core and scales to files larger than memory."
+            )
+            engine = "sql" if engine_label.startswith("SQL") else "pandas"
+
+        params = {"filename": uploaded_file.name, "engine": engine}
+        # Same name as the active document: a revision only if asked for, never inferred from the name
+        if status.get("type") == "rag" and status.get("document_id") and uploaded_file.name == status.get("filename"):
+            if st.checkbox(
+                "Upload as a new revision of the active document", value=True,
+                help="Only changed chunks are re-embedded. Unchecked, the file is indexed as a separate document."
+            ):
+                params["replaces"] = status["document_id"]
+
         if st.button("Process File"):
-            with st.spinner("Uploading and Indexing..."):
-                try:
-                    files = {"file": (uploaded_file.name, uploaded_file, uploaded_file.type)}
-                    response = requests.post(f"{BACKEND_URL}/upload", files=files)
-                    
-                    if response.status_code == 200:
-                        data = response.json()
+            try:
+                with st.spinner("Uploading..."):
+                    # Stream the raw bytes (no multipart body built in memory); the backend writes them straight to disk
+                    uploaded_file.seek(0)
+                    response = requests.post(
+                        f"{BACKEND_URL}/upload/stream",
+                        data=uploaded_file,
+                        params=params,
+                        headers={**SESSION_HEADERS, "Content-Type": "application/octet-stream"},
+                        timeout=120
+                    )
+
+                if response.status_code == 200:
+                    data = response.json()
+                    job_id = data.get("job_id")
+                    succeeded = True
+
+                    # Uploads are indexed/converted in the background: poll the job until it finishes
+                    if job_id:
+                        progress_bar = st.progress(0.0, text="Queued for processing...")
+                        while True:
+                            job = requests.get(f"{BACKEND_URL}/jobs/{job_id}", timeout=5).json()
+                            if job["status"] in ("succeeded", "failed"):
+                                break
+                            text = f"{job['phase'].capitalize()}: {job['chunks_done']}/{job['chunks_total']} chunks"
+                            if job["throughput_chunks_per_sec"]:
+                                text += f" ({job['throughput_chunks_per_sec']} chunks/s)"
+                            progress_bar.progress(min(job["progress"], 1.0), text=text)
+                            time.sleep(0.5)
+
+                        succeeded = job["status"] == "succeeded"
+                        if succeeded:
+                            progress_bar.progress(1.0, text="Processing complete.")
+                            st.success(job["result"]["message"])
+                        else:
+                            st.error(f"Processing failed: {job['error']}")
+                    else:
                         st.success(data.get("message", "File processed!"))
-                        # Update session state locally to reflect change immediately
-                        st.session_state.backend_status = {
-                            "active": True,
-                            "filename": data["filename"],
-                            "type": "pandas" if data["filename"].endswith((".csv", ".xlsx", ".xls")) else "rag"
-                        }
+
+                    if succeeded:
+                        # Re-read the session status (incl. the new document id) on the rerun
+                        st.session_state.pop("backend_status", None)
                         st.rerun() # Refresh to show new status
-                    else:
-                        st.error(f"Error: {response.text}")
-                except Exception as e:
-                    st.error(f"Connection failed: {e}")
+                else:
+                    st.error(f"Error: {response.text}")
+            except Exception as e:
+                st.error(f"Connection failed: {e}")
 
     st.markdown("---")
     st.markdown("### Instructions")
@@ -82,35 +168,37 @@ if prompt := st.chat_input("Ask something about your document..."):
 
     # Display assistant response
     with st.chat_message("assistant"):
+        # Agent steps appear above the answer as each tool call finishes
+        steps_expander = None
         message_placeholder = st.empty()
+        message_placeholder.markdown("_Analyzing context..._")
         full_response = ""
         
         try:
-            with st.spinner("Analyzing context..."):
-                response = requests.post(
-                    f"{BACKEND_URL}/chat",
-                    json={"message": prompt}
-                )
-                
+            response = requests.post(
+                f"{BACKEND_URL}/chat/stream",
+                json={"message": prompt},
+                headers=SESSION_HEADERS,
+                stream=True
+            )
+
             if response.status_code == 200:
-                data = response.json()
-                full_response = data.get("response", "")
-                steps = data.get("steps", [])
-
-                # Show reasoning steps if available (e.g. for Excel analysis)
-                if steps:
-                    with st.expander("🕵️ Agent Reasoning & Code Execution", expanded=False):
-                        for step in steps:
-                            st.markdown(f"**Action:** `{step['tool']}`")
-                            # Highlight Python code if present
-                            if "python" in step['tool'].lower():
-                                st.code(step['input'].get('query', step['input']), language='python')
-                            else:
-                                st.text(f"Input: {step['input']}")
-                            
-                            st.markdown("**Result:**")
-                            st.text(step['output'])
-                            st.divider()
+                for event, data in iter_sse(response):
+                    if event == "step":
+                        if steps_expander is None:
+                            # Show reasoning steps if available (e.g. for Excel analysis)
+                            with message_placeholder.container():
+                                steps_expander = st.expander("🕵️ Agent Reasoning & Code Execution", expanded=True)
+                            message_placeholder = st.empty()
+                        with steps_expander:
+                            render_step(data)
+                    elif event == "token":
+                        full_response += data["text"]
+                        message_placeholder.markdown(full_response + "▌")
+                    elif event == "done":
+                        full_response = data.get("response", full_response)
+                    elif event == "error":
+                        st.error(f"Backend Error: {data['detail']}")
 
                 message_placeholder.markdown(full_response)
                 
@@ -27,8 +27,18 @@ echo "Starting FastAPI Backend..."
 python backend/main.py &
 BACKEND_PID=$!
 
-# Wait for backend to be ready (simple sleep for now)
-sleep 2
+# Wait until the backend answers (the embedding model keeps warming up in the background; see /readyz)
+for _ in $(seq 1 60); do
+    if curl -sf http://localhost:8000/healthz >/dev/null; then
+        echo "Backend is up."
+        break
+    fi
+    if ! kill -0 $BACKEND_PID 2>/dev/null; then
+        echo "Backend exited during startup."
+        exit 1
+    fi
+    sleep 0.5
+done
 
 # Start Frontend
 echo "Starting Streamlit Frontend..."
@@ -0,0 +1,24 @@
+import logging
+import uvicorn.config
+
+def test_uvicorn_cli_loggers_go_through_the_queue(tmp_path, monkeypatch):
+    monkeypatch.chdir(tmp_path)  # logs/ is created in the working directory
+    monkeypatch.setenv("DEEPSEEK_API_KEY", "test")
+    # Same order as `uvicorn backend.main:app`: uvicorn's logging config first, then the app import
+    config = uvicorn.config.Config("backend.main:app")
+    config.load()
+    from backend.core import logging as app_logging
+
+    for name in ("uvicorn.access", "uvicorn.error"):
+        logger = logging.getLogger(name)
+        assert logger.handlers == [app_logging._queue_handler]
+        assert not logger.propagate
+
+    queued = []
+    monkeypatch.setattr(app_logging._queue_handler, "enqueue", queued.append)
+    sampling = next(f for f in app_logging._queue_handler.filters if isinstance(f, app_logging.SamplingFilter))
+    monkeypatch.setattr(sampling, "rate", 0.0)
+    access = logging.getLogger("uvicorn.access")
+    access.info('%s - "%s %s HTTP/%s" %d', "127.0.0.1:5000", "GET", "/healthz", "1.1", 200)
+    access.warning('%s - "%s %s HTTP/%s" %d', "127.0.0.1:5000", "GET", "/missing", "1.1", 404)
+    assert [record.levelno for record in queued] == [logging.WARNING]